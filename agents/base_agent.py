@@ -0,0 +1,94 @@
+"""
+RaceAgent - Zajednička baza agenata simulacije
+Nosi RaceContext utrke (konfiguracija, JID namespace, transport) i bira
+transport: XMPP (default) ili in-process LocalBus bez servera.
+Sve odlazne poruke idu kroz build_message (sent_at + seq za metrike), a
+tijela poruka kroz encode_body / decode_body (messaging.codec - kompaktna
+shema po ontologiji, JSON kao fallback).
+"""
+
+import time
+
+from spade.agent import Agent
+from spade.behaviour import FSMBehaviour
+from spade.message import Message
+
+from config.race_context import RaceContext
+from messaging import codec
+
+
+class RaceAgent(Agent):
+    """SPADE agent vezan uz kontekst jedne utrke"""
+
+    def __init__(self, jid, password, context=None):
+        super().__init__(jid, password)
+        self.context = context or RaceContext()
+        self.config = self.context.config
+        self.message_seq = 0  # redni broj odlaznih poruka ovog agenta
+        self.profiler = self.context.profiler
+
+        self.bus = self.context.bus
+        if self.bus is not None:
+            # Behaviour.send ide kroz agent.container - preusmjeri na bus
+            self.container.unregister(self.jid)
+            self.container = self.bus
+            self.bus.register(self)
+
+    def build_message(self, to, ontology, body, performative="inform", codec_name=None):
+        """
+        Nova poruka s vremenom slanja i rednim brojem u metapodacima.
+        body je dict (kodira se po ontologiji) ili već kodirano tijelo iz encode_body.
+        """
+        if isinstance(body, dict):
+            body, codec_name = self.encode_body(body, ontology)
+        self.message_seq += 1
+        msg = Message(to=str(to))
+        msg.set_metadata("performative", performative)
+        msg.set_metadata("ontology", ontology)
+        msg.set_metadata("sent_at", repr(time.time()))
+        msg.set_metadata("seq", str(self.message_seq))
+        if codec_name:
+            msg.set_metadata("codec", codec_name)
+        msg.body = body
+        return msg
+
+    def encode_body(self, payload, ontology=None):
+        """(tijelo, naziv sheme) iz dicta - za poruke koje idu više primatelja"""
+        if self.profiler is not None:
+            return self.profiler.timed_codec(codec.encode, payload, ontology, self.config.MESSAGE_CODEC)
+        return codec.encode(payload, ontology, self.config.MESSAGE_CODEC)
+
+    def decode_body(self, msg):
+        """Dict iz tijela primljene poruke (shema iz metapodatka codec)"""
+        if self.profiler is not None:
+            return self.profiler.timed_codec(codec.decode, msg.body, msg.get_metadata("codec"))
+        return codec.decode(msg.body, msg.get_metadata("codec"))
+
+    def add_behaviour(self, behaviour, template=None):
+        if self.profiler is not None:
+            self.profiler.instrument(self, behaviour)
+        super().add_behaviour(behaviour, template)
+
+    async def _async_start(self, auto_register=True):
+        if self.bus is None:
+            return await super()._async_start(auto_register=auto_register)
+
+        # LocalBus - bez XMPP konekcije, samo setup i pokretanje behaviours
+        await self.setup()
+        self._alive.set()
+        for behaviour in self.behaviours:
+            if not behaviour.is_running:
+                behaviour.set_agent(self)
+                if issubclass(type(behaviour), FSMBehaviour):
+                    for _, state in behaviour.get_states().items():
+                        state.set_agent(self)
+                behaviour.start()
+
+    async def _async_stop(self):
+        if self.bus is None:
+            return await super()._async_stop()
+
+        for behaviour in self.behaviours:
+            behaviour.kill()
+        self.bus.unregister(self.jid)
+        self._alive.clear()
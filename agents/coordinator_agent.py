@@ -1,46 +1,75 @@
 """
 CoordinatorAgent - Centralni koordinator utrke
 FIXED: Centralizirani position tracking baziran na total_time
+Uz NUM_SHARDS > 1 je root koordinator: lap update primaju shardovi
+(agents.shard_coordinator), a ovdje se njihovi krugovi spajaju u globalni
+leaderboard i live timing.
 """
 
 import asyncio
 import json
+import time
 from datetime import datetime
-from spade.agent import Agent
 from spade.behaviour import CyclicBehaviour
-from spade.message import Message
-import pandas as pd
-import numpy as np
-
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.race_config import RaceConfig
+
+from agents.base_agent import RaceAgent
+from agents.lap_stage import LapStage
+from agents.position_tracker import PositionTracker
+from storage.lap_store import LapStore, laps_dataframe, tire_strategy
+from messaging.live_timing import LiveTimingFeed
+from messaging.metrics import RaceMetrics
 
 
-class CoordinatorAgent(Agent):
+class CoordinatorAgent(RaceAgent):
     """Koordinator utrke - upravlja pozicijama i rezultatima"""
 
-    def __init__(self, jid, password):
-        super().__init__(jid, password)
+    def __init__(self, jid, password, context=None):
+        super().__init__(jid, password, context=context)
+        self.seed = self.context.seed  # Seed label utrke - ide u rezultate za replay
         self.race_results = []
         self.race_started = False
         self.race_finished = False
+        self.race_finished_event = asyncio.Event()
+        self.run_id = None  # Postavlja se pri spremanju u Parquet dataset
 
         # NOVO: Position tracking
-        self.rider_positions = {}  # {rider_id: {'total_time': float, 'position': int, 'lap': int}}
+        self.rider_positions = {}  # {rider_id: {'total_time': float, 'lap': int, 'tire_wear': float}}
+        self.position_tracker = PositionTracker()  # pozicije: position_tracker.position(rider_id)
         self.finished_riders = set()
 
+        # Batch protokol: {lap: {rider_id: jid}} vozača koji čekaju standings
+        self.pending_lap_updates = {}
+        self.batch_opened = {}   # {lap: vrijeme prvog update-a u batchu}
+        self.batch_times = {}    # {lap: {rider_id: total_time}} - standings batcha iz vremena tog kruga
+
+        # Live timing: vremena po krugu dok krug nije kompletan, zatim frame u feed.
+        # Kompletan krug se briše iz lap_table, pa per-lap stanje ne raste s utrkom.
+        self.lap_table = {}      # {lap: {rider_id: (total_time, tire_wear)}}
+        self.completed_laps = 0  # zadnji krug koji su odvezli svi vozači
+        self.lap_stage = LapStage(self.config.NUM_RIDERS)  # gapovi i pretjecanja po kompletnom krugu
+        self.live_timing = LiveTimingFeed(self.config.LIVE_TIMING_BUFFER)
+
+        # Latencija, dubina reda i protok poruka
+        self.metrics = RaceMetrics()
+
     class RaceCoordinator(CyclicBehaviour):
         async def run(self):
-            msg = await self.receive(timeout=1)
+            config = self.agent.config
+            timeout = config.BATCH_WINDOW if config.BATCH_LAP_UPDATES else config.RECEIVE_TIMEOUT
+            msg = await self.receive(timeout=timeout)
+
+            if msg:
+                self.agent.metrics.record_received(msg, self.queue.qsize())
+            else:
+                self.agent.metrics.record_timeout()
 
             if msg:
                 ontology = msg.get_metadata("ontology")
 
                 # Lap update - ažuriraj pozicije
                 if ontology == "lap_update":
-                    data = json.loads(msg.body)
+                    data = self.agent.decode_body(msg)
                     rider_id = data['rider_id']
 
                     # Update tracking
@@ -50,50 +79,162 @@ class CoordinatorAgent(Agent):
                         'tire_wear': data['tire_wear']
                     }
 
-                    # Izračunaj pozicije baziran na total_time
-                    self.agent.update_positions()
+                    # Pomakni samo ovog vozača u poretku
+                    position = self.agent.update_position(rider_id)
+                    self.agent.record_lap(rider_id, data['lap'], data['total_time'], data['tire_wear'])
 
-                    # Pošalji position update natrag rideru
-                    position = self.agent.rider_positions[rider_id]['position']
-                    response = Message(to=str(msg.sender))
-                    response.set_metadata("performative", "inform")
-                    response.set_metadata("ontology", "position_update")
-                    response.body = json.dumps({'position': position})
-                    await self.send(response)
+                    if self.agent.config.BATCH_LAP_UPDATES:
+                        # Standings se šalju skupno kad je krug kompletan
+                        self.agent.queue_lap_update(rider_id, data['lap'], data['total_time'],
+                                                    str(msg.sender))
+                    else:
+                        # Pošalji position update natrag rideru
+                        response = self.agent.build_message(msg.sender, "position_update",
+                                                            {'position': position})
+                        await self.send(response)
 
                 # Race results
                 elif ontology == "results":
-                    data = json.loads(msg.body)
+                    data = self.agent.decode_body(msg)
                     rider_id = data['rider_id']
+                    data['lap_data'] = LapStore.decode(data['lap_data'])
+                    data['tire_strategy'] = tire_strategy(data['lap_data'], data['tire_compound'])
+                    data['seed'] = self.agent.seed
+                    data.setdefault('overtakes', 0)  # konačno iz lap_stage na kraju utrke
+                    data.setdefault('pit_stops', 0)  # results/v1, v2
 
                     # Dodaj tačnu final poziciju iz trackinga
-                    if rider_id in self.agent.rider_positions:
-                        data['final_position'] = self.agent.rider_positions[rider_id]['position']
+                    if rider_id in self.agent.position_tracker:
+                        data['final_position'] = self.agent.position_tracker.position(rider_id)
 
                     self.agent.race_results.append(data)
                     self.agent.finished_riders.add(rider_id)
                     self.agent.log(f"Primio rezultate od Rider {rider_id}")
+                    self.agent.check_finished()
+
+                # Krugovi jednog sharda - spoji u globalni poredak i proslijedi ostalima
+                elif ontology == "shard_update":
+                    data = self.agent.decode_body(msg)
+                    self.agent.merge_shard_updates(data['updates'])
+                    await self.broadcast_leaderboard(data['shard'], data['updates'])
+                    self.agent.check_finished()
+
+            if self.agent.pending_lap_updates:
+                await self.flush_lap_batches()
+
+        async def broadcast_leaderboard(self, source_shard, updates):
+            """Krugovi jednog sharda svim ostalim shardovima (kodira se jednom)"""
+            body, codec_name = self.agent.encode_body({'updates': updates}, "leaderboard")
+            for shard_id in range(self.agent.config.NUM_SHARDS):
+                if shard_id != source_shard:
+                    msg = self.agent.build_message(self.agent.context.jid(f"shard_{shard_id}"),
+                                                   "leaderboard", body, codec_name=codec_name)
+                    await self.send(msg)
+
+        async def flush_lap_batches(self):
+            """
+            Pošalji jedan standings vektor za svaki krug koji je kompletan
+            ili mu je istekao BATCH_WINDOW. Poredak je iz vremena tog kruga, ne
+            iz trenutnog poretka (vozači koji su već javili sljedeći krug bili
+            bi ispred bez obzira na vrijeme). Kasni vozači ulaze u sljedeći
+            batch istog kruga, pa i oni dobiju točnu poziciju za taj krug.
+            """
+            now = time.monotonic()
+            for lap in sorted(self.agent.pending_lap_updates):
+                # record_lap je već obradio krug - kompletan krug više nije u lap_table
+                complete = lap not in self.agent.lap_table
+                expired = now - self.agent.batch_opened[lap] >= self.agent.config.BATCH_WINDOW
+                if not (complete or expired):
+                    continue
+
+                recipients = self.agent.pending_lap_updates.pop(lap)
+                del self.agent.batch_opened[lap]
+
+                times = self.agent.batch_times[lap]
+                standings = sorted(times, key=lambda rider_id: (times[rider_id], rider_id))
+                if complete:
+                    del self.agent.batch_times[lap]  # svi vozači su dobili poziciju za krug
+
+                body, codec_name = self.agent.encode_body({
+                    'lap': lap,
+                    'standings': standings
+                }, "standings")
+                for rider_jid in recipients.values():
+                    response = self.agent.build_message(rider_jid, "standings", body,
+                                                        codec_name=codec_name)
+                    await self.send(response)
 
-                    # Provjera kraja
-                    if len(self.agent.finished_riders) >= RaceConfig.NUM_RIDERS:
-                        self.agent.race_finished = True
-                        self.agent.log("✓ Svi vozači su završili!")
-                        self.agent.log("🏁 Utrka završena!")
-
-    def update_positions(self):
-        """Ažuriraj pozicije baziran na total_time"""
-        if not self.rider_positions:
+    def build_message(self, to, ontology, body, performative="inform", codec_name=None):
+        msg = super().build_message(to, ontology, body, performative, codec_name)
+        self.metrics.record_sent(msg)
+        return msg
+
+    def merge_shard_updates(self, updates):
+        """Krugovi iz shard_update poruke u globalni poredak i live timing"""
+        for rider_id, lap, total_time, tire_wear in updates:
+            self.rider_positions[rider_id] = {'total_time': total_time, 'lap': lap, 'tire_wear': tire_wear}
+            self.update_position(rider_id)
+            self.record_lap(rider_id, lap, total_time, tire_wear)
+
+    def check_finished(self):
+        """Kraj kad su stigli svi rezultati (i uz shardove, zadnji krug svih vozača)"""
+        config = self.config
+        if self.race_finished or len(self.finished_riders) < config.NUM_RIDERS:
             return
-
-        # Sortiraj po total_time (brži = bolja pozicija)
-        sorted_riders = sorted(
-            self.rider_positions.items(),
-            key=lambda x: x[1]['total_time']
-        )
-
-        # Dodijeli pozicije
-        for position, (rider_id, data) in enumerate(sorted_riders, start=1):
-            self.rider_positions[rider_id]['position'] = position
+        if config.NUM_SHARDS > 1 and self.completed_laps < config.NUM_LAPS:
+            return
+        self.race_finished = True
+        overtakes = self.lap_stage.overtakes_by_rider()
+        for result in self.race_results:
+            result['overtakes'] = overtakes.get(result['rider_id'], result['overtakes'])
+        self.race_finished_event.set()
+        self.log("✓ Svi vozači su završili!")
+        self.log("🏁 Utrka završena!")
+
+    def queue_lap_update(self, rider_id, lap, total_time, rider_jid):
+        """Dodaj vozača u batch za njegov krug (s vremenom za standings tog kruga)"""
+        if lap not in self.pending_lap_updates:
+            self.pending_lap_updates[lap] = {}
+            self.batch_opened[lap] = time.monotonic()
+        self.pending_lap_updates[lap][rider_id] = rider_jid
+        self.batch_times.setdefault(lap, {})[rider_id] = total_time
+
+    def record_lap(self, rider_id, lap, total_time, tire_wear):
+        """
+        Zabilježi krug vozača; kad su svi vozači odvezli krug, lap_stage
+        izračuna gapove i pretjecanja za cijeli grid i objavi se live timing frame.
+        """
+        self.lap_table.setdefault(lap, {})[rider_id] = (total_time, tire_wear)
+
+        if len(self.lap_table[lap]) >= self.config.NUM_RIDERS:
+            self.completed_laps = max(self.completed_laps, lap)
+            lap_result = self.lap_stage.complete_lap(lap, self.lap_table.pop(lap))
+            self.live_timing.publish(self.build_timing_frame(lap_result))
+
+    def build_timing_frame(self, lap_result):
+        """Poredak, gap do vodećeg, interval, promjena pozicije i pretjecanja jednog kruga"""
+        rows = lap_result.rows
+        columns = ('position', 'rider_id', 'total_time', 'gap_to_leader', 'interval',
+                   'tire_wear', 'position_delta')
+        standings = [dict(zip(columns, values))
+                     for values in zip(*(rows[column].tolist() for column in columns))]
+
+        return {
+            'type': 'live_timing',
+            'race_id': self.context.race_id,
+            'lap': lap_result.lap,
+            'timestamp': time.time(),
+            'standings': standings,
+            'overtakes': lap_result.overtakes.tolist()
+        }
+
+    def update_position(self, rider_id):
+        """
+        Ažuriraj poziciju jednog vozača u O(log n).
+        Vozač s više odvezenih krugova je ispred; unutar istog kruga odlučuje total_time.
+        """
+        data = self.rider_positions[rider_id]
+        return self.position_tracker.update(rider_id, data['lap'], data['total_time'])
 
     async def setup(self):
         self.log("Pokretanje Race Coordinator...")
@@ -101,14 +242,23 @@ class CoordinatorAgent(Agent):
         behaviour = self.RaceCoordinator()
         self.add_behaviour(behaviour)
 
+        # Live timing izlazi (opcionalno)
+        if self.config.LIVE_TIMING_PORT:
+            await self.live_timing.serve_socket(self.config.LIVE_TIMING_PORT)
+            self.log(f"📡 Live timing na 127.0.0.1:{self.config.LIVE_TIMING_PORT}")
+        if self.config.LIVE_TIMING_FILE:
+            self.live_timing.start_file_tail(self.config.LIVE_TIMING_FILE)
+            self.log(f"📡 Live timing u {self.config.LIVE_TIMING_FILE}")
+        if self.config.METRICS_PORT:
+            await self.metrics.serve(self.config.METRICS_PORT)
+            self.log(f"📈 Metrike na http://127.0.0.1:{self.config.METRICS_PORT}/")
+
         self.race_started = True
 
     async def wait_for_completion(self):
         """Čekaj da svi vozači završe"""
         self.log("Čekam završetak utrke...")
-
-        while not self.race_finished:
-            await asyncio.sleep(1)
+        await self.race_finished_event.wait()
 
     def print_results_summary(self):
         """Ispis rezultata"""
@@ -130,24 +280,30 @@ class CoordinatorAgent(Agent):
                   f"Time: {result['total_time']:.2f}s - "
                   f"Tires: {result['tire_compound']:6s} - "
                   f"Overtakes: {result['overtakes']:2d} - "
+                  f"Pit: {result['pit_stops']} - "
                   f"Avg Lap: {result['avg_lap_time']:.2f}s")
 
         print("\n" + "="*80)
         print("📈 TIRE STRATEGY PERFORMANCE:")
         print("="*80)
 
+        import pandas as pd
+        from analysis.analytics import compound_stats
         df = pd.DataFrame(self.race_results)
 
-        for compound in ['soft', 'medium', 'hard']:
-            compound_data = df[df['tire_compound'] == compound]
-            if len(compound_data) > 0:
-                print(f"\n{compound.upper()} Tires:")
-                print(f"  • Riders: {len(compound_data)}")
-                print(f"  • Avg finish time: {compound_data['total_time'].mean():.2f} ± {compound_data['total_time'].std():.2f}s")
-                print(f"  • Avg overtakes: {compound_data['overtakes'].mean():.1f}")
-                # Best position baziran na sortiranom indexu
-                best_idx = sorted_results.index(min(compound_data.to_dict('records'), key=lambda x: x['total_time'])) + 1
-                print(f"  • Best position: P{best_idx}")
+        # Jedan groupby umjesto filtera i pretrage sortirane liste po gumi;
+        # strategije s pit stopom ('medium>soft') iza čistih guma
+        stats = compound_stats(df)
+        compounds = list(self.config.TIRE_COMPOUNDS)
+        order = [c for c in compounds if c in stats.index] + \
+            sorted(strategy for strategy in stats.index if strategy not in compounds)
+        stats = stats.reindex(order)
+        for compound, row in stats.iterrows():
+            print(f"\n{compound.upper()} Tires:")
+            print(f"  • Riders: {int(row['riders'])}")
+            print(f"  • Avg finish time: {row['mean_time']:.2f} ± {row['std_time']:.2f}s")
+            print(f"  • Avg overtakes: {row['mean_overtakes']:.1f}")
+            print(f"  • Best position: P{int(row['best_position'])}")
 
         print("\n" + "="*80)
         print("🔬 KEY CORRELATIONS:")
@@ -162,42 +318,50 @@ class CoordinatorAgent(Agent):
         print("\n" + "="*80)
 
     def save_results(self):
-        """Spremi rezultate u CSV"""
+        """Spremi rezultate u CSV i/ili Parquet dataset (RESULT_SINK iz konfiguracije utrke)"""
         if not self.race_results:
             return None
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # race_id u imenu - paralelne utrke ne prepisuju jedna drugu
+        timestamp = self.context.result_tag(datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+        # pandas tek ovdje - agenti i headless runovi ga ne učitavaju
+        import pandas as pd
 
-        # Race results
-        df_results = pd.DataFrame(self.race_results)
+        # Race results (krugovi idu u zaseban lap_data CSV)
+        df_results = pd.DataFrame(self.race_results).drop(columns='lap_data')
         df_results['type'] = 'race_results'
 
         # Sortiraj po total_time i dodaj STVARNU final_position
         df_results = df_results.sort_values('total_time').reset_index(drop=True)
         df_results['final_position'] = range(1, len(df_results) + 1)
 
-        results_file = f"results/race_results_{timestamp}.csv"
-        df_results.to_csv(results_file, index=False)
-        self.log(f"💾 Rezultati spremljeni: {results_file}")
-
-        # Lap data
-        all_lap_data = []
-        for result in self.race_results:
-            rider_id = result['rider_id']
-            for lap_info in result['lap_data']:
-                all_lap_data.append({
-                    'rider_id': rider_id,
-                    'lap': lap_info['lap'],
-                    'lap_time': lap_info['time'],
-                    'tire_wear': lap_info['tire_wear'],
-                    'position': lap_info['position'],
-                    'overtake': lap_info['overtake']
-                })
-
-        df_laps = pd.DataFrame(all_lap_data)
-        lap_data_file = f"results/lap_data_{timestamp}.csv"
-        df_laps.to_csv(lap_data_file, index=False)
-        self.log(f"💾 Lap data spremljen: {lap_data_file}")
+        # Lap data - kolumnarni izvoz iz polja svih vozača, pozicije i pretjecanja iz lap_stage
+        df_laps = self.lap_stage.merge_into(laps_dataframe(
+            [result['rider_id'] for result in self.race_results],
+            [result['lap_data'] for result in self.race_results],
+            [result['tire_compound'] for result in self.race_results]
+        ))
+
+        if self.config.RESULT_SINK in ("csv", "both"):
+            results_file = os.path.join(self.config.RESULTS_DIR, f"race_results_{timestamp}.csv")
+            df_results.to_csv(results_file, index=False)
+            self.log(f"💾 Rezultati spremljeni: {results_file}")
+
+            lap_data_file = os.path.join(self.config.RESULTS_DIR, f"lap_data_{timestamp}.csv")
+            df_laps.to_csv(lap_data_file, index=False)
+            self.log(f"💾 Lap data spremljen: {lap_data_file}")
+
+        if self.config.RESULT_SINK in ("parquet", "both"):
+            from storage.result_sink import ParquetResultSink
+            sink = ParquetResultSink(os.path.join(self.config.RESULTS_DIR, 'dataset'))
+            self.run_id = sink.write_run(df_results, df_laps, config_hash=self.config.config_hash())
+            self.log(f"💾 Run {self.run_id} dodan u Parquet dataset")
+
+        metrics_file = os.path.join(self.config.RESULTS_DIR, f"metrics_{timestamp}.json")
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.summary(), f, indent=2)
+        self.log(f"💾 Metrike poruka spremljene: {metrics_file}")
 
         return timestamp
 
@@ -206,7 +370,8 @@ class CoordinatorAgent(Agent):
         if not self.race_results:
             return None
 
-        df = pd.DataFrame(self.race_results)
+        import pandas as pd
+        df = pd.DataFrame(self.race_results).drop(columns='lap_data')
 
         # Sortiraj po total_time i fiksaj final_position
         df = df.sort_values('total_time').reset_index(drop=True)
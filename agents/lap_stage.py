@@ -0,0 +1,111 @@
+"""
+LapStage - Obrada kompletnog kruga na koordinatoru
+Kad su svi vozači javili krug, poredak, gap do vodećeg, interval do vozača
+ispred, promjena pozicije i pretjecanja računaju se odjednom za cijeli grid
+NumPy operacijama. Pretjecanje je par (vozač, prestignuti vozač) čiji se
+relativni poredak obrnuo od prethodnog kruga - ne ovisi o tome je li
+vozač stigao primiti position_update.
+"""
+
+import numpy as np
+
+STAGE_DTYPE = np.dtype([
+    ('rider_id', '<i4'),
+    ('lap', '<i4'),
+    ('total_time', '<f8'),
+    ('tire_wear', '<f8'),
+    ('position', '<i4'),
+    ('gap_to_leader', '<f8'),
+    ('interval', '<f8'),
+    ('position_delta', '<i4'),   # pozitivno = dobio pozicije
+    ('passes', '<i4'),           # koliko je vozača prestigao u krugu
+    ('overtake', '?')
+])
+
+
+def pass_matrix(previous, position):
+    """
+    passed[..., i, j]: vozač i je sad ispred j, a u prošlom krugu je bio iza.
+    Zadnja os su vozači - isto pravilo za LapStage i FastRaceEngine.
+    """
+    return ((previous[..., :, None] > previous[..., None, :])
+            & (position[..., :, None] < position[..., None, :]))
+
+
+class LapResult:
+    """Jedan obrađeni krug: redovi po vozaču (u poretku) i parovi pretjecanja"""
+
+    def __init__(self, lap, rows, overtakes):
+        self.lap = lap
+        self.rows = rows            # STAGE_DTYPE, sortirano po poziciji
+        self.overtakes = overtakes  # (k, 2) polje [rider_id, prestignuti rider_id]
+
+
+class LapStage:
+    """Vektorizirana obrada krugova cijelog grida"""
+
+    def __init__(self, num_riders):
+        self.num_riders = num_riders
+        # Startna pozicija = rider_id + 1 (isto kao RiderAgent.current_position na startu)
+        self.last_position = np.arange(1, num_riders + 1, dtype=np.int32)
+        self.laps = []  # [LapResult]
+
+    def complete_lap(self, lap, lap_times):
+        """lap_times: {rider_id: (total_time, tire_wear)} svih vozača jednog kruga"""
+        rider_ids = np.fromiter(lap_times.keys(), dtype=np.int32, count=len(lap_times))
+        values = np.array(list(lap_times.values()), dtype=np.float64).reshape(-1, 2)
+        total_time, tire_wear = values[:, 0], values[:, 1]
+
+        # Isti poredak kao PositionTracker unutar kruga: total_time, pa rider_id
+        order = np.lexsort((rider_ids, total_time))
+        rider_ids, total_time, tire_wear = rider_ids[order], total_time[order], tire_wear[order]
+        position = np.arange(1, len(order) + 1, dtype=np.int32)
+
+        previous = self.last_position[rider_ids]
+        passed = pass_matrix(previous, position)
+        passes = passed.sum(axis=1)
+
+        rows = np.zeros(len(order), dtype=STAGE_DTYPE)
+        rows['rider_id'] = rider_ids
+        rows['lap'] = lap
+        rows['total_time'] = total_time
+        rows['tire_wear'] = tire_wear
+        rows['position'] = position
+        rows['gap_to_leader'] = total_time - total_time[0]
+        rows['interval'] = np.diff(total_time, prepend=total_time[0])
+        rows['position_delta'] = previous - position
+        rows['passes'] = passes
+        rows['overtake'] = passes > 0
+
+        self.last_position[rider_ids] = position
+        winners, losers = np.nonzero(passed)
+        result = LapResult(lap, rows, np.column_stack((rider_ids[winners], rider_ids[losers])))
+        self.laps.append(result)
+        return result
+
+    def overtakes_by_rider(self):
+        """{rider_id: broj krugova s pretjecanjem} preko svih obrađenih krugova"""
+        if not self.laps:
+            return {}
+        rows = np.concatenate([result.rows for result in self.laps])
+        counts = np.bincount(rows['rider_id'], weights=rows['overtake'], minlength=self.num_riders)
+        return {rider_id: int(count) for rider_id, count in enumerate(counts)}
+
+    def merge_into(self, df_laps):
+        """
+        Lap data vozača (laps_dataframe) s pozicijama i pretjecanjima iz ove faze.
+        Krugovi koje koordinator nije kompletirao zadržavaju vrijednosti vozača.
+        """
+        stage = self.dataframe()[['rider_id', 'lap', 'position', 'overtake', 'gap_to_leader',
+                                  'interval', 'position_delta', 'passes']]
+        merged = df_laps.merge(stage, on=['rider_id', 'lap'], how='left', suffixes=('_rider', ''))
+        for column in ('position', 'overtake'):
+            merged[column] = merged[column].fillna(merged.pop(f'{column}_rider')).astype(df_laps[column].dtype)
+        return merged[list(df_laps.columns) + ['gap_to_leader', 'interval', 'position_delta', 'passes']]
+
+    def dataframe(self):
+        """Svi obrađeni krugovi kao DataFrame (rider_id, lap, position, gap_to_leader...)"""
+        import pandas as pd
+        if not self.laps:
+            return pd.DataFrame(columns=STAGE_DTYPE.names)
+        return pd.DataFrame(np.concatenate([result.rows for result in self.laps]))
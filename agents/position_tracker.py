@@ -0,0 +1,44 @@
+"""
+PositionTracker - Inkrementalno praćenje poretka vozača
+Sortirana lista ključeva (-lap, total_time, rider_id) održava se s bisect-om:
+update pomiče samo jednog vozača, pozicija se dohvaća u O(log n).
+"""
+
+from bisect import bisect_left, insort
+
+
+class PositionTracker:
+    """Poredak vozača - više krugova ispred, pa manje ukupno vrijeme"""
+
+    def __init__(self):
+        self._order = []  # sortirani ključevi
+        self._keys = {}   # {rider_id: ključ}
+
+    @staticmethod
+    def _key(rider_id, lap, total_time):
+        return (-lap, total_time, rider_id)
+
+    def update(self, rider_id, lap, total_time):
+        """Pomakni vozača na novi ključ i vrati njegovu poziciju"""
+        old_key = self._keys.get(rider_id)
+        if old_key is not None:
+            del self._order[bisect_left(self._order, old_key)]
+
+        key = self._key(rider_id, lap, total_time)
+        self._keys[rider_id] = key
+        insort(self._order, key)
+        return self.position(rider_id)
+
+    def position(self, rider_id):
+        """Trenutna pozicija vozača (1 = vodeći)"""
+        return bisect_left(self._order, self._keys[rider_id]) + 1
+
+    def standings(self):
+        """Lista rider_id-eva od vodećeg prema zadnjem"""
+        return [key[2] for key in self._order]
+
+    def __contains__(self, rider_id):
+        return rider_id in self._keys
+
+    def __len__(self):
+        return len(self._order)
@@ -0,0 +1,327 @@
+"""
+RaceProfiler - Opt-in profiliranje behavioura agenata (RaceConfig.PROFILE_MODE)
+Svaki run() behavioura (RacingState, RaceCoordinator, StrategyBehaviour...)
+se izvršava korak po korak: CPU vrijeme (thread_time) broji se samo dok
+korutina stvarno radi, čekanje na receive() i kodiranje poruka posebno.
+Uz to se mjeri kašnjenje event loopa, pa sažetak kaže je li utrka
+vezana uz čekanje poruka, event loop ili CPU.
+    "timing"    - samo brojači (mali overhead)
+    "cprofile"  - + cProfile po agentu (.prof, snakeviz / pstats)
+    "collapsed" - + sampling stackova po agentu (.collapsed, flamegraph.pl / speedscope)
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from spade.behaviour import FSMBehaviour
+
+from messaging.metrics import Histogram, LATENCY_BUCKETS_MS
+
+PROFILE_MODES = ("timing", "cprofile", "collapsed")
+
+# Statistika behavioura koji se trenutno izvršava (svaki behaviour je svoj asyncio task)
+_current = contextvars.ContextVar("current_behaviour_stats", default=None)
+
+
+class BehaviourStats:
+    """Brojači jednog behavioura jednog agenta"""
+
+    def __init__(self, agent_name, behaviour_name):
+        self.agent_name = agent_name
+        self.behaviour_name = behaviour_name
+        self.runs = 0
+        self.cpu_time = 0.0
+        self.wall_time = 0.0
+        self.receive_wait = 0.0
+        self.receives = 0
+        self.receive_timeouts = 0
+        self.codec_time = 0.0
+        self.codec_calls = 0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class _TimedCoroutine:
+    """Izvršava korutinu korak po korak i mjeri CPU samo unutar koraka"""
+
+    def __init__(self, coro, stats, profiler, agent_profile):
+        self.coro = coro
+        self.stats = stats
+        self.profiler = profiler
+        self.agent_profile = agent_profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profiler.active = self.stats.agent_name
+            if self.agent_profile is not None:
+                self.agent_profile.enable()
+            start = time.thread_time()
+            try:
+                if error is not None:
+                    yielded = self.coro.throw(error)
+                else:
+                    yielded = self.coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.stats.cpu_time += time.thread_time() - start
+                if self.agent_profile is not None:
+                    self.agent_profile.disable()
+                self.profiler.active = None
+
+            # Suspendirano (receive, sleep, send...) - future ide asyncio tasku
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+class RaceProfiler:
+    """Profil svih behavioura jedne utrke"""
+
+    def __init__(self, mode="timing", output_dir="results/profiles", race_id=None,
+                 sample_interval=0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Nepoznat PROFILE_MODE: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.race_id = race_id
+        self.sample_interval = sample_interval
+
+        self.stats = {}               # {(agent, behaviour): BehaviourStats}
+        self.agent_profiles = {}      # {agent: cProfile.Profile}
+        self.samples = defaultdict(Counter)  # {agent: {stack: broj uzoraka}}
+        self.loop_lag = Histogram(LATENCY_BUCKETS_MS)
+        self.active = None            # agent čiji korak se upravo izvršava (za sampler)
+
+        self.started = None
+        self.finished = None
+        self._lag_task = None
+        self._sampler = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------ instrumentacija
+
+    def instrument(self, agent, behaviour):
+        """Omotaj run() i receive() behavioura (za FSM - run() svakog stanja)"""
+        agent_name = str(agent.jid).split("@")[0]
+        if isinstance(behaviour, FSMBehaviour):
+            # FSM prije svakog run() stanju postavi state.receive = fsm.receive
+            # (receive FSM-a je read-only), pa se receive omata unutar run()
+            for state in behaviour.get_states().values():
+                self._wrap_run(agent_name, state, wrap_receive=True)
+        else:
+            self._wrap_run(agent_name, behaviour)
+            behaviour.receive = self._timed_receive(behaviour.receive)
+
+    def _stats_for(self, agent_name, behaviour_name):
+        key = (agent_name, behaviour_name)
+        if key not in self.stats:
+            self.stats[key] = BehaviourStats(agent_name, behaviour_name)
+        return self.stats[key]
+
+    def _agent_profile(self, agent_name):
+        if self.mode != "cprofile":
+            return None
+        if agent_name not in self.agent_profiles:
+            self.agent_profiles[agent_name] = cProfile.Profile()
+        return self.agent_profiles[agent_name]
+
+    def _wrap_run(self, agent_name, behaviour, wrap_receive=False):
+        stats = self._stats_for(agent_name, type(behaviour).__name__)
+        agent_profile = self._agent_profile(agent_name)
+        original = behaviour.run
+
+        async def run():
+            if wrap_receive:
+                behaviour.receive = self._timed_receive(behaviour.receive)
+            token = _current.set(stats)
+            start = time.perf_counter()
+            try:
+                return await _TimedCoroutine(original(), stats, self, agent_profile)
+            finally:
+                stats.runs += 1
+                stats.wall_time += time.perf_counter() - start
+                _current.reset(token)
+
+        behaviour.run = run
+
+    def _timed_receive(self, original):
+        """receive() koji čekanje pripisuje behaviouru koji se izvršava"""
+        async def receive(timeout=None):
+            start = time.perf_counter()
+            msg = await original(timeout=timeout)
+            stats = _current.get()
+            if stats is not None:
+                stats.receive_wait += time.perf_counter() - start
+                stats.receives += 1
+                if msg is None and timeout:
+                    stats.receive_timeouts += 1
+            return msg
+
+        return receive
+
+    def timed_codec(self, func, *args):
+        """codec.encode / codec.decode s mjerenjem (pripisuje se trenutnom behaviouru)"""
+        stats = _current.get()
+        if stats is None:
+            return func(*args)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            stats.codec_time += time.perf_counter() - start
+            stats.codec_calls += 1
+
+    # ------------------------------------------------------------ životni ciklus
+
+    def start(self):
+        """Pokreni mjerenje lag-a event loopa (i sampler stackova)"""
+        self.started = time.perf_counter()
+        self._lag_task = asyncio.get_running_loop().create_task(self._measure_loop_lag())
+        if self.mode == "collapsed":
+            self._start_sampler()
+
+    def _start_sampler(self):
+        """
+        SIGPROF (CPU vrijeme procesa) uzorkuje glavni thread između bytecodea -
+        thread sampler bi zbog GIL-a uglavnom vidio event loop u mirovanju.
+        Ako signal nije dostupan ili ga već koristi druga utrka, koristi se thread.
+        """
+        if (hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+                and signal.getsignal(signal.SIGPROF) in (signal.SIG_DFL, None)):
+            signal.signal(signal.SIGPROF, self._on_sigprof)
+            signal.setitimer(signal.ITIMER_PROF, self.sample_interval, self.sample_interval)
+            self._sampler = "signal"
+            return
+        self._sampler = threading.Thread(target=self._sample_stacks,
+                                         args=(threading.main_thread().ident,),
+                                         daemon=True)
+        self._sampler.start()
+
+    async def _measure_loop_lag(self, interval=0.01):
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            self.loop_lag.record(max(0.0, time.perf_counter() - expected) * 1000.0)
+
+    def _on_sigprof(self, signum, frame):
+        if self.active is not None and frame is not None:
+            self._record_stack(self.active, frame)
+
+    def _sample_stacks(self, thread_id):
+        while not self._stop.wait(self.sample_interval):
+            agent_name = self.active
+            frame = sys._current_frames().get(thread_id)
+            if agent_name is not None and frame is not None:
+                self._record_stack(agent_name, frame)
+
+    def _record_stack(self, agent_name, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.samples[agent_name][";".join(reversed(stack))] += 1
+
+    def stop(self):
+        if self.finished is None:
+            self.finished = time.perf_counter()
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._sampler == "signal":
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+            self._sampler = None
+        self._stop.set()
+
+    # ------------------------------------------------------------ izvještaj
+
+    def by_behaviour(self):
+        """Zbroj po tipu behavioura (npr. RacingState svih vozača)"""
+        totals = {}
+        for stats in self.stats.values():
+            total = totals.setdefault(stats.behaviour_name, Counter())
+            total['agents'] += 1
+            for key, value in stats.to_dict().items():
+                if key not in ('agent_name', 'behaviour_name'):
+                    total[key] += value
+        return totals
+
+    def diagnosis(self):
+        """Gruba dijagnoza uskog grla utrke"""
+        wall = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        cpu = sum(s.cpu_time for s in self.stats.values())
+        lag_p99 = self.loop_lag.quantile(0.99) or 0.0
+        cpu_share = cpu / wall if wall > 0 else 0.0
+
+        if lag_p99 >= 50.0:
+            verdict = "event-loop-bound"
+        elif cpu_share >= 0.5:
+            verdict = "compute-bound"
+        else:
+            verdict = "network-bound"
+        return {'race_wall_s': wall, 'behaviour_cpu_s': cpu, 'cpu_share': cpu_share,
+                'loop_lag_p99_ms': lag_p99, 'verdict': verdict}
+
+    def report(self):
+        """Ispis profila po tipu behavioura i dijagnoze"""
+        print("\n" + "="*80)
+        print(f"🔬 PROFIL BEHAVIOURA ({self.mode})")
+        print("="*80)
+        print(f"{'behaviour':22s} {'agenti':>6s} {'runs':>7s} {'cpu s':>8s} "
+              f"{'receive s':>10s} {'codec s':>8s} {'wall s':>8s}")
+        for name, total in sorted(self.by_behaviour().items(),
+                                  key=lambda item: -item[1]['cpu_time']):
+            print(f"{name:22s} {total['agents']:6d} {total['runs']:7d} {total['cpu_time']:8.3f} "
+                  f"{total['receive_wait']:10.3f} {total['codec_time']:8.3f} {total['wall_time']:8.3f}")
+
+        diagnosis = self.diagnosis()
+        print(f"\n• Utrka {diagnosis['race_wall_s']:.2f}s, CPU behavioura {diagnosis['behaviour_cpu_s']:.3f}s "
+              f"({diagnosis['cpu_share']:.0%}), lag event loopa p99 {diagnosis['loop_lag_p99_ms']:.1f}ms")
+        print(f"• Dijagnoza: {diagnosis['verdict']}")
+        print("="*80)
+
+    def save(self, tag):
+        """Spremi JSON profila (+ .prof / .collapsed po agentu), vrati putanje"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"profile_{tag}")
+        files = [f"{prefix}.json"]
+
+        with open(files[0], "w", encoding="utf-8") as f:
+            json.dump({
+                'mode': self.mode,
+                'race_id': self.race_id,
+                'diagnosis': self.diagnosis(),
+                'loop_lag_ms': self.loop_lag.summary(),
+                'behaviours': {name: dict(total) for name, total in self.by_behaviour().items()},
+                'agents': [stats.to_dict() for stats in self.stats.values()]
+            }, f, indent=2)
+
+        for agent_name, agent_profile in self.agent_profiles.items():
+            path = f"{prefix}_{agent_name}.prof"
+            agent_profile.dump_stats(path)
+            files.append(path)
+
+        for agent_name, stacks in self.samples.items():
+            path = f"{prefix}_{agent_name}.collapsed"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            files.append(path)
+
+        return files
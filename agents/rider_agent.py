@@ -4,45 +4,64 @@ FIXED: Centralizirani position tracking
 """
 
 import asyncio
-import json
-import random
-from spade.agent import Agent
+import time
 from spade.behaviour import FSMBehaviour, State
-from spade.message import Message
 from spade.template import Template
 import numpy as np
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.race_config import RaceConfig
+from agents.base_agent import RaceAgent
+from engine.lookup_tables import RiderLapTables
+from storage.lap_store import LapStore
 
 
-class RiderAgent(Agent):
+class RiderAgent(RaceAgent):
     """Agent vozača"""
 
-    def __init__(self, jid, password, rider_id):
-        super().__init__(jid, password)
+    def __init__(self, jid, password, rider_id, context=None, rng=None):
+        super().__init__(jid, password, context=context)
         self.rider_id = rider_id
         self.rider_name = f"Rider_{rider_id}"
 
+        # Vlastiti RNG stream (rider_generators) - bez dijeljenog globalnog random stanja
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        # Virtualni sat - registracija odmah, da sat ne krene bez ovog vozača
+        self.clock = self.context.clock
+        if self.clock is not None:
+            self.clock.register()
+
     class StartState(State):
         async def run(self):
             self.agent.log(f"START - čekam strategiju...")
 
-            msg = await self.receive(timeout=15)
+            # Readiness handshake - javi timu da sam spreman dok ne stigne strategija
+            team_jid = self.agent.context.jid(f"team_{self.agent.rider_id // 2}")
+            # Karakteristike vozača - tim iz njih gradi lookup tablice za pit odluke
+            ready = {'type': 'ready', 'rider_id': self.agent.rider_id,
+                     'aggression': self.agent.aggression, 'skill_level': self.agent.skill_level,
+                     'consistency': self.agent.consistency}
+            deadline = time.monotonic() + self.agent.config.STRATEGY_TIMEOUT
+            msg = None
+            while time.monotonic() < deadline:
+                await self.send(self.agent.build_message(team_jid, "ready", ready))
+
+                msg = await self.receive(timeout=self.agent.config.READY_RETRY_INTERVAL)
+                if msg and msg.get_metadata("ontology") == "strategy":
+                    break
+                msg = None
 
-            if msg and msg.get_metadata("ontology") == "strategy":
+            if msg:
                 try:
-                    strategy = json.loads(msg.body)
-                    self.agent.tire_compound = strategy.get('tire_compound', 'medium')
+                    strategy = self.agent.decode_body(msg)
+                    self.agent.mount_tires(strategy.get('tire_compound', 'medium'))
                     self.agent.log(f"✓ Primio: {self.agent.tire_compound} gume")
                 except Exception as e:
                     self.agent.log(f"Greška: {e}")
-                    self.agent.tire_compound = 'medium'
+                    self.agent.mount_tires('medium')
             else:
                 self.agent.log("Timeout - default medium")
-                self.agent.tire_compound = 'medium'
+                self.agent.mount_tires('medium')
+            self.agent.start_compound = self.agent.tire_compound
 
             self.agent.race_started = True
             self.agent.log("➡️ Prelazim u RACING stanje")
@@ -51,29 +70,36 @@ class RiderAgent(Agent):
     class RacingState(State):
         async def run(self):
             # Provjera završetka
-            if self.agent.current_lap >= RaceConfig.NUM_LAPS:
+            if self.agent.current_lap >= self.agent.config.NUM_LAPS:
                 self.agent.log("➡️ Završavam - prelazim u FINISH")
                 self.set_next_state("FINISH")
                 return
 
             # Simulacija kruga
             lap_time = self.agent.calculate_lap_time()
+            if self.agent.pit_loss_pending:
+                # Pit stop prije ovog kruga - vrijeme u pit laneu ide u krug
+                lap_time += self.agent.pit_loss_pending
+                self.agent.pit_loss_pending = 0.0
+            if self.agent.clock:
+                # Krug završava tek kad virtualni sat dođe do njegovog total_time
+                await self.agent.clock.wait_until(self.agent.total_time + lap_time)
             self.agent.total_time += lap_time
             self.agent.current_lap += 1
             self.agent.update_tire_degradation()
 
             # Spremanje
-            self.agent.lap_times.append(lap_time)
-            self.agent.lap_data.append({
-                'lap': self.agent.current_lap,
-                'time': lap_time,
-                'tire_wear': self.agent.tire_wear,
-                'position': self.agent.current_position,
-                'overtake': False
-            })
-
-            # Slanje lap update Coordinatoru (za position tracking)
-            coordinator_jid = f"coordinator@{RaceConfig.XMPP_SERVER}"
+            self.agent.lap_data.append(
+                lap=self.agent.current_lap,
+                time=lap_time,
+                tire_wear=self.agent.tire_wear,
+                position=self.agent.current_position,
+                compound=self.agent.tire_compound,
+                stint_lap=self.agent.stint_lap
+            )
+
+            # Slanje lap update Coordinatoru ili shardu vozača (za position tracking)
+            coordinator_jid = self.agent.context.coordinator_jid(self.agent.rider_id)
             lap_update = {
                 'type': 'lap_update',
                 'rider_id': self.agent.rider_id,
@@ -81,77 +107,123 @@ class RiderAgent(Agent):
                 'total_time': self.agent.total_time,
                 'tire_wear': self.agent.tire_wear
             }
-            msg = Message(to=coordinator_jid)
-            msg.set_metadata("performative", "inform")
-            msg.set_metadata("ontology", "lap_update")
-            msg.body = json.dumps(lap_update)
+            msg = self.agent.build_message(coordinator_jid, "lap_update", lap_update)
+            self.agent.attach_round_trips(msg)
+            self.agent.lap_sent_at[self.agent.current_lap] = time.monotonic()
             await self.send(msg)
 
-            # Čekaj position update od Coordinatora
-            pos_msg = await self.receive(timeout=0.5)
-            if pos_msg and pos_msg.get_metadata("ontology") == "position_update":
-                data = json.loads(pos_msg.body)
-                old_pos = self.agent.current_position
-                self.agent.current_position = data['position']
+            if self.agent.config.BATCH_LAP_UPDATES:
+                # Batch protokol - ne čekaj, pokupi standings koji su već stigli
+                while True:
+                    standings_msg = await self.receive()
+                    if not standings_msg:
+                        break
+                    if standings_msg.get_metadata("ontology") == "standings":
+                        self.agent.apply_standings(self.agent.decode_body(standings_msg))
+                pos_msg = None
+            else:
+                # Čekaj position update od Coordinatora
+                pos_msg = await self.receive(timeout=0.5)
+                if not pos_msg:
+                    self.agent.receive_timeouts += 1
 
-                # Log pretjecanja
-                if old_pos > self.agent.current_position:
-                    self.agent.log(f"  ✓ Pretjecanje → P{self.agent.current_position}")
-                    self.agent.overtake_count += 1
-                    self.agent.lap_data[-1]['overtake'] = True
+            if pos_msg and pos_msg.get_metadata("ontology") == "position_update":
+                self.agent.record_round_trip(self.agent.current_lap)
+                # Pretjecanja računa koordinator (lap_stage) kad je krug kompletan
+                self.agent.current_position = self.agent.decode_body(pos_msg)['position']
 
             # Log svakih 5 krugova
             if self.agent.current_lap % 5 == 0:
-                self.agent.log(f"Lap {self.agent.current_lap}/{RaceConfig.NUM_LAPS} "
+                self.agent.log(f"Lap {self.agent.current_lap}/{self.agent.config.NUM_LAPS} "
                               f"- {lap_time:.2f}s, Wear: {self.agent.tire_wear:.1%}, "
                               f"P{self.agent.current_position}")
 
             # Telemetrija za Team
-            if self.agent.current_lap % RaceConfig.TELEMETRY_INTERVAL == 0:
-                team_jid = f"team_{self.agent.rider_id // 2}@{RaceConfig.XMPP_SERVER}"
+            if self.agent.current_lap % self.agent.config.TELEMETRY_INTERVAL == 0:
+                team_jid = self.agent.context.jid(f"team_{self.agent.rider_id // 2}")
+                lap_times = self.agent.lap_data.column('time')
                 telemetry = {
                     'type': 'telemetry',
                     'rider_id': self.agent.rider_id,
                     'lap': self.agent.current_lap,
                     'tire_wear': self.agent.tire_wear,
                     'position': self.agent.current_position,
-                    'avg_lap_time': float(np.mean(self.agent.lap_times[-3:])) if len(self.agent.lap_times) >= 3 else 0
+                    'avg_lap_time': float(np.mean(lap_times[-3:])) if len(lap_times) >= 3 else 0,
+                    'tire_compound': self.agent.tire_compound,
+                    'stint_lap': self.agent.stint_lap
                 }
-                msg = Message(to=team_jid)
-                msg.set_metadata("performative", "inform")
-                msg.set_metadata("ontology", "telemetry")
-                msg.body = json.dumps(telemetry)
-                await self.send(msg)
+                await self.send(self.agent.build_message(team_jid, "telemetry", telemetry))
+
+                if self.agent.config.PIT_STOPS and self.agent.current_lap < self.agent.config.NUM_LAPS:
+                    await self.wait_pit_decision()
 
             self.set_next_state("RACING")
-            await asyncio.sleep(RaceConfig.SIMULATION_DELAY)
+            if not self.agent.clock:
+                await asyncio.sleep(self.agent.config.SIMULATION_DELAY)
+
+        async def wait_pit_decision(self):
+            """Odluka tima za ovaj krug stiže prije sljedećeg kruga (ili timeout - ostajem vani)"""
+            lap = self.agent.current_lap
+            deadline = time.monotonic() + self.agent.config.PIT_DECISION_TIMEOUT
+            while time.monotonic() < deadline:
+                msg = await self.receive(timeout=deadline - time.monotonic())
+                if not msg:
+                    break
+                ontology = msg.get_metadata("ontology")
+                if ontology == "pit_decision":
+                    decision = self.agent.decode_body(msg)
+                    if decision['lap'] == lap:
+                        self.agent.apply_pit_decision(decision)
+                        return
+                # Zakašnjele poruke koordinatora za ovaj krug
+                elif ontology == "standings":
+                    self.agent.apply_standings(self.agent.decode_body(msg))
+                elif ontology == "position_update":
+                    self.agent.record_round_trip(lap)
+                    self.agent.current_position = self.agent.decode_body(msg)['position']
+
+            self.agent.receive_timeouts += 1
+            self.agent.log(f"Pit odluka za krug {lap} nije stigla - ostajem vani")
 
     class FinishState(State):
         async def run(self):
+            if self.agent.clock:
+                self.agent.clock.unregister()
+
+            # Batch protokol - pričekaj standings zadnjeg kruga
+            if self.agent.config.BATCH_LAP_UPDATES:
+                while self.agent.standings_lap < self.agent.current_lap:
+                    standings_msg = await self.receive(timeout=self.agent.config.BATCH_WINDOW * 4)
+                    if not standings_msg:
+                        self.agent.receive_timeouts += 1
+                        break
+                    if standings_msg.get_metadata("ontology") == "standings":
+                        self.agent.apply_standings(self.agent.decode_body(standings_msg))
+
             self.agent.log(f"🏁 FINISH - {self.agent.total_time:.2f}s, P{self.agent.current_position}")
             self.agent.race_finished = True
 
             # Slanje rezultata
-            coordinator_jid = f"coordinator@{RaceConfig.XMPP_SERVER}"
+            coordinator_jid = self.agent.context.jid("coordinator")
+            lap_times = self.agent.lap_data.column('time')
             results = {
                 'type': 'race_results',
                 'rider_id': self.agent.rider_id,
                 'total_time': self.agent.total_time,
                 'final_position': self.agent.current_position,  # ← FIXED: Koristi real-time poziciju
-                'tire_compound': self.agent.tire_compound,
-                'overtakes': self.agent.overtake_count,
-                'avg_lap_time': float(np.mean(self.agent.lap_times)),
-                'lap_time_std': float(np.std(self.agent.lap_times)),
+                'tire_compound': self.agent.start_compound,  # strategija; promjene u pit_stops
+                'pit_stops': self.agent.pit_stops,
+                'avg_lap_time': float(np.mean(lap_times)),
+                'lap_time_std': float(np.std(lap_times)),
                 'skill_level': self.agent.skill_level,
                 'aggression': self.agent.aggression,
                 'consistency': self.agent.consistency,
                 'tire_wear_final': self.agent.tire_wear,
-                'lap_data': self.agent.lap_data
+                'lap_data': self.agent.lap_data.encode()
             }
-            msg = Message(to=coordinator_jid)
-            msg.set_metadata("performative", "inform")
-            msg.set_metadata("ontology", "results")
-            msg.body = json.dumps(results)
+            msg = self.agent.build_message(coordinator_jid, "results", results)
+            self.agent.attach_round_trips(msg)
+            msg.set_metadata("receive_timeouts", str(self.agent.receive_timeouts))
             await self.send(msg)
 
             await asyncio.sleep(1)
@@ -167,17 +239,28 @@ class RiderAgent(Agent):
         self.current_position = self.rider_id + 1
         self.race_started = False
         self.race_finished = False
-        self.lap_times = []
-        self.lap_data = []
-        self.overtake_count = 0
+        self.lap_data = LapStore(self.config.NUM_LAPS)
+        self.standings_lap = 0  # Zadnji krug za koji je stigao batch standings
+        self.pit_stops = 0
+        self.pit_loss_pending = 0.0  # gubitak pit stopa za sljedeći krug
+
+        # Metrike poruka - round-trip se šalje koordinatoru uz sljedeću poruku
+        self.lap_sent_at = {}    # {lap: monotonic vrijeme slanja lap_update}
+        self.round_trips = []    # izmjereni round-tripovi (ms) koji još nisu poslani
+        self.receive_timeouts = 0
 
         # Karakteristike
-        self.aggression = random.uniform(*RaceConfig.AGGRESSION_RANGE)
-        self.consistency = random.uniform(*RaceConfig.CONSISTENCY_RANGE)
-        self.skill_level = random.uniform(*RaceConfig.SKILL_RANGE)
+        self.aggression = self.rng.uniform(*self.config.AGGRESSION_RANGE)
+        self.consistency = self.rng.uniform(*self.config.CONSISTENCY_RANGE)
+        self.skill_level = self.rng.uniform(*self.config.SKILL_RANGE)
 
         self.log(f"Skill:{self.skill_level:.2f} Aggr:{self.aggression:.2f} Cons:{self.consistency:.2f}")
 
+        # Deterministički dio modela kruga za sve gume - krug samo dodaje šum
+        self.build_lap_tables()
+        self.mount_tires(self.tire_compound)
+        self.start_compound = self.tire_compound
+
         # FSM
         fsm = FSMBehaviour()
         fsm.add_state(name="START", state=self.StartState(), initial=True)
@@ -190,21 +273,65 @@ class RiderAgent(Agent):
 
         self.add_behaviour(fsm)
 
+    def apply_standings(self, data):
+        """
+        Primijeni batch standings vektor na krug na koji se odnosi.
+        Radi i kad standings stigne nakon što je vozač već krenuo u sljedeći krug.
+        """
+        lap = data['lap']
+        if self.rider_id not in data['standings'] or not 1 <= lap <= len(self.lap_data):
+            return
+
+        position = data['standings'].index(self.rider_id) + 1
+        self.lap_data[lap - 1]['position'] = position
+
+        self.record_round_trip(lap)
+        if lap >= self.standings_lap:
+            self.standings_lap = lap
+            self.current_position = position
+
+    def record_round_trip(self, lap):
+        """lap_update → position_update/standings za krug lap, u ms"""
+        sent_at = self.lap_sent_at.pop(lap, None)
+        if sent_at is not None:
+            self.round_trips.append((time.monotonic() - sent_at) * 1000.0)
+
+    def attach_round_trips(self, msg):
+        """Dodaj izmjerene round-tripove u metapodatke poruke koordinatoru"""
+        if self.round_trips:
+            msg.set_metadata("rtt", ",".join(f"{rtt:.4f}" for rtt in self.round_trips))
+            self.round_trips = []
+
+    def build_lap_tables(self):
+        """Lookup tablice (engine.lookup_tables) za karakteristike vozača"""
+        self.lap_tables = RiderLapTables(self.config, self.aggression, self.skill_level)
+        self.noise_scale = (1 - self.consistency) * 2.0
+
+    def mount_tires(self, compound):
+        """Nove gume - trošenje i stint krug kreću od nule"""
+        self.tire_compound = compound
+        self.tire_wear = 0.0
+        self.stint_lap = 0
+        self.stint_lap_times, self.stint_wear = self.lap_tables.stint(compound)
+
+    def apply_pit_decision(self, decision):
+        """Pit stop naređen od tima - nove gume od sljedećeg kruga"""
+        if not decision['pit']:
+            return
+        self.log(f"🔧 PIT - {self.tire_compound} → {decision['tire_compound']} "
+                 f"(wear {self.tire_wear:.1%})")
+        self.mount_tires(decision['tire_compound'])
+        self.pit_stops += 1
+        self.pit_loss_pending = self.config.PIT_STOP_LOSS
+
     def calculate_lap_time(self):
-        tire_config = RaceConfig.TIRE_COMPOUNDS[self.tire_compound]
-        base_time = RaceConfig.LAP_BASE_TIME / tire_config['base_speed']
-        degradation_penalty = self.tire_wear * 5.0
-        skill_factor = (2.0 - self.skill_level) * 2.0
-        consistency_noise = random.gauss(0, (1 - self.consistency) * 2.0)
-        lap_time = base_time + degradation_penalty + skill_factor + consistency_noise
+        consistency_noise = self.rng.normal(0, self.noise_scale)
+        lap_time = self.stint_lap_times[self.stint_lap] + consistency_noise
         return max(lap_time, 80.0)
 
     def update_tire_degradation(self):
-        tire_config = RaceConfig.TIRE_COMPOUNDS[self.tire_compound]
-        base_degradation = tire_config['degradation_rate']
-        aggression_factor = 1.0 + (self.aggression * 0.5)
-        self.tire_wear += base_degradation * aggression_factor
-        self.tire_wear = min(self.tire_wear, 1.0)
+        self.tire_wear = self.stint_wear[self.stint_lap]
+        self.stint_lap += 1
 
     def log(self, message):
         print(f"[{self.rider_name}] {message}")
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+ShardCoordinatorAgent - Koordinator jednog dijela grida (RaceConfig.NUM_SHARDS > 1)
+Prima lap update samo svojih vozača i odmah vraća poziciju iz lokalne
+kopije globalnog poretka: vlastiti vozači su uvijek točni, ostali onakvi
+kakve je root koordinator zadnji put objavio. Krugovi se skupljaju i svakih
+SHARD_MERGE_INTERVAL sekundi šalju rootu, koji ih spaja u globalni
+leaderboard i prosljeđuje ostalim shardovima.
+"""
+
+import time
+
+from spade.behaviour import CyclicBehaviour
+
+from agents.base_agent import RaceAgent
+from agents.position_tracker import PositionTracker
+from messaging.metrics import RaceMetrics
+
+
+class ShardCoordinatorAgent(RaceAgent):
+    """Shard koordinator - lokalni poredak i periodični merge u root"""
+
+    def __init__(self, jid, password, shard_id, context=None):
+        super().__init__(jid, password, context=context)
+        self.shard_id = shard_id
+        self.position_tracker = PositionTracker()  # globalni poredak, tuđi vozači sa zakašnjenjem
+        self.pending_updates = []  # [(rider_id, lap, total_time, tire_wear)] od zadnjeg merge-a
+        self.last_merge = time.monotonic()
+        self.metrics = RaceMetrics()
+
+    class ShardBehaviour(CyclicBehaviour):
+        async def run(self):
+            config = self.agent.config
+            msg = await self.receive(timeout=config.SHARD_MERGE_INTERVAL)
+
+            if msg:
+                self.agent.metrics.record_received(msg, self.queue.qsize())
+                ontology = msg.get_metadata("ontology")
+
+                if ontology == "lap_update":
+                    data = self.agent.decode_body(msg)
+                    position = self.agent.record_update(
+                        data['rider_id'], data['lap'], data['total_time'], data['tire_wear'])
+                    response = self.agent.build_message(msg.sender, "position_update",
+                                                        {'position': position})
+                    await self.send(response)
+
+                elif ontology == "leaderboard":
+                    self.agent.apply_leaderboard(self.agent.decode_body(msg)['updates'])
+            else:
+                self.agent.metrics.record_timeout()
+
+            if self.agent.pending_updates and \
+                    time.monotonic() - self.agent.last_merge >= config.SHARD_MERGE_INTERVAL:
+                await self.merge_into_root()
+
+        async def merge_into_root(self):
+            """Pošalji rootu sve krugove od zadnjeg merge-a"""
+            updates, self.agent.pending_updates = self.agent.pending_updates, []
+            self.agent.last_merge = time.monotonic()
+            msg = self.agent.build_message(self.agent.context.jid("coordinator"), "shard_update",
+                                           {'shard': self.agent.shard_id, 'updates': updates})
+            await self.send(msg)
+
+    def record_update(self, rider_id, lap, total_time, tire_wear):
+        """Krug vlastitog vozača - pozicija u O(log n), krug čeka sljedeći merge"""
+        self.pending_updates.append((rider_id, lap, total_time, tire_wear))
+        return self.position_tracker.update(rider_id, lap, total_time)
+
+    def apply_leaderboard(self, updates):
+        """Krugovi vozača ostalih shardova koje je root spojio"""
+        for rider_id, lap, total_time, _ in updates:
+            if self.context.shard_of(rider_id) != self.shard_id:
+                self.position_tracker.update(rider_id, lap, total_time)
+
+    def build_message(self, to, ontology, body, performative="inform", codec_name=None):
+        msg = super().build_message(to, ontology, body, performative, codec_name)
+        self.metrics.record_sent(msg)
+        return msg
+
+    async def setup(self):
+        self.log("Pokretanje shard koordinatora...")
+        self.add_behaviour(self.ShardBehaviour())
+
+    def log(self, message):
+        print(f"[Shard_{self.shard_id}] {message}")
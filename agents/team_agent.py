@@ -1,97 +1,144 @@
 """
 TeamAgent - Timski agent za strategiju
-FIXED: Duži delay za registraciju vozača
+Strategija se šalje nakon readiness handshakea s vozačima (bez fiksnih delaya).
+Uz PIT_STOPS tim na svaku telemetriju odgovara pit odlukom (engine.pit_strategy).
 """
 
-import asyncio
-import json
-from spade.agent import Agent
-from spade.behaviour import CyclicBehaviour, OneShotBehaviour
-from spade.message import Message
+from spade.behaviour import CyclicBehaviour
 from spade.template import Template
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.race_config import RaceConfig
+from agents.base_agent import RaceAgent
+from engine.lookup_tables import RiderLapTables
+from engine.pit_strategy import PitStrategy
 
 
-class TeamAgent(Agent):
+class TeamAgent(RaceAgent):
     """Timski agent"""
 
-    def __init__(self, jid, password, team_id):
-        super().__init__(jid, password)
+    def __init__(self, jid, password, team_id, context=None):
+        super().__init__(jid, password, context=context)
         self.team_id = team_id
         self.team_name = f"Team_{team_id}"
 
-    class SendInitialStrategyBehaviour(OneShotBehaviour):
-        async def run(self):
-            # DUŽI DELAY - čekaj da se svi vozači registriraju!
-            await asyncio.sleep(5)  # Povećano sa 0.5 na 5 sekundi
-
-            chosen_strategy = RaceConfig.get_tire_strategy(self.agent.team_id)
-            self.agent.log(f"Šaljem strategiju: {chosen_strategy.upper()}")
-
-            for rider_id in self.agent.riders:
-                rider_jid = f"rider_{rider_id}@{RaceConfig.XMPP_SERVER}"
-
-                strategy = {
-                    'type': 'initial_strategy',
-                    'tire_compound': chosen_strategy,
-                    'target_pace': 'moderate',
-                    'overtake_aggression': 0.5
-                }
-
-                msg = Message(to=rider_jid)
-                msg.set_metadata("performative", "inform")
-                msg.set_metadata("ontology", "strategy")
-                msg.body = json.dumps(strategy)
+    class ReadinessBehaviour(CyclicBehaviour):
+        """Šalje strategiju čim se svi vozači tima jave kao spremni"""
 
-                await self.send(msg)
-                self.agent.log(f"  ✓ Poslao Rider {rider_id}: {chosen_strategy}")
-
-                # Mali delay između slanja
-                await asyncio.sleep(0.2)
+        async def run(self):
+            msg = await self.receive(timeout=self.agent.config.RECEIVE_TIMEOUT)
+            if not msg:
+                return
+
+            data = self.agent.decode_body(msg)
+            rider_id = data['rider_id']
+            self.agent.ready_riders.add(rider_id)
+            self.agent.register_rider(data)
+
+            if self.agent.strategy_sent:
+                # Vozač se javio ponovno (izgubljena/zakašnjela poruka) - pošalji opet samo njemu
+                await self.send_strategy(rider_id)
+            elif self.agent.ready_riders.issuperset(self.agent.riders):
+                self.agent.log(f"Svi vozači spremni - šaljem strategiju: {self.agent.chosen_strategy.upper()}")
+                for team_rider_id in self.agent.riders:
+                    await self.send_strategy(team_rider_id)
+                self.agent.strategy_sent = True
+
+        async def send_strategy(self, rider_id):
+            rider_jid = self.agent.context.jid(f"rider_{rider_id}")
+
+            strategy = {
+                'type': 'initial_strategy',
+                'tire_compound': self.agent.chosen_strategy,
+                'target_pace': 'moderate',
+                'overtake_aggression': 0.5
+            }
+
+            msg = self.agent.build_message(rider_jid, "strategy", strategy)
+
+            await self.send(msg)
+            self.agent.log(f"  ✓ Poslao Rider {rider_id}: {self.agent.chosen_strategy}")
 
     class StrategyBehaviour(CyclicBehaviour):
         async def run(self):
-            msg = await self.receive(timeout=1)
+            # Blokira dok telemetrija ne stigne - bez dodatnog sleepa
+            msg = await self.receive(timeout=self.agent.config.RECEIVE_TIMEOUT)
 
             if msg and msg.get_metadata("ontology") == "telemetry":
                 try:
-                    telemetry = json.loads(msg.body)
+                    telemetry = self.agent.decode_body(msg)
                     rider_id = telemetry['rider_id']
                     self.agent.telemetry_history.append(telemetry)
 
                     if telemetry['tire_wear'] > 0.7:
                         self.agent.log(f"⚠️  Rider {rider_id}: Wear {telemetry['tire_wear']:.1%}")
 
+                    # Vozač čeka odluku prije sljedećeg kruga
+                    if self.agent.config.PIT_STOPS:
+                        decision = self.agent.decide_pit(telemetry)
+                        await self.send(self.agent.build_message(msg.sender, "pit_decision", decision))
+
                 except Exception as e:
                     self.agent.log(f"Greška: {e}")
 
-            await asyncio.sleep(0.5)
-
     async def setup(self):
         self.log(f"Pokretanje...")
 
         self.telemetry_history = []
         self.riders = []
-        self.num_riders = RaceConfig.NUM_RIDERS
+        self.num_riders = self.config.NUM_RIDERS
+        self.chosen_strategy = self.config.get_tire_strategy(self.team_id)
+        self.ready_riders = set()
+        self.strategy_sent = False
+        self.rng = self.context.team_rng(self.team_id)  # what-if rolloutovi
+        self.pit_planners = {}  # {rider_id: PitStrategy}
 
         # Riders u timu
         for offset in [0, 1]:
             rider_id = self.team_id * 2 + offset
-            if rider_id < RaceConfig.NUM_RIDERS:
+            if rider_id < self.config.NUM_RIDERS:
                 self.riders.append(rider_id)
 
         # Behaviours
-        init_strategy = self.SendInitialStrategyBehaviour()
-        self.add_behaviour(init_strategy)
+        readiness = self.ReadinessBehaviour()
+        ready_template = Template()
+        ready_template.set_metadata("ontology", "ready")
+        self.add_behaviour(readiness, ready_template)
 
         strategy_behaviour = self.StrategyBehaviour()
         template = Template()
         template.set_metadata("ontology", "telemetry")
         self.add_behaviour(strategy_behaviour, template)
 
+    def register_rider(self, data):
+        """Lookup tablice vozača iz karakteristika u ready poruci"""
+        rider_id = data['rider_id']
+        if rider_id in self.pit_planners or 'aggression' not in data:
+            return
+        tables = RiderLapTables(self.config, data['aggression'], data['skill_level'])
+        self.pit_planners[rider_id] = PitStrategy(
+            tables, (1 - data['consistency']) * 2.0, self.config, self.rng)
+
+    def decide_pit(self, telemetry):
+        """Pit odluka za krug iz telemetrije - what-if rolloutovi ostatka utrke"""
+        rider_id, lap = telemetry['rider_id'], telemetry['lap']
+        decision = {'type': 'pit_decision', 'lap': lap, 'pit': False,
+                    'tire_compound': telemetry.get('tire_compound')}
+
+        planner = self.pit_planners.get(rider_id)
+        laps_remaining = self.config.NUM_LAPS - lap
+        if planner is None or laps_remaining <= 0 or 'stint_lap' not in telemetry:
+            return decision
+
+        evaluation = planner.evaluate(telemetry['tire_compound'], telemetry['stint_lap'], laps_remaining)
+        best = evaluation.best(self.config.PIT_CONFIDENCE)
+        if best:
+            compound = evaluation.options[best][1]
+            gain = evaluation.mean_time[0] - evaluation.mean_time[best]
+            self.log(f"🔧 Rider {rider_id}: PIT → {compound.upper()} na krugu {lap} "
+                     f"(-{gain:.1f}s, p={evaluation.p_beats_stay[best]:.0%}, "
+                     f"{len(evaluation.options)}×{self.config.PIT_ROLLOUTS} rolloutova "
+                     f"u {evaluation.elapsed * 1e3:.1f}ms)")
+            decision.update(pit=True, tire_compound=compound)
+        return decision
+
     def log(self, message):
         print(f"[{self.team_name}] {message}")
\ No newline at end of file
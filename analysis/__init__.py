@@ -0,0 +1 @@
+"""Analysis package - grafovi i analitika rezultata utrka"""
\ No newline at end of file
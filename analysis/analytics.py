@@ -0,0 +1,252 @@
+"""
+Analitika preko više utrka
+Učitava sve runove iz results/ (race_results_*.csv + lap_data_*.csv ili
+Parquet dataset) u dva DataFramea i računa statistike strategija samo
+groupby i NumPy operacijama - bez Python petlje po utrci ili vozaču:
+    • win rate po strategiji guma (s Wilsonovim intervalom)
+    • interval pouzdanosti vremena cilja i zaostatka za pobjednikom
+    • korelacijske matrice parametara vozača i rezultata
+    • krivulje degradacije vremena kruga po gumi kruga i krugu na gumi
+"""
+
+import glob
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from config.race_config import RaceConfig
+
+CORRELATION_COLUMNS = ['skill_level', 'aggression', 'consistency', 'total_time',
+                       'overtakes', 'lap_time_std', 'tire_wear_final']
+
+# Stupci koji nisu jednakog tipa u svim izvorima (agenti / fast engine)
+STRING_COLUMNS = ('tire_compound', 'tire_strategy', 'seed', 'race_id', 'type')
+
+RUN_TAG = re.compile(r'^(race_results|lap_data)_(.+)\.csv$')
+
+
+def strategy_labels(df):
+    """
+    Strategija guma po vozaču ('medium' ili 'medium>soft' uz pit stop).
+    Runovi spremljeni prije pit stopova nemaju tire_strategy - tada je to tire_compound.
+    """
+    if 'tire_strategy' in df:
+        return df['tire_strategy'].fillna(df['tire_compound']).rename('tire_strategy')
+    return df['tire_compound'].rename('tire_strategy')
+
+
+def compound_stats(df):
+    """
+    Sažetak po strategiji guma iz race_results DataFramea (jedna ili više utrka).
+    Najbolja pozicija je rang ukupnog vremena unutar utrke, pa ne ovisi
+    o poretku redaka.
+    """
+    runs = df['run'] if 'run' in df else np.zeros(len(df), dtype=int)
+    position = df.groupby(runs)['total_time'].rank(method='first')
+    return df.assign(position=position).groupby(strategy_labels(df)).agg(
+        riders=('rider_id', 'count'),
+        mean_time=('total_time', 'mean'),
+        std_time=('total_time', 'std'),
+        mean_overtakes=('overtakes', 'mean'),
+        best_position=('position', 'min'))
+
+
+def _read_csv(path):
+    """Jedan CSV u Arrow tablicu (pyarrow) ili DataFrame (pandas)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv
+    except ImportError:
+        import pandas as pd
+        return pd.read_csv(path, dtype={column: str for column in STRING_COLUMNS})
+
+    column_types = {column: pa.string() for column in STRING_COLUMNS}
+    return pa.csv.read_csv(path, convert_options=pa.csv.ConvertOptions(column_types=column_types))
+
+
+def load_csv_table(results_dir=None, table='race_results', max_workers=None):
+    """
+    Svi {table}_*.csv iz results_dir u jedan DataFrame sa stupcem run
+    (tag iz imena datoteke, isti za race_results i lap_data istog runa).
+    CSV-ovi se parsiraju paralelno; pyarrow parser otpušta GIL.
+    """
+    import pandas as pd
+
+    results_dir = results_dir or RaceConfig.RESULTS_DIR
+    paths = sorted(glob.glob(os.path.join(results_dir, f'{table}_*.csv')))
+    if not paths:
+        return pd.DataFrame()
+
+    tags = [RUN_TAG.match(os.path.basename(path)).group(2) for path in paths]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tables = list(executor.map(_read_csv, paths))
+
+    lengths = [len(t) for t in tables]
+    if isinstance(tables[0], pd.DataFrame):
+        df = pd.concat(tables, ignore_index=True)
+    else:
+        import pyarrow as pa
+        df = pa.concat_tables(tables, promote_options='default').to_pandas()
+    df['run'] = pd.Categorical(np.repeat(tags, lengths), categories=tags)
+    return df
+
+
+def load_parquet_tables(results_dir=None):
+    """race_results i lap_data iz Parquet dataseta (stupac run = run_id)"""
+    from storage.result_sink import ParquetResultSink
+
+    sink = ParquetResultSink(os.path.join(results_dir or RaceConfig.RESULTS_DIR, 'dataset'))
+    results = sink.load('race_results')
+    laps = sink.load('lap_data')
+    for df in (results, laps):
+        if 'run_id' in df:
+            df['run'] = df['run_id'].astype('category')
+    return results, laps
+
+
+def load_runs(results_dir=None, source='csv', max_workers=None):
+    """RunCorpus svih spremljenih runova (source: csv ili parquet)"""
+    if source == 'parquet':
+        return RunCorpus(*load_parquet_tables(results_dir))
+    if source != 'csv':
+        raise ValueError(f"Nepoznat izvor rezultata: {source}")
+    return RunCorpus(load_csv_table(results_dir, 'race_results', max_workers),
+                     load_csv_table(results_dir, 'lap_data', max_workers))
+
+
+class RunCorpus:
+    """Rezultati i krugovi mnogo utrka - jedan red po vozaču / krugu, stupac run"""
+
+    def __init__(self, results, laps=None):
+        import pandas as pd
+        self.results = results
+        self.laps = laps if laps is not None else pd.DataFrame()
+
+    @property
+    def num_runs(self):
+        return self.results['run'].nunique() if len(self.results) else 0
+
+    def winners(self):
+        """Red pobjednika svake utrke (najmanje ukupno vrijeme)"""
+        runs = self.results.groupby('run', observed=True)['total_time']
+        return self.results.loc[runs.idxmin()]
+
+    def gaps(self):
+        """Zaostatak svakog vozača za pobjednikom svoje utrke"""
+        best = self.results.groupby('run', observed=True)['total_time'].transform('min')
+        return self.results['total_time'] - best
+
+    def win_rates(self, confidence=0.95):
+        """Startovi, pobjede i win rate po strategiji guma s Wilsonovim intervalom"""
+        starts = self.results.groupby(strategy_labels(self.results)).size()
+        winners = self.winners()
+        wins = winners.groupby(strategy_labels(winners)).size().reindex(starts.index, fill_value=0)
+
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        n = starts.to_numpy(dtype=float)
+        p = wins.to_numpy() / n
+        center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+        half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+
+        summary = starts.rename('starts').to_frame()
+        summary['wins'] = wins
+        summary['win_rate'] = p
+        summary['win_rate_low'] = center - half
+        summary['win_rate_high'] = center + half
+        summary['win_share'] = wins / max(self.num_runs, 1)
+        return summary
+
+    def finish_time_ci(self, confidence=0.95):
+        """Srednje vrijeme cilja i zaostatak za pobjednikom po strategiji guma (normalni CI)"""
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        summary = self.results.assign(gap=self.gaps()).groupby(strategy_labels(self.results)).agg(
+            n=('total_time', 'count'),
+            mean_time=('total_time', 'mean'),
+            std_time=('total_time', 'std'),
+            mean_gap=('gap', 'mean'),
+            std_gap=('gap', 'std'))
+
+        for column in ('time', 'gap'):
+            half = z * summary[f'std_{column}'] / np.sqrt(summary['n'])
+            summary[f'{column}_ci_low'] = summary[f'mean_{column}'] - half
+            summary[f'{column}_ci_high'] = summary[f'mean_{column}'] + half
+        return summary
+
+    def correlations(self, columns=None, by_compound=False):
+        """Korelacijska matrica (ili matrica po strategiji guma, MultiIndex strategije × stupca)"""
+        columns = [c for c in (columns or CORRELATION_COLUMNS) if c in self.results]
+        if by_compound:
+            return self.results.groupby(strategy_labels(self.results))[columns].corr()
+        return self.results[columns].corr()
+
+    def lap_frame(self):
+        """
+        Krugovi s gumom na kojoj su odvezeni, krugom na toj gumi (stint_lap)
+        i oznakom pit kruga (prvi krug nove gume nosi vrijeme u pit laneu).
+        Runovi bez tih stupaca (prije pit stopova) dobivaju gumu vozača iz
+        rezultata (join po run + rider_id) i stint_lap = lap.
+        """
+        laps = self.laps
+        stint_lap = laps['stint_lap'].fillna(laps['lap']).astype(int) if 'stint_lap' in laps else laps['lap']
+        laps = laps.assign(stint_lap=stint_lap, pit_lap=(stint_lap == 1) & (laps['lap'] > 1))
+        if 'tire_compound' in laps and not laps['tire_compound'].isna().any():
+            return laps
+
+        compounds = self.results[['run', 'rider_id', 'tire_compound']] \
+            .rename(columns={'tire_compound': 'rider_compound'})
+        laps = laps.merge(compounds, on=['run', 'rider_id'], how='left')
+        rider_compound = laps.pop('rider_compound')
+        laps['tire_compound'] = laps['tire_compound'].fillna(rider_compound) \
+            if 'tire_compound' in laps else rider_compound
+        return laps
+
+    def degradation_curves(self):
+        """Prosječno vrijeme kruga i istrošenost po gumi i krugu na gumi"""
+        laps = self.lap_frame()
+        return laps[~laps['pit_lap']].groupby(['tire_compound', 'stint_lap']).agg(
+            n=('lap_time', 'count'),
+            mean_lap_time=('lap_time', 'mean'),
+            std_lap_time=('lap_time', 'std'),
+            mean_tire_wear=('tire_wear', 'mean'))
+
+    def degradation_rates(self):
+        """Nagib pravca lap_time ~ stint_lap po gumi (s/krug) - OLS iz groupby suma, bez pit krugova"""
+        laps = self.lap_frame()
+        laps = laps[~laps['pit_lap']]
+        x = laps['stint_lap'].to_numpy(dtype=float)
+        y = laps['lap_time'].to_numpy(dtype=float)
+        sums = laps[['tire_compound']].assign(x=x, y=y, xx=x * x, xy=x * y) \
+            .groupby('tire_compound').agg(['sum', 'count'])
+
+        n = sums[('x', 'count')]
+        sx, sy = sums[('x', 'sum')], sums[('y', 'sum')]
+        slope = (n * sums[('xy', 'sum')] - sx * sy) / (n * sums[('xx', 'sum')] - sx**2)
+        rates = slope.rename('seconds_per_lap').to_frame()
+        rates['intercept'] = (sy - slope * sx) / n
+        rates['laps'] = n
+        return rates
+
+    def report(self):
+        """Ispis sažetka korpusa"""
+        print("\n" + "="*80)
+        print(f"📚 ANALITIKA {self.num_runs} UTRKA ({len(self.results)} rezultata, {len(self.laps)} krugova)")
+        print("="*80)
+        if not len(self.results):
+            print("❌ Nema rezultata!")
+            return
+
+        print("\n🏆 WIN RATE PO STRATEGIJI GUMA:")
+        print(self.win_rates().to_string(float_format='%.3f'))
+        print("\n⏱️  VRIJEME CILJA (95% CI):")
+        print(self.finish_time_ci()[['n', 'mean_time', 'time_ci_low', 'time_ci_high',
+                                     'mean_gap', 'gap_ci_low', 'gap_ci_high']]
+              .to_string(float_format='%.2f'))
+        print("\n🔬 KORELACIJE:")
+        print(self.correlations().to_string(float_format='%.3f'))
+        if len(self.laps):
+            print("\n📉 DEGRADACIJA (s/krug):")
+            print(self.degradation_rates().to_string(float_format='%.4f'))
+        print("="*80)
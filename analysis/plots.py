@@ -0,0 +1,153 @@
+"""
+Grafovi analize utrke
+Renderiranje ide u zasebni proces (PlotRenderer), pa event loop nastavlja
+sa sljedećom utrkom dok se figura crta. Razine kvalitete:
+    png  - rasterski graf s RaceConfig.PLOT_DPI
+    svg  - vektorski graf (bez rasterizacije, obično najbrži)
+    json - samo podaci grafova, bez matplotliba
+    none - bez grafova
+"""
+
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis.analytics import strategy_labels
+from config.race_config import RaceConfig
+
+PLOT_FORMATS = ("png", "svg", "json", "none")
+
+ANALYSIS_COLUMNS = ['skill_level', 'aggression', 'consistency', 'total_time', 'overtakes']
+
+
+def plot_race_analysis(df, output_file, dpi=300):
+    """Četiri grafa analize utrke (DataFrame rezultata) - PNG ili SVG po ekstenziji"""
+    # Plotting stack se učitava tek kad se grafovi stvarno crtaju
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Vozač s pit stopom ide pod strategiju ('medium>soft'), ne pod startnu gumu
+    df = df.assign(tire_strategy=strategy_labels(df))
+
+    # Postavljanje stila
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.facecolor'] = 'white'
+
+    # Kreiranje figura
+    fig = plt.figure(figsize=(14, 10))
+    fig.suptitle('MotoGP Race Analysis', fontsize=16, fontweight='bold', y=0.995)
+
+    # 1. Tire strategy comparison - FIX za warning
+    plt.subplot(2, 2, 1)
+    sns.boxplot(data=df, x='tire_strategy', y='total_time', 
+               hue='tire_strategy', palette='Set2', legend=False)
+    plt.title('Total Race Time by Tire', fontsize=12, fontweight='bold')
+    plt.xlabel('Tire Compound', fontsize=10)
+    plt.ylabel('Total Time (s)', fontsize=10)
+    plt.grid(axis='y', alpha=0.3)
+
+    # 2. Aggression vs Overtakes
+    plt.subplot(2, 2, 2)
+    sns.scatterplot(data=df, x='aggression', y='overtakes', 
+                   hue='tire_strategy', s=150, alpha=0.7, palette='Set2')
+    plt.title('Aggression vs Overtakes', fontsize=12, fontweight='bold')
+    plt.xlabel('Aggression Level', fontsize=10)
+    plt.ylabel('Number of Overtakes', fontsize=10)
+    plt.legend(title='Tire', fontsize=8)
+    plt.grid(alpha=0.3)
+
+    # 3. Skill vs Performance
+    plt.subplot(2, 2, 3)
+    sns.scatterplot(data=df, x='skill_level', y='total_time', 
+                   hue='final_position', palette='viridis', s=150, alpha=0.7)
+    plt.title('Skill vs Performance', fontsize=12, fontweight='bold')
+    plt.xlabel('Skill Level', fontsize=10)
+    plt.ylabel('Total Time (s)', fontsize=10)
+    plt.legend(title='Position', fontsize=8)
+    plt.grid(alpha=0.3)
+
+    # 4. Correlation matrix
+    plt.subplot(2, 2, 4)
+    corr = df[['skill_level', 'aggression', 'consistency', 'total_time', 'overtakes']].corr()
+    sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', 
+               center=0, cbar_kws={'label': 'Correlation'}, 
+               square=True, linewidths=0.5)
+    plt.title('Correlation Matrix', fontsize=12, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def analysis_data(df):
+    """Podaci sva četiri grafa kao JSON-serijalizabilan dict"""
+    df = df.assign(tire_strategy=strategy_labels(df))
+    box = {}
+    for compound, times in df.groupby('tire_strategy')['total_time']:
+        q1, median, q3 = times.quantile([0.25, 0.5, 0.75])
+        box[compound] = {'min': times.min(), 'q1': q1, 'median': median,
+                         'q3': q3, 'max': times.max(), 'count': int(times.count())}
+
+    points = df[['rider_id', 'tire_compound', 'tire_strategy', 'final_position', 'skill_level',
+                 'aggression', 'overtakes', 'total_time']]
+    corr = df[ANALYSIS_COLUMNS].corr()
+
+    return {
+        'total_time_by_tire': box,
+        'riders': points.to_dict('records'),
+        'correlation': {'columns': ANALYSIS_COLUMNS, 'matrix': corr.values.tolist()}
+    }
+
+
+def render_analysis(df, output_base, fmt="png", dpi=None):
+    """
+    Renderiraj analizu u output_base + ekstenzija formata, vrati putanju.
+    Izvršava se u worker procesu PlotRenderera (ili izravno).
+    """
+    if fmt not in PLOT_FORMATS:
+        raise ValueError(f"Nepoznat format grafa: {fmt}")
+    if fmt == "none":
+        return None
+
+    output_file = f"{output_base}.{fmt}"
+    if fmt == "json":
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(analysis_data(df), f, indent=2, default=float)
+    else:
+        plot_race_analysis(df, output_file, dpi=dpi or RaceConfig.PLOT_DPI)
+    return output_file
+
+
+class PlotRenderer:
+    """Pool procesa za grafove - submit ne blokira event loop"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or RaceConfig.PLOT_WORKERS
+        self._executor = None  # pokreće se tek kod prvog grafa
+        self.pending = set()
+
+    def submit(self, df, output_base, fmt="png", dpi=None):
+        """Pošalji graf u pool; vraća asyncio future s putanjom datoteke"""
+        if self._executor is None:
+            # spawn - worker ne nasljeđuje SPADE/asyncio stanje roditelja
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"))
+
+        future = asyncio.wrap_future(
+            self._executor.submit(render_analysis, df, output_base, fmt, dpi))
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return future
+
+    async def wait(self):
+        """Pričekaj sve grafove koji se još renderiraju, vrati (putanja ili greška) po grafu"""
+        return await asyncio.gather(*list(self.pending), return_exceptions=True)
+
+    def close(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,86 @@
+"""
+Benchmark vremena importa
+Svaki modul se importa u svježem interpreteru; ispisuje se najbolje vrijeme
+i koji teški paketi su usput učitani. Izlazni kod 1 ako headless modul
+povuče zabranjeni paket ili prijeđe --max-seconds.
+    python benchmarks/import_time.py --repeat 5 --max-seconds 2.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("numpy", "pandas", "matplotlib", "seaborn", "pyarrow", "spade")
+
+# modul → paketi koje ne smije učitati
+MODULES = {
+    "config.race_config": ("numpy", "pandas", "matplotlib", "seaborn"),
+    "engine.fast_engine": ("pandas", "matplotlib", "seaborn"),
+    "engine.sweep": ("pandas", "matplotlib", "seaborn"),
+    "agents.rider_agent": ("pandas", "matplotlib", "seaborn"),
+    "agents.coordinator_agent": ("pandas", "matplotlib", "seaborn", "pyarrow"),
+    "main": ("matplotlib", "seaborn"),
+    "cli": ("matplotlib", "seaborn"),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """Najbolje vrijeme importa iz repeat svježih procesa"""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        if best is None or sample['seconds'] < best['seconds']:
+            best = sample
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vrijeme importa modula simulacije")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, help="prag za regresiju (po modulu)")
+    parser.add_argument("--json", help="spremi rezultate u JSON datoteku")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failed = False
+    print(f"{'modul':28s} {'vrijeme':>9s}  učitano")
+    for module, forbidden in MODULES.items():
+        result = measure(module, args.repeat)
+        violations = [m for m in result['loaded'] if m in forbidden]
+        too_slow = args.max_seconds is not None and result['seconds'] > args.max_seconds
+        failed = failed or bool(violations) or too_slow
+
+        flag = ""
+        if violations:
+            flag += f"  ❌ zabranjeno: {', '.join(violations)}"
+        if too_slow:
+            flag += f"  ❌ > {args.max_seconds:.2f}s"
+        print(f"{module:28s} {result['seconds']:8.3f}s  {', '.join(result['loaded']) or '-'}{flag}")
+        results[module] = dict(result, forbidden_loaded=violations)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Benchmark suite za hot pathove simulacije
+Svaki benchmark se mjeri repeat puta (najbolje vrijeme), a rezultati se
+spremaju u JSON da se runovi mogu uspoređivati:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json --filter positions
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from config.race_context import RaceContext
+from engine.fast_engine import FastRaceEngine
+
+BENCHMARKS = []
+
+# Rezultati benchmarka (CSV) - briše se na izlazu
+SCRATCH = tempfile.TemporaryDirectory(prefix="motogp_bench_")
+
+
+def benchmark(name, **params):
+    """Registriraj benchmark; funkcija vraća (callable, broj operacija po pozivu)"""
+    def register(func):
+        BENCHMARKS.append((name, func, params))
+        return func
+    return register
+
+
+def local_context(**overrides):
+    """In-process kontekst bez XMPP-a, sleepova i grafova"""
+    settings = dict(TRANSPORT="local", VIRTUAL_CLOCK=True, PLOT_FORMAT="none", RANDOM_SEED=1234)
+    settings.update(overrides)
+    return RaceContext(**settings)
+
+
+def make_rider(context):
+    """RiderAgent sa stanjem kao nakon setup(), bez pokretanja behavioura"""
+    from agents.rider_agent import RiderAgent
+
+    rider = RiderAgent(context.jid("bench_rider"), "bench", 0,
+                       context=context, rng=context.rider_rngs()[0])
+    rider.aggression, rider.consistency, rider.skill_level = 0.5, 0.8, 0.9
+    rider.build_lap_tables()
+    rider.mount_tires('medium')
+    return rider
+
+
+def make_coordinator(context):
+    from agents.coordinator_agent import CoordinatorAgent
+    return CoordinatorAgent(context.jid("bench_coordinator"), "bench", context=context)
+
+
+@benchmark("rider.lap_model", laps=1000)
+def bench_lap_model(laps):
+    """calculate_lap_time + update_tire_degradation po krugu"""
+    rider = make_rider(local_context(NUM_LAPS=laps))
+
+    def run():
+        rider.mount_tires('medium')
+        for _ in range(laps):
+            rider.calculate_lap_time()
+            rider.update_tire_degradation()
+    return run, laps
+
+
+def positions_benchmark(riders, laps):
+    """update_position koordinatora za svaki lap_update jednog niza krugova"""
+    from agents.position_tracker import PositionTracker
+
+    context = local_context(NUM_RIDERS=riders)
+    lap_times = 100 + np.random.default_rng(0).random((laps, riders))
+    totals = lap_times.cumsum(axis=0)
+
+    coordinator = make_coordinator(context)
+
+    def run():
+        coordinator.rider_positions = {}
+        coordinator.position_tracker = PositionTracker()
+        for lap in range(laps):
+            for rider_id in range(riders):
+                coordinator.rider_positions[rider_id] = {
+                    'total_time': totals[lap, rider_id], 'lap': lap + 1, 'tire_wear': 0.0}
+                coordinator.update_position(rider_id)
+    return run, riders * laps
+
+
+@benchmark("coordinator.update_positions", riders=8, laps=20)
+def bench_positions_8(riders, laps):
+    return positions_benchmark(riders, laps)
+
+
+@benchmark("coordinator.update_positions", riders=100, laps=20)
+def bench_positions_100(riders, laps):
+    return positions_benchmark(riders, laps)
+
+
+@benchmark("coordinator.update_positions", riders=1000, laps=20)
+def bench_positions_1000(riders, laps):
+    return positions_benchmark(riders, laps)
+
+
+@benchmark("json.lap_update", messages=1000)
+def bench_json_lap_update(messages):
+    """Encode + decode lap_update poruke kao u RacingState / RaceCoordinator"""
+    payload = {'type': 'lap_update', 'rider_id': 7, 'lap': 12,
+               'total_time': 1234.5678, 'tire_wear': 0.4321}
+
+    def run():
+        for _ in range(messages):
+            json.loads(json.dumps(payload))
+    return run, messages
+
+
+@benchmark("json.results", laps=25, messages=100)
+def bench_json_results(laps, messages):
+    """Encode + decode results poruke s lap_data (LapStore.encode / decode)"""
+    from storage.lap_store import LapStore
+
+    store = LapStore(laps)
+    for lap in range(1, laps + 1):
+        store.append(lap=lap, time=100.0 + lap, tire_wear=lap / laps, position=3)
+    results = {'type': 'race_results', 'rider_id': 3, 'total_time': 2600.0,
+               'final_position': 3, 'tire_compound': 'soft', 'pit_stops': 0,
+               'avg_lap_time': 104.0, 'lap_time_std': 1.2, 'skill_level': 0.9,
+               'aggression': 0.6, 'consistency': 0.85, 'tire_wear_final': 0.9}
+
+    def run():
+        for _ in range(messages):
+            body = json.dumps(dict(results, lap_data=store.encode()))
+            LapStore.decode(json.loads(body)['lap_data'])
+    return run, messages
+
+
+@benchmark("codec.lap_update", messages=1000)
+def bench_codec_lap_update(messages):
+    """Encode + decode lap_update poruke kompaktnom shemom (messaging.codec)"""
+    from messaging import codec
+
+    payload = {'type': 'lap_update', 'rider_id': 7, 'lap': 12,
+               'total_time': 1234.5678, 'tire_wear': 0.4321}
+
+    def run():
+        for _ in range(messages):
+            codec.decode(*codec.encode(payload, 'lap_update'))
+    return run, messages
+
+
+@benchmark("codec.results", laps=25, messages=100)
+def bench_codec_results(laps, messages):
+    """Encode + decode results poruke s lap_data kompaktnom shemom"""
+    from messaging import codec
+    from storage.lap_store import LapStore
+
+    store = LapStore(laps)
+    for lap in range(1, laps + 1):
+        store.append(lap=lap, time=100.0 + lap, tire_wear=lap / laps, position=3)
+    results = {'type': 'race_results', 'rider_id': 3, 'total_time': 2600.0,
+               'final_position': 3, 'tire_compound': 'soft', 'pit_stops': 0,
+               'avg_lap_time': 104.0, 'lap_time_std': 1.2, 'skill_level': 0.9,
+               'aggression': 0.6, 'consistency': 0.85, 'tire_wear_final': 0.9}
+
+    def run():
+        for _ in range(messages):
+            body, codec_name = codec.encode(dict(results, lap_data=store.encode()), 'results')
+            LapStore.decode(codec.decode(body, codec_name)['lap_data'])
+    return run, messages
+
+
+@benchmark("coordinator.save_results", riders=20, laps=25)
+def bench_save_results(riders, laps):
+    """CSV export rezultata i lap data jedne utrke"""
+    results_dir = SCRATCH.name
+    context = local_context(NUM_RIDERS=riders, NUM_LAPS=laps, RESULTS_DIR=results_dir,
+                            RESULT_SINK="csv")
+    race_results = FastRaceEngine(seed=1, config=context.config).simulate(1).race_results(0)
+
+    def run():
+        coordinator = make_coordinator(context)
+        coordinator.race_results = race_results
+        with contextlib.redirect_stdout(io.StringIO()):
+            coordinator.save_results()
+    return run, 1
+
+
+@benchmark("race.wall_time", riders=8, laps=20)
+def bench_full_race(riders, laps):
+    """Cijela agentska utrka na LocalBusu s virtualnim satom"""
+    from main import MotoGPSimulation
+
+    results_dir = SCRATCH.name
+
+    def run():
+        context = local_context(NUM_RIDERS=riders, NUM_LAPS=laps, RESULTS_DIR=results_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(MotoGPSimulation(context).run_full_simulation())
+    return run, 1
+
+
+def measure(run, repeat):
+    """Najbolje i prosječno vrijeme od repeat poziva"""
+    run()  # zagrijavanje (importi, alokacije)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'commit': commit
+    }
+
+
+def benchmark_id(name, params):
+    return name + "".join(f"[{key}={value}]" for key, value in params.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki hot pathova simulacije")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="pokreni samo benchmarke čiji naziv sadrži tekst")
+    parser.add_argument("--output", help="spremi rezultate u JSON")
+    parser.add_argument("--compare", help="JSON prethodnog runa za usporedbu")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {r['id']: r for r in json.load(f)['results']}
+
+    results = []
+    print(f"{'benchmark':52s} {'best':>10s} {'mean':>10s} {'ops/s':>12s}")
+    for name, func, params in BENCHMARKS:
+        bench_id = benchmark_id(name, params)
+        if args.filter and args.filter not in bench_id:
+            continue
+
+        run, ops = func(**params)
+        best, mean = measure(run, args.repeat)
+        result = {'id': bench_id, 'name': name, 'params': params, 'repeat': args.repeat,
+                  'best_s': best, 'mean_s': mean, 'ops': ops, 'ops_per_s': ops / best}
+        results.append(result)
+
+        line = f"{bench_id:52s} {best * 1e3:8.2f}ms {mean * 1e3:8.2f}ms {ops / best:12,.0f}"
+        if bench_id in baseline:
+            line += f"  {best / baseline[bench_id]['best_s']:5.2f}x vs baseline"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\n💾 Rezultati spremljeni: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Headless CLI - simulacija bez interaktivnog menija i bez matplotliba
+    python -m cli run --laps 10 --riders 8 --transport local
+    python -m cli run --jobs jobs.yaml --workers 4
+    python -m cli sweep --races-per-assignment 2000 --workers 8
+    python -m cli replay 12345/3 --save
+    python -m cli analyze results/race_results_20250101_120000.csv
+    python -m cli stats --output results/strategy
+Izlazni kod: 0 = sve uspjelo, 1 = neki posao nije uspio, 2 = neispravni argumenti.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import sys
+
+from config.race_config import RaceConfig
+from config.race_context import RaceContext
+from analysis.plots import PLOT_FORMATS
+
+# Kratke opcije → ključevi RaceConfig
+SHORTCUTS = {
+    'laps': 'NUM_LAPS',
+    'riders': 'NUM_RIDERS',
+    'transport': 'TRANSPORT',
+    'server': 'XMPP_SERVER',
+    'seed': 'RANDOM_SEED',
+    'sink': 'RESULT_SINK',
+    'plots': 'PLOT_FORMAT',
+    'profile': 'PROFILE_MODE',
+    'shards': 'NUM_SHARDS',
+}
+
+class JobFileError(ValueError):
+    """Neispravan job file ili nepoznata postavka"""
+
+
+def parse_value(text):
+    """Vrijednost iz --set: JSON (broj, bool, lista...) ili obični string"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def normalize_overrides(settings, source):
+    """Ključevi u velika slova i provjera da postoje u RaceConfig"""
+    overrides = {}
+    for key, value in settings.items():
+        name = key.upper()
+        if name.startswith('_') or not hasattr(RaceConfig, name) or callable(getattr(RaceConfig, name)):
+            raise JobFileError(f"{source}: nepoznata postavka {key}")
+        overrides[name] = value
+    return overrides
+
+
+def collect_overrides(args):
+    """--laps/--riders/... i --set KEY=VALUE → dict za RaceConfig.update_config"""
+    settings = {}
+    for option, key in SHORTCUTS.items():
+        value = getattr(args, option, None)
+        if value is not None:
+            settings[key] = value
+    if getattr(args, 'virtual_clock', False):
+        settings['VIRTUAL_CLOCK'] = True
+    if getattr(args, 'pit_stops', False):
+        settings['PIT_STOPS'] = True
+
+    for item in args.set or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise JobFileError(f"--set očekuje KEY=VALUE, dobiveno: {item}")
+        settings[key.strip()] = parse_value(value.strip())
+
+    return normalize_overrides(settings, '--set')
+
+
+def load_job_file(path):
+    """
+    YAML/JSON job file - lista konfiguracija utrka:
+        defaults: {num_laps: 10, transport: local}
+        jobs:
+          - {name: soft_only, num_riders: 8, repeat: 3}
+          - {name: long, num_laps: 30}
+    Dopuštena je i sama lista poslova. Vraća listu poslova
+    {'race_id', 'overrides', 'seed'} - repeat se raspakira u zasebne utrke.
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise JobFileError("YAML job file zahtijeva PyYAML: pip install pyyaml") from e
+            try:
+                spec = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise JobFileError(f"{path}: neispravan YAML - {' '.join(str(e).split())}") from e
+        else:
+            try:
+                spec = json.load(f)
+            except json.JSONDecodeError as e:
+                raise JobFileError(f"{path}: neispravan JSON - {e}") from e
+
+    if isinstance(spec, list):
+        spec = {'jobs': spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise JobFileError(f"{path}: očekivana lista 'jobs'")
+
+    defaults = normalize_overrides(spec.get('defaults') or {}, f"{path} defaults")
+
+    jobs = []
+    for idx, entry in enumerate(spec['jobs']):
+        if not isinstance(entry or {}, dict):
+            raise JobFileError(f"{path} jobs[{idx}]: posao mora biti mapa postavki, a ne {entry!r}")
+        entry = dict(entry or {})
+        name = str(entry.pop('name', f"job{idx}"))
+        try:
+            repeat = int(entry.pop('repeat', 1))
+        except (TypeError, ValueError) as e:
+            raise JobFileError(f"{path} jobs[{idx}]: repeat mora biti cijeli broj") from e
+        if repeat < 1:
+            raise JobFileError(f"{path} jobs[{idx}]: repeat mora biti barem 1")
+        overrides = dict(defaults, **normalize_overrides(entry, f"{path} jobs[{idx}]"))
+
+        # race_id ide u JID i ime fileova
+        race_id = re.sub(r'[^a-z0-9_]', '_', name.lower())
+
+        # Ponovljene utrke s fiksnim seedom dobivaju neovisne spawn seedove
+        seed = overrides.pop('RANDOM_SEED', None)
+        if repeat > 1:
+            from engine.rng import make_seed_sequence
+            seeds = make_seed_sequence(seed).spawn(repeat)
+            jobs.extend({'race_id': f"{race_id}_{i}", 'overrides': overrides, 'seed': seeds[i]}
+                        for i in range(repeat))
+        else:
+            jobs.append({'race_id': race_id, 'overrides': overrides, 'seed': seed})
+
+    return jobs
+
+
+async def run_jobs(jobs, workers):
+    """
+    Red poslova - najviše workers utrka istovremeno u istom event loopu.
+    Grafovi (PLOT_FORMAT posla) se crtaju u zasebnom procesu dok idu iduće utrke.
+    """
+    # matplotlib se učitava samo u procesu PlotRenderera
+    from main import MotoGPSimulation
+    from analysis.plots import PlotRenderer
+
+    semaphore = asyncio.Semaphore(max(1, workers))
+    renderer = PlotRenderer()
+
+    def job_name(idx, job):
+        # Jedna utrka bez job filea nema race_id
+        return job['race_id'] or f"job{idx}"
+
+    async def run_job(idx, job):
+        async with semaphore:
+            context = RaceContext(race_id=job['race_id'], seed=job['seed'], **job['overrides'])
+            simulation = MotoGPSimulation(context, renderer=renderer)
+            try:
+                await simulation.run_full_simulation()
+            except Exception as e:
+                print(f"❌ {job_name(idx, job)}: {e}")
+                return False
+            return bool(simulation.coordinator and simulation.coordinator.race_finished)
+
+    try:
+        results = await asyncio.gather(*(run_job(idx, job) for idx, job in enumerate(jobs)))
+        plots = await renderer.wait()
+    finally:
+        renderer.close()
+
+    plot_errors = sum(isinstance(plot, BaseException) for plot in plots)
+    for idx, (job, ok) in enumerate(zip(jobs, results)):
+        print(f"   {'✓' if ok else '❌'} {job_name(idx, job)}")
+    if plot_errors:
+        print(f"❌ {plot_errors} grafova nije generirano")
+    return sum(results), plot_errors
+
+
+def cmd_run(args):
+    """Jedna ili više agentskih utrka (ili poslovi iz job filea)"""
+    if args.jobs:
+        jobs = load_job_file(args.jobs)
+    else:
+        from engine.rng import make_seed_sequence
+        if args.races > 1:
+            seeds = make_seed_sequence(RaceConfig.RANDOM_SEED).spawn(args.races)
+            jobs = [{'race_id': f"race{i}", 'overrides': {}, 'seed': seeds[i]}
+                    for i in range(args.races)]
+        else:
+            jobs = [{'race_id': None, 'overrides': {}, 'seed': None}]
+
+    workers = args.workers or len(jobs)
+    finished, plot_errors = asyncio.run(run_jobs(jobs, workers))
+    print(f"\n✅ Završeno {finished}/{len(jobs)} utrka")
+    return 0 if finished == len(jobs) and not plot_errors else 1
+
+
+def cmd_sweep(args):
+    """Monte Carlo sweep dodjela guma (fast engine, više procesa)"""
+    from engine.sweep import run_sweep
+
+    result = run_sweep(races_per_assignment=args.races_per_assignment,
+                       seed=RaceConfig.RANDOM_SEED,
+                       chunk_size=args.chunk_size,
+                       max_workers=args.workers)
+    print(f"✓ Simulirano {result.races} utrka")
+
+    compounds = result.compound_summary()
+    print(compounds.to_string(index=False, float_format='%.3f'))
+
+    if args.output:
+        result.assignment_summary().to_csv(args.output, index=False)
+        print(f"💾 Sažetak dodjela spremljen: {args.output}")
+    return 0
+
+
+def recorded_pit_stops(seed_label):
+    """Ukupno pit stopova u spremljenim runovima s tim seedom (CSV i Parquet rezultati)"""
+    import pandas as pd
+
+    total = 0
+    for path in glob.glob(os.path.join(RaceConfig.RESULTS_DIR, 'race_results_*.csv')):
+        df = pd.read_csv(path, usecols=lambda column: column in ('seed', 'pit_stops'),
+                         dtype={'seed': str})
+        if {'seed', 'pit_stops'}.issubset(df.columns):
+            total += int(df.loc[df['seed'] == seed_label, 'pit_stops'].sum())
+
+    from storage.result_sink import ParquetResultSink
+    sink = ParquetResultSink()
+    if os.path.exists(os.path.join(sink.root, 'race_results')):
+        try:
+            df = sink.load(columns=['seed', 'pit_stops'])
+        except (ImportError, ValueError, KeyError):
+            df = None  # bez pyarrow ili stariji dataset bez pit_stops
+        if df is not None and len(df):
+            total += int(df.loc[df['seed'].astype(str) == seed_label, 'pit_stops'].fillna(0).sum())
+    return total
+
+
+def cmd_replay(args):
+    """Bit-identičan replay utrke iz seed labela (fast engine)"""
+    from engine.fast_engine import FastRaceEngine
+
+    compounds = args.compounds.split(',') if args.compounds else None
+    engine = FastRaceEngine()
+    if recorded_pit_stops(args.seed_label):
+        print(f"❌ Run sa seedom {args.seed_label} ima pit stopove - fast engine ga ne može reproducirati")
+        return 2
+    if compounds is not None and len(compounds) != engine.num_riders:
+        print(f"❌ --compounds treba {engine.num_riders} guma (po vozaču)")
+        return 1
+
+    batch = engine.replay(args.seed_label, compounds)
+    print(batch.results_dataframe(0)[
+        ['final_position', 'rider_id', 'tire_compound', 'total_time', 'overtakes']
+    ].to_string(index=False, float_format='%.3f'))
+
+    if args.save:
+        timestamp = batch.save_results(0)
+        print(f"💾 Rezultati spremljeni (timestamp: {timestamp})")
+    return 0
+
+
+def cmd_analyze(args):
+    """Grafovi i sažetak iz spremljenog race_results CSV-a"""
+    import pandas as pd
+    from analysis.analytics import compound_stats
+    from analysis.plots import render_analysis
+
+    path = args.results
+    if path is None:
+        candidates = sorted(glob.glob(os.path.join(RaceConfig.RESULTS_DIR, 'race_results_*.csv')),
+                            key=os.path.getmtime)
+        if not candidates:
+            print(f"❌ Nema rezultata u {RaceConfig.RESULTS_DIR}")
+            return 1
+        path = candidates[-1]
+    elif not os.path.exists(path):
+        print(f"❌ Ne postoji: {path}")
+        return 1
+
+    df = pd.read_csv(path)
+    print(compound_stats(df).to_string(float_format='%.3f'))
+
+    output_base = args.output or os.path.join(
+        os.path.dirname(path),
+        os.path.basename(path).replace('race_results_', 'analysis_').replace('.csv', ''))
+    output_file = render_analysis(df, output_base, RaceConfig.PLOT_FORMAT)
+    if output_file:
+        print(f"✅ Grafovi spremljeni: {output_file}")
+    return 0
+
+
+def cmd_stats(args):
+    """Statistike strategija preko svih spremljenih runova"""
+    from analysis.analytics import load_runs
+
+    corpus = load_runs(args.results_dir, source=args.source, max_workers=args.workers)
+    if not corpus.num_runs:
+        print(f"❌ Nema rezultata u {args.results_dir or RaceConfig.RESULTS_DIR}")
+        return 1
+    corpus.report()
+
+    if args.output:
+        tables = {'win_rates': corpus.win_rates(), 'finish_times': corpus.finish_time_ci(),
+                  'correlations': corpus.correlations()}
+        if len(corpus.laps):
+            tables['degradation'] = corpus.degradation_curves()
+        for name, table in tables.items():
+            path = f"{args.output}_{name}.csv"
+            table.to_csv(path)
+            print(f"💾 {path}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli",
+                                     description="MotoGP simulacija bez menija")
+
+    # Zajedničke postavke - idu kroz RaceConfig.update_config
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--laps", type=int, help="broj krugova")
+    common.add_argument("--riders", type=int, help="broj vozača")
+    common.add_argument("--transport", choices=("xmpp", "local"))
+    common.add_argument("--server", help="XMPP server")
+    common.add_argument("--seed", help="seed (int ili label iz rezultata)")
+    common.add_argument("--sink", choices=("csv", "parquet", "both"), help="spremanje rezultata")
+    common.add_argument("--plots", choices=PLOT_FORMATS,
+                        help="format grafova (none = bez grafova)")
+    common.add_argument("--profile", choices=("timing", "cprofile", "collapsed"),
+                        help="profiliranje behavioura agenata")
+    common.add_argument("--shards", type=int, help="shard koordinatori (1 = jedan koordinator)")
+    common.add_argument("--virtual-clock", action="store_true", help="discrete-event sat umjesto sleepa")
+    common.add_argument("--pit-stops", action="store_true", help="timovi odlučuju o pit stopovima")
+    common.add_argument("--set", action="append", metavar="KEY=VALUE",
+                        help="bilo koja postavka RaceConfig (ponovljivo)")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", parents=[common], help="agentske utrke")
+    run.add_argument("--races", type=int, default=1, help="broj paralelnih utrka")
+    run.add_argument("--jobs", help="YAML/JSON job file s konfiguracijama utrka")
+    run.add_argument("--workers", type=int, help="najviše istovremenih utrka (default: sve)")
+    run.set_defaults(handler=cmd_run)
+
+    sweep = sub.add_parser("sweep", parents=[common], help="Monte Carlo sweep guma")
+    sweep.add_argument("--races-per-assignment", type=int, default=1000)
+    sweep.add_argument("--chunk-size", type=int, default=500)
+    sweep.add_argument("--workers", type=int, help="broj procesa (default: broj CPU-a)")
+    sweep.add_argument("--output", help="CSV sažetka po dodjeli guma")
+    sweep.set_defaults(handler=cmd_sweep)
+
+    replay = sub.add_parser("replay", parents=[common], help="replay utrke iz seed labela")
+    replay.add_argument("seed_label", help="seed iz rezultata, npr. 12345 ili 12345/3")
+    replay.add_argument("--compounds", help="gume po vozaču, npr. soft,soft,medium,hard")
+    replay.add_argument("--save", action="store_true", help="spremi CSV rezultate")
+    replay.set_defaults(handler=cmd_replay)
+
+    analyze = sub.add_parser("analyze", parents=[common], help="grafovi iz spremljenih rezultata")
+    analyze.add_argument("results", nargs="?", help="race_results CSV (default: najnoviji)")
+    analyze.add_argument("--output", help="datoteka bez ekstenzije (ekstenzija = --plots)")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    stats = sub.add_parser("stats", parents=[common], help="analitika preko svih spremljenih runova")
+    stats.add_argument("--results-dir", help="direktorij rezultata (default: RESULTS_DIR)")
+    stats.add_argument("--source", choices=("csv", "parquet"), default="csv")
+    stats.add_argument("--workers", type=int, help="threadovi za čitanje CSV-ova")
+    stats.add_argument("--output", help="prefiks CSV-ova sažetaka")
+    stats.set_defaults(handler=cmd_stats)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        RaceConfig.update_config(**collect_overrides(args))
+        return args.handler(args)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,10 @@
 Centralna konfiguracija za MotoGP višeagentnu simulaciju
 """
 
+import copy
+import hashlib
+import json
+
 class RaceConfig:
     """Globalne postavke utrke"""
 
@@ -9,6 +13,9 @@ class RaceConfig:
     XMPP_SERVER = "localhost"
     XMPP_PASSWORD = "password"
 
+    # Transport poruka: "xmpp" (SPADE server) ili "local" (in-process bus, bez servera)
+    TRANSPORT = "xmpp"
+
     # Postavke utrke
     NUM_LAPS = 20
     NUM_RIDERS = 8
@@ -42,14 +49,74 @@ class RaceConfig:
     AGGRESSION_RANGE = (0.3, 0.9)
     CONSISTENCY_RANGE = (0.7, 0.95)
 
+    # Master seed utrke (None = nova entropija); label seeda sprema se u rezultate
+    RANDOM_SEED = None
+
     # Simulacijske postavke
     TELEMETRY_INTERVAL = 5  # Svakih koliko krugova vozači šalju telemetriju
     SIMULATION_DELAY = 0.1  # Delay između krugova (sekunde)
 
+    # Pit stopovi: tim na svaku telemetriju odlučuje o promjeni gume (engine.pit_strategy)
+    PIT_STOPS = False
+    PIT_STOP_LOSS = 22.0         # sekunde izgubljene u pit laneu
+    PIT_ROLLOUTS = 500           # what-if rolloutova po opciji
+    PIT_CONFIDENCE = 0.8         # min udio rolloutova u kojima je pit brži od ostanka vani
+    PIT_DECISION_TIMEOUT = 0.5   # koliko vozač čeka odluku tima prije sljedećeg kruga
+
+    # Virtualno vrijeme - krugovi po simuliranom total_time umjesto SIMULATION_DELAY
+    VIRTUAL_CLOCK = False
+    PLAYBACK_SPEED = None   # None = što brže, npr. 30.0 = 30x brže od stvarne utrke
+
+    # Blokirajući receive - poruka budi behaviour odmah, timeout je samo za idle petlju
+    RECEIVE_TIMEOUT = 30
+
+    # Startup handshake - vozač javlja "ready" timu dok ne primi strategiju
+    READY_RETRY_INTERVAL = 1.0  # sekunde između ponovljenih "ready" poruka
+    STRATEGY_TIMEOUT = 15       # nakon toga vozač kreće s default medium gumama
+
+    # Batch protokol - jedan standings vektor po krugu umjesto position_update po vozaču
+    BATCH_LAP_UPDATES = False
+    BATCH_WINDOW = 0.05  # Koliko dugo koordinator čeka nepotpuni krug (sekunde)
+
+    # Hijerarhijski koordinatori: 1 = jedan koordinator; N > 1 = N shard koordinatora
+    # (vozač ide u shard rider_id % N) + root koordinator s globalnim leaderboardom
+    NUM_SHARDS = 1
+    SHARD_MERGE_INTERVAL = 0.05  # sekunde između slanja promjena shard → root
+
+    # Format tijela poruka: "compact" (struct sheme po ontologiji, messaging.codec) ili "json"
+    MESSAGE_CODEC = "compact"
+
+    # Live timing - frame po kompletiranom krugu
+    LIVE_TIMING_BUFFER = 32    # Max frameova po pretplatniku (stariji se odbacuju)
+    LIVE_TIMING_PORT = None    # npr. 8765 - lokalni TCP stream (JSON lines)
+    LIVE_TIMING_FILE = None    # npr. "results/live_timing.jsonl" - za tail -f
+
+    # Metrike poruka (latencija, dubina reda) - lokalni HTTP endpoint, None = isključeno
+    METRICS_PORT = None        # npr. 9108 → curl http://127.0.0.1:9108/
+
     # Output direktoriji
     RESULTS_DIR = "results"
     DATA_DIR = "data"
 
+    # Gdje se spremaju rezultati: "csv", "parquet" (particionirani dataset) ili "both"
+    RESULT_SINK = "csv"
+
+    # Grafovi: "png", "svg", "json" (samo podaci) ili "none"
+    PLOT_FORMAT = "png"
+    PLOT_DPI = 120
+    PLOT_WORKERS = 1           # procesi za renderiranje (analysis.plots.PlotRenderer)
+
+    # Profiliranje behavioura: None, "timing", "cprofile" ili "collapsed" (agents.profiling)
+    PROFILE_MODE = None
+    PROFILE_DIR = "results/profiles"
+
+    # Postavke koje određuju ishod utrke - ulaze u config hash
+    HASHED_SETTINGS = ('NUM_LAPS', 'NUM_RIDERS', 'LAP_BASE_TIME', 'TRACK_LENGTH',
+                       'TIRE_COMPOUNDS', 'SKILL_RANGE', 'AGGRESSION_RANGE',
+                       'CONSISTENCY_RANGE')
+    # Ulaze u hash samo uz PIT_STOPS - runovi bez pit stopova zadržavaju stari hash
+    PIT_HASHED_SETTINGS = ('PIT_STOPS', 'PIT_STOP_LOSS', 'PIT_ROLLOUTS', 'PIT_CONFIDENCE')
+
     @classmethod
     def update_config(cls, **kwargs):
         """Dinamičko ažuriranje konfiguracije"""
@@ -57,8 +124,35 @@ class RaceConfig:
             if hasattr(cls, key):
                 setattr(cls, key, value)
 
+    @classmethod
+    def settings(cls):
+        """Sve postavke (VELIKA_SLOVA) kao dict dubokih kopija - picklable snapshot"""
+        return {
+            key: copy.deepcopy(getattr(cls, key))
+            for key in dir(cls) if key.isupper() and not key.startswith('_')
+        }
+
+    @classmethod
+    def scoped(cls, **overrides):
+        """
+        Snapshot konfiguracije za jednu utrku: sve postavke (VELIKA_SLOVA) se
+        kopiraju u podklasu, pa kasniji update_config na RaceConfig ili drugim
+        utrkama ne mijenja ovu kopiju.
+        """
+        scoped_config = type(cls.__name__, (cls,), cls.settings())
+        scoped_config.update_config(**overrides)
+        return scoped_config
+
     @classmethod
     def get_tire_strategy(cls, team_id):
         """Dohvaća strategiju guma za određeni tim"""
         strategies = list(cls.TIRE_COMPOUNDS.keys())
         return strategies[team_id % len(strategies)]
+
+    @classmethod
+    def config_hash(cls):
+        """Kratki hash postavki utrke - grupira runove s istom konfiguracijom"""
+        keys = cls.HASHED_SETTINGS + (cls.PIT_HASHED_SETTINGS if cls.PIT_STOPS else ())
+        settings = {key: getattr(cls, key) for key in keys}
+        encoded = json.dumps(settings, sort_keys=True).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()[:12]
\ No newline at end of file
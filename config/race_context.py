@@ -0,0 +1,63 @@
+"""
+RaceContext - Kontekst jedne utrke
+Vlastita kopija konfiguracije, JID namespace, transport, virtualni sat i
+seed, tako da više utrka može dijeliti isti asyncio event loop.
+"""
+
+from config.race_config import RaceConfig
+from engine.clock import VirtualClock
+from engine.rng import make_seed_sequence, rider_generators, seed_label, team_generator
+from messaging.local_bus import LocalBus
+
+
+class RaceContext:
+    """Sve što pripada jednoj utrci - agenti ga dobivaju umjesto globalnog stanja"""
+
+    def __init__(self, race_id=None, config=None, bus=None, seed=None, **overrides):
+        self.race_id = race_id
+        self.config = (config or RaceConfig).scoped(**overrides)
+        if self.config.NUM_SHARDS > 1 and self.config.BATCH_LAP_UPDATES:
+            raise ValueError("Shard koordinatori rade s position_update protokolom "
+                             "(BATCH_LAP_UPDATES mora biti False)")
+
+        # Transport - zajednički LocalBus se može proslijediti za više utrka
+        if bus is None and self.config.TRANSPORT == "local":
+            bus = LocalBus()
+        self.bus = bus
+
+        self.clock = VirtualClock(self.config.PLAYBACK_SPEED) if self.config.VIRTUAL_CLOCK else None
+
+        self.profiler = None
+        if self.config.PROFILE_MODE:
+            from agents.profiling import RaceProfiler
+            self.profiler = RaceProfiler(self.config.PROFILE_MODE, self.config.PROFILE_DIR, race_id)
+
+        self.seed_sequence = make_seed_sequence(
+            seed if seed is not None else self.config.RANDOM_SEED)
+        self.seed = seed_label(self.seed_sequence)
+
+    def jid(self, name):
+        """JID agenta u namespaceu utrke: rider_0@server ili race3_rider_0@server"""
+        localpart = f"{self.race_id}_{name}" if self.race_id else name
+        return f"{localpart}@{self.config.XMPP_SERVER}"
+
+    def shard_of(self, rider_id):
+        return rider_id % self.config.NUM_SHARDS
+
+    def coordinator_jid(self, rider_id):
+        """Koordinator koji prima lap update vozača - njegov shard ili jedini koordinator"""
+        if self.config.NUM_SHARDS > 1:
+            return self.jid(f"shard_{self.shard_of(rider_id)}")
+        return self.jid("coordinator")
+
+    def rider_rngs(self):
+        """Neovisni RNG stream po vozaču iz seeda utrke"""
+        return rider_generators(self.seed_sequence, self.config.NUM_RIDERS)
+
+    def team_rng(self, team_id):
+        """RNG tima - ne dira streamove vozača"""
+        return team_generator(self.seed_sequence, team_id, self.config.NUM_RIDERS)
+
+    def result_tag(self, timestamp):
+        """Sufiks imena result fileova - race_id sprječava koliziju paralelnih utrka"""
+        return f"{timestamp}_{self.race_id}" if self.race_id else timestamp
@@ -0,0 +1 @@
+"""Engine package - headless simulacija utrke bez SPADE/XMPP-a"""
\ No newline at end of file
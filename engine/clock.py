@@ -0,0 +1,80 @@
+"""
+VirtualClock - Discrete-event sat simulacije
+Vozači ne spavaju u stvarnom vremenu nego čekaju da sat dođe do njihovog
+simuliranog total_time. Kad svi registrirani vozači čekaju, sat pušta
+najraniji događaj iz prioritetnog reda - krugovi se odvijaju točno po
+simuliranom redoslijedu, brzinom koju CPU dopušta.
+"""
+
+import asyncio
+import heapq
+import itertools
+
+
+class VirtualClock:
+    """Prioritetni red događaja ključan na simuliranom vremenu"""
+
+    def __init__(self, playback_speed=None):
+        self.now = 0.0
+        # None = što brže; 1.0 = stvarno vrijeme; 30.0 = 30x brže (demo)
+        self.playback_speed = playback_speed
+        self._queue = []  # heap (sim_time, seq, future)
+        self._seq = itertools.count()
+        self._participants = 0
+        self._releasing = False
+
+    def register(self):
+        """Novi sudionik - sat ne pomiče vrijeme dok on ne čeka"""
+        self._participants += 1
+
+    def unregister(self):
+        """Sudionik je gotov (npr. vozač je završio utrku)"""
+        self._participants -= 1
+        self._maybe_release()
+
+    async def wait_until(self, sim_time):
+        """Čekaj dok sat ne dođe do sim_time"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (sim_time, next(self._seq), future))
+        self._maybe_release()
+        return await future
+
+    def _all_waiting(self):
+        """Svi aktivni sudionici čekaju - otkazana čekanja (ugašen agent) se ne broje"""
+        if len(self._queue) < self._participants:
+            return False
+        if any(future.done() for _, _, future in self._queue):
+            self._queue = [entry for entry in self._queue if not entry[2].done()]
+            heapq.heapify(self._queue)
+        return bool(self._queue) and len(self._queue) >= self._participants
+
+    def _maybe_release(self):
+        # Siguran korak samo kad svi aktivni sudionici čekaju na satu
+        if self._releasing or not self._all_waiting():
+            return
+
+        if self.playback_speed:
+            self._releasing = True
+            asyncio.get_running_loop().create_task(self._release_after_delay())
+        else:
+            self._release_next()
+
+    def _release_next(self):
+        while self._queue:
+            sim_time, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue  # otkazano čekanje (ugašen agent)
+            self.now = max(self.now, sim_time)
+            future.set_result(sim_time)
+            return
+
+    async def _release_after_delay(self):
+        try:
+            delay = (self._queue[0][0] - self.now) / self.playback_speed
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._all_waiting():  # netko je možda otkazao čekanje tijekom pauze
+                self._release_next()
+        finally:
+            self._releasing = False
+        self._maybe_release()
@@ -0,0 +1,257 @@
+"""
+FastRaceEngine - Vektorizirani headless simulator utrke
+Reproducira RiderAgent.calculate_lap_time i update_tire_degradation nad
+poljem (utrke × vozači × krugovi), bez SPADE agenata i XMPP servera.
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+
+from agents.lap_stage import pass_matrix
+from config.race_config import RaceConfig
+from storage.lap_store import LAP_DTYPE
+from engine.lookup_tables import compound_arrays, lap_time_table, wear_table
+from engine.rng import make_seed_sequence, parse_seed_label, rider_generators, seed_label
+
+
+def require_no_pit_stops(config):
+    """Fast engine ne modelira pit stopove - rezultati ne bi odgovarali agentskoj utrci"""
+    if config.PIT_STOPS:
+        raise ValueError("Fast engine ne simulira pit stopove (PIT_STOPS) - "
+                         "replay i sweep rade samo bez --pit-stops")
+
+
+def previous_positions(positions):
+    """Pozicija prije svakog kruga (..., vozači, krugovi) - za prvi krug startna (rider_id + 1)"""
+    num_riders = positions.shape[-2]
+    grid = np.broadcast_to(np.arange(1, num_riders + 1)[:, None], positions.shape[:-1] + (1,))
+    return np.concatenate([grid, positions[..., :-1]], axis=-1)
+
+
+class RaceBatch:
+    """Rezultati niza utrka simuliranih odjednom - sve je u NumPy poljima"""
+
+    def __init__(self, tire_compounds, skill_level, aggression, consistency,
+                 lap_times, cumulative_time, tire_wear, positions, passes, seeds):
+        self.tire_compounds = tire_compounds  # (utrke, vozači) - nazivi guma
+        self.skill_level = skill_level        # (utrke, vozači)
+        self.aggression = aggression          # (utrke, vozači)
+        self.consistency = consistency        # (utrke, vozači)
+        self.lap_times = lap_times            # (utrke, vozači, krugovi)
+        self.cumulative_time = cumulative_time  # (utrke, vozači, krugovi) - zbroj krug po krug
+        self.tire_wear = tire_wear            # (utrke, vozači, krugovi) - nakon kruga
+        self.positions = positions            # (utrke, vozači, krugovi) - nakon kruga
+        self.passes = passes                  # (utrke, vozači, krugovi) - prestignuti vozači
+        self.overtakes = passes > 0           # (utrke, vozači, krugovi) - bool, kao LapStage
+        self.seeds = seeds                    # seed label po utrci (za replay)
+
+        # Zadnji stupac cumsum-a = isto zbrajanje krug po krug kao RiderAgent
+        # (sum() koristi pairwise zbrajanje i razlikuje se u zadnjim bitovima)
+        self.total_time = cumulative_time[:, :, -1]
+        self.final_position = positions[:, :, -1]
+
+    @property
+    def num_races(self):
+        return self.lap_times.shape[0]
+
+    @property
+    def num_riders(self):
+        return self.lap_times.shape[1]
+
+    @property
+    def num_laps(self):
+        return self.lap_times.shape[2]
+
+    def winners(self):
+        """rider_id pobjednika za svaku utrku"""
+        return self.total_time.argmin(axis=1)
+
+    def race_results(self, race_idx=0):
+        """Rezultati jedne utrke u istom obliku kao CoordinatorAgent.race_results"""
+        results = []
+        for rider_id in range(self.num_riders):
+            times = self.lap_times[race_idx, rider_id]
+            lap_data = np.zeros(self.num_laps, dtype=LAP_DTYPE)
+            lap_data['lap'] = np.arange(1, self.num_laps + 1)
+            lap_data['time'] = times
+            lap_data['tire_wear'] = self.tire_wear[race_idx, rider_id]
+            lap_data['position'] = self.positions[race_idx, rider_id]
+            lap_data['overtake'] = self.overtakes[race_idx, rider_id]
+            lap_data['compound'] = self.tire_compounds[race_idx, rider_id]
+            lap_data['stint_lap'] = lap_data['lap']
+            results.append({
+                'type': 'race_results',
+                'rider_id': rider_id,
+                'total_time': float(self.total_time[race_idx, rider_id]),
+                'final_position': int(self.final_position[race_idx, rider_id]),
+                'tire_compound': str(self.tire_compounds[race_idx, rider_id]),
+                'pit_stops': 0,
+                'tire_strategy': str(self.tire_compounds[race_idx, rider_id]),
+                'overtakes': int(self.overtakes[race_idx, rider_id].sum()),
+                'avg_lap_time': float(times.mean()),
+                'lap_time_std': float(times.std()),
+                'skill_level': float(self.skill_level[race_idx, rider_id]),
+                'aggression': float(self.aggression[race_idx, rider_id]),
+                'consistency': float(self.consistency[race_idx, rider_id]),
+                'tire_wear_final': float(self.tire_wear[race_idx, rider_id, -1]),
+                'seed': self.seeds[race_idx],
+                'lap_data': lap_data
+            })
+        return results
+
+    def lap_gaps(self, race_idx=0):
+        """(gap do vodećeg, interval do vozača ispred) po (vozač, krug) - kao LapStage"""
+        cumulative = self.cumulative_time[race_idx]
+        order = cumulative.argsort(axis=0, kind='stable')
+        ordered = np.take_along_axis(cumulative, order, axis=0)
+        gap_to_leader = cumulative - ordered[0]
+        interval = np.empty_like(cumulative)
+        np.put_along_axis(interval, order, np.diff(ordered, axis=0, prepend=ordered[:1]), axis=0)
+        return gap_to_leader, interval
+
+    def lap_dataframe(self, race_idx=0):
+        """Lap data jedne utrke - isti stupci kao lap_data CSV koordinatora"""
+        import pandas as pd
+        num_riders, num_laps = self.num_riders, self.num_laps
+        positions = self.positions[race_idx]
+        gap_to_leader, interval = self.lap_gaps(race_idx)
+        return pd.DataFrame({
+            'rider_id': np.repeat(np.arange(num_riders), num_laps),
+            'lap': np.tile(np.arange(1, num_laps + 1), num_riders),
+            'lap_time': self.lap_times[race_idx].ravel(),
+            'tire_wear': self.tire_wear[race_idx].ravel(),
+            'position': self.positions[race_idx].ravel(),
+            'overtake': self.overtakes[race_idx].ravel(),
+            'tire_compound': np.repeat(self.tire_compounds[race_idx], num_laps),
+            'stint_lap': np.tile(np.arange(1, num_laps + 1), num_riders),
+            'gap_to_leader': gap_to_leader.ravel(),
+            'interval': interval.ravel(),
+            'position_delta': (previous_positions(positions) - positions).astype(np.int32).ravel(),
+            'passes': self.passes[race_idx].ravel()
+        })
+
+    def results_dataframe(self, race_idx=0):
+        """Race results jedne utrke - isti stupci kao race_results CSV koordinatora"""
+        import pandas as pd
+        df = pd.DataFrame(self.race_results(race_idx)).drop(columns='lap_data')
+        df = df.sort_values('total_time').reset_index(drop=True)
+        df['final_position'] = range(1, len(df) + 1)
+        return df
+
+    def save_results(self, race_idx=0, results_dir=None):
+        """Spremi jednu utrku u CSV - ista shema i imena kao CoordinatorAgent.save_results"""
+        results_dir = results_dir or RaceConfig.RESULTS_DIR
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        results_file = os.path.join(results_dir, f"race_results_{timestamp}.csv")
+        self.results_dataframe(race_idx).to_csv(results_file, index=False)
+
+        lap_data_file = os.path.join(results_dir, f"lap_data_{timestamp}.csv")
+        self.lap_dataframe(race_idx).to_csv(lap_data_file, index=False)
+
+        return timestamp
+
+    def write_to_sink(self, sink, race_idx=None):
+        """Dodaj utrke (sve ili jednu) u ParquetResultSink, vrati run_id-eve"""
+        indices = range(self.num_races) if race_idx is None else [race_idx]
+        return [sink.write_run(self.results_dataframe(i), self.lap_dataframe(i),
+                               source='fast_engine')
+                for i in indices]
+
+
+class FastRaceEngine:
+    """Headless engine - tisuće utrka u sekundi za analizu strategija"""
+
+    def __init__(self, num_riders=None, num_laps=None, seed=None, config=None):
+        # config: RaceConfig ili kopija iz RaceContext (self.config.scoped)
+        self.config = config or RaceConfig
+        require_no_pit_stops(self.config)
+        self.num_riders = num_riders or self.config.NUM_RIDERS
+        self.num_laps = num_laps or self.config.NUM_LAPS
+        # Master seed - svaka utrka dobiva vlastiti spawn
+        self.seed_sequence = make_seed_sequence(seed)
+
+        self.compound_names, self.base_time, self.degradation_rate = compound_arrays(self.config)
+
+    def default_strategy(self):
+        """Gume po vozaču kao u TeamAgent (tim = rider_id // 2)"""
+        return [self.config.get_tire_strategy(rider_id // 2)
+                for rider_id in range(self.num_riders)]
+
+    def _compound_indices(self, tire_compounds, num_races):
+        if tire_compounds is None:
+            tire_compounds = self.default_strategy()
+        names = np.asarray(tire_compounds)
+        lookup = {name: idx for idx, name in enumerate(self.compound_names)}
+        indices = np.vectorize(lookup.__getitem__, otypes=[np.intp])(names)
+        return np.broadcast_to(indices, (num_races, self.num_riders))
+
+    def simulate(self, num_races=1, tire_compounds=None):
+        """
+        Simulira num_races neovisnih utrka.
+        tire_compounds: None (timska strategija), lista po vozaču
+        ili polje (utrke, vozači) naziva guma.
+        """
+        return self.simulate_seeds(self.seed_sequence.spawn(num_races), tire_compounds)
+
+    def replay(self, seed, tire_compounds=None):
+        """Bit-identičan replay jedne utrke iz seed labela iz rezultata"""
+        return self.simulate_seeds([parse_seed_label(seed)], tire_compounds)
+
+    def simulate_seeds(self, race_seeds, tire_compounds=None):
+        """
+        Simulira po jednu utrku za svaki seed. Vozač i dobiva isti stream
+        kao RiderAgent s rider_generators(seed)[i] - isti redoslijed izvlačenja.
+        """
+        num_races = len(race_seeds)
+        shape = (num_races, self.num_riders)
+        compounds = self._compound_indices(tire_compounds, num_races)
+
+        # Karakteristike vozača i šum po krugu - isti redoslijed izvlačenja kao
+        # RiderAgent.setup (aggression, consistency, skill) i calculate_lap_time
+        uniforms = np.empty(shape + (3,))
+        standard_noise = np.empty(shape + (self.num_laps,))
+        for race_idx, race_seed in enumerate(race_seeds):
+            for rider_id, rng in enumerate(rider_generators(race_seed, self.num_riders)):
+                uniforms[race_idx, rider_id] = rng.random(3)
+                standard_noise[race_idx, rider_id] = rng.standard_normal(self.num_laps)
+
+        # Generator.uniform(low, high) = low + (high - low) * random()
+        ranges = (self.config.AGGRESSION_RANGE, self.config.CONSISTENCY_RANGE, self.config.SKILL_RANGE)
+        aggression, consistency, skill_level = (
+            low + (high - low) * uniforms[:, :, idx] for idx, (low, high) in enumerate(ranges))
+
+        # Deterministički dio modela iz lookup tablica (isto kao RiderAgent)
+        tire_wear = wear_table(self.degradation_rate[compounds], aggression, self.num_laps)
+        expected = lap_time_table(self.base_time[compounds], tire_wear, skill_level)
+
+        noise_scale = (1 - consistency) * 2.0
+        noise = standard_noise * noise_scale[:, :, None]
+        lap_times = expected + noise
+        lap_times = np.maximum(lap_times, 80.0)
+
+        # Pozicije nakon svakog kruga po ukupnom vremenu (izjednačenje: rider_id, kao LapStage)
+        cumulative = np.cumsum(lap_times, axis=2)
+        positions = cumulative.argsort(axis=1, kind='stable').argsort(axis=1, kind='stable') + 1
+
+        # Pretjecanja kao u LapStage: parovi čiji se poredak obrnuo od
+        # prethodnog kruga (start = grid), krug po krug da matrica ostane mala
+        previous = previous_positions(positions)
+        passes = np.empty(positions.shape, dtype=np.int32)
+        for lap in range(self.num_laps):
+            passes[:, :, lap] = pass_matrix(previous[:, :, lap], positions[:, :, lap]).sum(axis=-1)
+
+        return RaceBatch(
+            tire_compounds=np.asarray(self.compound_names)[compounds],
+            skill_level=skill_level,
+            aggression=aggression,
+            consistency=consistency,
+            lap_times=lap_times,
+            cumulative_time=cumulative,
+            tire_wear=tire_wear,
+            positions=positions,
+            passes=passes,
+            seeds=[seed_label(race_seed) for race_seed in race_seeds]
+        )
@@ -0,0 +1,101 @@
+"""
+Lookup tablice modela kruga
+Deterministički dio RiderAgent modela - trošenje gume i vrijeme kruga bez
+šuma - ovisi samo o vozaču (aggression, skill) i gumi, pa se računa jednom
+na startu utrke. Tablice su indeksirane krugom na gumi (stint lap), tako da
+vrijede i nakon pit stopa. Vrući put samo dodaje šum, a strategije se
+ocjenjuju zbrajanjem tablica umjesto simulacije.
+"""
+
+import numpy as np
+
+
+def compound_arrays(config):
+    """(nazivi guma, bazno vrijeme kruga, stopa trošenja) po gumi iz config.TIRE_COMPOUNDS"""
+    names = list(config.TIRE_COMPOUNDS.keys())
+    base_speed = np.array([config.TIRE_COMPOUNDS[name]['base_speed'] for name in names])
+    degradation_rate = np.array([config.TIRE_COMPOUNDS[name]['degradation_rate'] for name in names])
+    return names, config.LAP_BASE_TIME / base_speed, degradation_rate
+
+
+def wear_table(degradation_rate, aggression, num_laps):
+    """
+    Trošenje nakon k-tog kruga na gumi, oblik (..., num_laps).
+    Isto zbrajanje kao update_tire_degradation (kumulativno, max 1.0).
+    """
+    wear_step = degradation_rate * (1.0 + aggression * 0.5)
+    steps = np.repeat(np.asarray(wear_step)[..., None], num_laps, axis=-1)
+    return np.minimum(np.cumsum(steps, axis=-1), 1.0)
+
+
+def lap_time_table(base_time, wear, skill_level):
+    """
+    Vrijeme k-tog kruga na gumi bez šuma, oblik kao wear.
+    calculate_lap_time koristi trošenje PRIJE kruga; redoslijed zbrajanja je
+    isti, pa je tablica + šum bit-identična izračunu po krugu.
+    """
+    wear_before = np.concatenate([np.zeros(wear.shape[:-1] + (1,)), wear[..., :-1]], axis=-1)
+    skill_factor = (2.0 - np.asarray(skill_level)) * 2.0
+    return np.asarray(base_time)[..., None] + wear_before * 5.0 + skill_factor[..., None]
+
+
+class RiderLapTables:
+    """Tablice jednog vozača za sve gume: wear i lap_time oblika (gume, krugovi)"""
+
+    def __init__(self, config, aggression, skill_level, num_laps=None):
+        self.num_laps = num_laps or config.NUM_LAPS
+        self.compounds, base_time, degradation_rate = compound_arrays(config)
+        self.index = {name: idx for idx, name in enumerate(self.compounds)}
+
+        self.wear = wear_table(degradation_rate, aggression, self.num_laps)
+        self.lap_time = lap_time_table(base_time, self.wear, np.full(len(self.compounds), skill_level))
+        # stint_time[c, k] = očekivano vrijeme prvih k krugova na gumi c (min 80s po krugu
+        # kao calculate_lap_time); stupac 0 je nula pa je zbroj krugova [a, b) razlika
+        floored = np.maximum(self.lap_time, 80.0)
+        self.stint_time = np.concatenate([np.zeros((len(self.compounds), 1)), np.cumsum(floored, axis=1)], axis=1)
+        self._stints = {}
+
+    def stint(self, compound):
+        """(vremena krugova, trošenje) jedne gume kao liste - brz pristup po krugu"""
+        if compound not in self._stints:
+            idx = self.index[compound]
+            self._stints[compound] = (self.lap_time[idx].tolist(), self.wear[idx].tolist())
+        return self._stints[compound]
+
+    def score_plan(self, plan, pit_loss=0.0, stint_lap=0):
+        """
+        Očekivano vrijeme plana [(guma, krugova), ...]; prvi stint nastavlja
+        trenutnu gumu od stint_lap, svaki sljedeći je pit stop (+ pit_loss).
+        """
+        return float(self.score_plans([plan], pit_loss, stint_lap)[0])
+
+    def score_plans(self, plans, pit_loss=0.0, stint_lap=0):
+        """
+        Očekivana vremena niza planova kao polje (manje = bolje).
+        Planovi se poravnaju u polja (planovi, stintovi) i zbrajaju jednim
+        indeksiranjem stint_time; stint koji izlazi iz tablice je ValueError.
+        """
+        if not 0 <= stint_lap <= self.num_laps:
+            raise ValueError(f"stint_lap {stint_lap} izvan tablice od {self.num_laps} krugova")
+        max_stints = max((len(plan) for plan in plans), default=0)
+        compound_idx = np.zeros((len(plans), max_stints), dtype=int)
+        laps = np.zeros((len(plans), max_stints), dtype=int)
+        for plan_idx, plan in enumerate(plans):
+            for stint_idx, (compound, stint_laps) in enumerate(plan):
+                if compound not in self.index:
+                    raise ValueError(f"Nepoznata guma u planu: {compound}")
+                compound_idx[plan_idx, stint_idx] = self.index[compound]
+                laps[plan_idx, stint_idx] = stint_laps
+
+        start = np.zeros_like(laps)
+        start[:, :1] = stint_lap
+        end = start + laps
+        if np.any(laps < 0):
+            raise ValueError("Broj krugova stinta ne može biti negativan")
+        if np.any(end > self.num_laps):
+            raise ValueError(f"Plan ne stane u tablicu od {self.num_laps} krugova (stint_lap {stint_lap})")
+
+        stint_totals = self.stint_time[compound_idx, end] - self.stint_time[compound_idx, start]
+        # Pit stop prije svakog nepraznog stinta osim prvog
+        pits = (laps[:, 1:] > 0).sum(axis=1)
+        return stint_totals.sum(axis=1) + pits * pit_loss
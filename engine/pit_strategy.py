@@ -0,0 +1,76 @@
+"""
+Pit strategija - brza what-if procjena ostatka utrke
+Za svaku opciju (ostani vani, pit na svaku gumu prije sljedećeg kruga)
+ostatak utrke se odvozi PIT_ROLLOUTS puta odjednom: očekivana vremena
+krugova iz lookup tablica vozača + šum konzistentnosti, polje oblika
+(rolloutovi, opcije, krugovi). Stotine rolloutova traju djelić
+milisekunde, pa tim odgovara unutar obrade jedne telemetrijske poruke.
+"""
+
+import time
+
+import numpy as np
+
+
+class PitEvaluation:
+    """Rezultat what-if procjene - opcija 0 je ostanak vani"""
+
+    def __init__(self, options, mean_time, p05_time, p95_time, p_beats_stay, elapsed):
+        self.options = options            # [(pit, guma)]
+        self.mean_time = mean_time        # (opcije,) prosječno vrijeme ostatka utrke
+        self.p05_time = p05_time
+        self.p95_time = p95_time
+        self.p_beats_stay = p_beats_stay  # (opcije,) udio rolloutova bržih od ostanka vani
+        self.elapsed = elapsed            # sekunde procjene
+
+    def best(self, confidence):
+        """Najbrža pit opcija koja pobjeđuje ostanak vani s vjerojatnošću >= confidence"""
+        best_idx = 0
+        for idx in range(1, len(self.options)):
+            if self.p_beats_stay[idx] >= confidence and self.mean_time[idx] < self.mean_time[best_idx]:
+                best_idx = idx
+        return best_idx
+
+
+class PitStrategy:
+    """What-if procjena pit stopova jednog vozača nad njegovim RiderLapTables"""
+
+    def __init__(self, tables, noise_scale, config, rng=None):
+        self.tables = tables
+        self.noise_scale = noise_scale
+        self.config = config
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def options(self, compound):
+        return [(False, compound)] + [(True, name) for name in self.tables.compounds]
+
+    def expected_laps(self, compound, stint_lap, laps_remaining):
+        """(opcije, krugovi) očekivana vremena preostalih krugova bez šuma"""
+        rows = []
+        for pit, option_compound in self.options(compound):
+            row = self.tables.lap_time[self.tables.index[option_compound]]
+            start = 0 if pit else stint_lap
+            rows.append(row[start:start + laps_remaining])
+        return np.stack(rows)
+
+    def evaluate(self, compound, stint_lap, laps_remaining, rollouts=None):
+        """Vektorizirani rolloutovi ostatka utrke za svaku opciju"""
+        started = time.perf_counter()
+        rollouts = rollouts or self.config.PIT_ROLLOUTS
+        options = self.options(compound)
+
+        expected = self.expected_laps(compound, stint_lap, laps_remaining)
+        noise = self.rng.standard_normal((rollouts,) + expected.shape) * self.noise_scale
+        # Isti model kao calculate_lap_time (min 80s po krugu) + gubitak u pit laneu
+        totals = np.maximum(expected + noise, 80.0).sum(axis=2)
+        totals += np.array([self.config.PIT_STOP_LOSS if pit else 0.0 for pit, _ in options])
+
+        p05, p95 = np.percentile(totals, [5, 95], axis=0)
+        return PitEvaluation(
+            options=options,
+            mean_time=totals.mean(axis=0),
+            p05_time=p05,
+            p95_time=p95,
+            p_beats_stay=(totals < totals[:, :1]).mean(axis=0),
+            elapsed=time.perf_counter() - started
+        )
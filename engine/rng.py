@@ -0,0 +1,44 @@
+"""
+Seedani RNG streamovi
+Svaka utrka ima vlastiti SeedSequence, a svaki vozač vlastiti Generator
+izveden s SeedSequence.spawn. Label seeda ("entropy" ili "entropy/k1.k2")
+sprema se u rezultate i dovoljan je za bit-identičan replay utrke.
+"""
+
+import numpy as np
+
+
+def make_seed_sequence(seed=None):
+    """int, label, SeedSequence ili None (nova entropija iz OS-a)"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, str):
+        return parse_seed_label(seed)
+    return np.random.SeedSequence(seed)
+
+
+def seed_label(seed_sequence):
+    """Tekstualni zapis seeda za rezultate"""
+    label = str(seed_sequence.entropy)
+    if seed_sequence.spawn_key:
+        label += "/" + ".".join(str(k) for k in seed_sequence.spawn_key)
+    return label
+
+
+def parse_seed_label(label):
+    """Obrnuto od seed_label - svježi SeedSequence istog stanja"""
+    entropy, _, spawn_key = str(label).partition("/")
+    key = tuple(int(k) for k in spawn_key.split(".")) if spawn_key else ()
+    return np.random.SeedSequence(int(entropy), spawn_key=key)
+
+
+def rider_generators(race_seed, num_riders):
+    """Neovisni Generator po vozaču - uvijek iz svježeg SeedSequence-a utrke"""
+    race_seed = parse_seed_label(seed_label(make_seed_sequence(race_seed)))
+    return [np.random.default_rng(child) for child in race_seed.spawn(num_riders)]
+
+
+def team_generator(race_seed, team_id, num_riders):
+    """Generator tima (pit what-if rolloutovi) - spawn iza streamova vozača"""
+    race_seed = parse_seed_label(seed_label(make_seed_sequence(race_seed)))
+    return np.random.default_rng(race_seed.spawn(num_riders + team_id + 1)[-1])
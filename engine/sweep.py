@@ -0,0 +1,205 @@
+"""
+Monte Carlo sweep strategija guma
+Enumerira dodjele (tim × gume) i seedove, utrke vrti paralelno u
+ProcessPoolExecutor-u i agregira vjerojatnost pobjede i distribuciju
+vremena po gumama. Workeri vraćaju samo agregate, nikad pojedine krugove.
+"""
+
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from config.race_config import RaceConfig
+from engine.fast_engine import FastRaceEngine, require_no_pit_stops
+from engine.lookup_tables import RiderLapTables
+from engine.rng import make_seed_sequence
+
+HISTOGRAM_BINS = 400
+SPREAD_SIGMAS = 6.0  # rubovi histograma: očekivani raspon vremena ± 6σ šuma utrke
+
+
+def enumerate_assignments(num_teams, compounds=None):
+    """Sve kombinacije guma po timovima - (soft, soft, ...), (soft, medium, ...) ..."""
+    compounds = compounds or list(RaceConfig.TIRE_COMPOUNDS.keys())
+    return list(itertools.product(compounds, repeat=num_teams))
+
+
+def finish_time_bins(config, num_laps):
+    """
+    Rubovi histograma ukupnog vremena po gumi, oblik (gume, HISTOGRAM_BINS + 1).
+    Raspon je očekivano vrijeme najbržeg i najsporijeg vozača (krajevi SKILL_RANGE
+    i AGGRESSION_RANGE iz lookup tablica) ± SPREAD_SIGMAS σ šuma najmanje
+    konzistentnog vozača, pa je bin puno uži od σ ukupnog vremena.
+    """
+    fastest = RiderLapTables(config, aggression=config.AGGRESSION_RANGE[0],
+                             skill_level=config.SKILL_RANGE[1], num_laps=num_laps)
+    slowest = RiderLapTables(config, aggression=config.AGGRESSION_RANGE[1],
+                             skill_level=config.SKILL_RANGE[0], num_laps=num_laps)
+    noise = (1 - config.CONSISTENCY_RANGE[0]) * 2.0 * np.sqrt(num_laps) * SPREAD_SIGMAS
+    low = np.maximum(fastest.stint_time[:, num_laps] - noise, num_laps * 80.0)
+    high = slowest.stint_time[:, num_laps] + noise
+    return np.linspace(low, high, HISTOGRAM_BINS + 1, axis=1)
+
+
+def _run_chunk(task):
+    """Worker: simulira jedan blok utrka i vraća samo agregate"""
+    assignment_idx, assignment, seed, num_races, num_riders, num_laps, settings = task
+
+    # Postavke roditelja, ne modulski RaceConfig workera (spawn/forkserver ga ne nasljeđuju)
+    config = RaceConfig.scoped(**settings)
+    engine = FastRaceEngine(num_riders=num_riders, num_laps=num_laps, seed=seed, config=config)
+    tire_compounds = [assignment[rider_id // 2] for rider_id in range(num_riders)]
+    batch = engine.simulate(num_races, tire_compounds=tire_compounds)
+
+    compounds = engine.compound_names
+    rider_compound = np.array([compounds.index(c) for c in tire_compounds])
+    winners = batch.winners()
+    bins = finish_time_bins(config, num_laps)
+
+    num_compounds = len(compounds)
+    starts = np.bincount(rider_compound, minlength=num_compounds) * num_races
+    wins = np.bincount(rider_compound[winners], minlength=num_compounds)
+    team_wins = np.bincount(winners // 2, minlength=len(assignment))
+
+    time_sum = np.zeros(num_compounds)
+    time_sq_sum = np.zeros(num_compounds)
+    histogram = np.zeros((num_compounds, HISTOGRAM_BINS), dtype=np.int64)
+    for idx in np.unique(rider_compound):
+        times = batch.total_time[:, rider_compound == idx].ravel()
+        time_sum[idx] = times.sum()
+        time_sq_sum[idx] = np.square(times).sum()
+        histogram[idx] = np.histogram(np.clip(times, bins[idx, 0], bins[idx, -1]), bins=bins[idx])[0]
+
+    return {
+        'assignment_idx': assignment_idx,
+        'races': num_races,
+        'starts': starts,
+        'wins': wins,
+        'team_wins': team_wins,
+        'time_sum': time_sum,
+        'time_sq_sum': time_sq_sum,
+        'histogram': histogram
+    }
+
+
+class SweepResult:
+    """Agregirani rezultati sweepa - pune se inkrementalno kako stižu blokovi"""
+
+    def __init__(self, assignments, compounds, num_laps, config=None):
+        self.assignments = assignments
+        self.compounds = compounds
+        self.bins = finish_time_bins(config or RaceConfig, num_laps)  # (gume, rubovi)
+
+        num_compounds = len(compounds)
+        num_teams = len(assignments[0]) if assignments else 0
+        self.races = 0
+        self.starts = np.zeros(num_compounds, dtype=np.int64)
+        self.wins = np.zeros(num_compounds, dtype=np.int64)
+        self.time_sum = np.zeros(num_compounds)
+        self.time_sq_sum = np.zeros(num_compounds)
+        self.histogram = np.zeros((num_compounds, HISTOGRAM_BINS), dtype=np.int64)
+        self.assignment_races = np.zeros(len(assignments), dtype=np.int64)
+        self.assignment_team_wins = np.zeros((len(assignments), num_teams), dtype=np.int64)
+
+    def merge(self, chunk):
+        """Dodaj rezultat jednog workera"""
+        self.races += chunk['races']
+        self.starts += chunk['starts']
+        self.wins += chunk['wins']
+        self.time_sum += chunk['time_sum']
+        self.time_sq_sum += chunk['time_sq_sum']
+        self.histogram += chunk['histogram']
+        self.assignment_races[chunk['assignment_idx']] += chunk['races']
+        self.assignment_team_wins[chunk['assignment_idx']] += chunk['team_wins']
+
+    def _quantiles(self, idx, qs):
+        counts = self.histogram[idx]
+        if counts.sum() == 0:
+            return [np.nan] * len(qs)
+        # Linearna interpolacija unutar bina (CDF po rubovima)
+        cdf = np.concatenate([[0.0], np.cumsum(counts) / counts.sum()])
+        return [float(np.interp(q, cdf, self.bins[idx])) for q in qs]
+
+    def compound_summary(self):
+        """Vjerojatnost pobjede i distribucija ukupnog vremena po gumama"""
+        import pandas as pd
+        rows = []
+        for idx, compound in enumerate(self.compounds):
+            starts = self.starts[idx]
+            mean = self.time_sum[idx] / starts if starts else np.nan
+            var = self.time_sq_sum[idx] / starts - mean ** 2 if starts else np.nan
+            p05, p50, p95 = self._quantiles(idx, (0.05, 0.5, 0.95))
+            rows.append({
+                'tire_compound': compound,
+                'starts': int(starts),
+                'wins': int(self.wins[idx]),
+                'win_probability': self.wins[idx] / self.races if self.races else np.nan,
+                'win_rate_per_start': self.wins[idx] / starts if starts else np.nan,
+                'mean_time': mean,
+                'std_time': float(np.sqrt(max(var, 0.0))) if starts else np.nan,
+                'p05_time': p05,
+                'p50_time': p50,
+                'p95_time': p95
+            })
+        return pd.DataFrame(rows)
+
+    def assignment_summary(self):
+        """Vjerojatnost pobjede svakog tima za svaku dodjelu guma"""
+        import pandas as pd
+        rows = []
+        for idx, assignment in enumerate(self.assignments):
+            races = self.assignment_races[idx]
+            row = {'assignment': '/'.join(assignment), 'races': int(races)}
+            for team_id, team_wins in enumerate(self.assignment_team_wins[idx]):
+                row[f'team_{team_id}_win_probability'] = team_wins / races if races else np.nan
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def run_sweep(races_per_assignment=1000, assignments=None, seed=None,
+              chunk_size=500, max_workers=None, num_riders=None, num_laps=None, config=None):
+    """
+    Pokreće sweep preko svih dodjela guma.
+    Blokovi se šalju workerima u ograničenom prozoru i odmah agregiraju,
+    pa memorija ne raste s brojem utrka. Svaki blok nosi snapshot postavki
+    (config.settings()), pa workeri simuliraju isti model neovisno o start
+    metodi procesa.
+    """
+    config = config or RaceConfig
+    require_no_pit_stops(config)  # prije pokretanja workera
+    settings = config.settings()
+    num_riders = num_riders or config.NUM_RIDERS
+    num_laps = num_laps or config.NUM_LAPS
+    num_teams = (num_riders + 1) // 2
+    assignments = assignments or enumerate_assignments(num_teams, list(config.TIRE_COMPOUNDS.keys()))
+    max_workers = max_workers or os.cpu_count() or 1
+
+    tasks = []
+    for assignment_idx, assignment in enumerate(assignments):
+        remaining = races_per_assignment
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            tasks.append((assignment_idx, tuple(assignment), size))
+            remaining -= size
+
+    seeds = make_seed_sequence(seed).spawn(len(tasks))
+    result = SweepResult(assignments, list(config.TIRE_COMPOUNDS.keys()), num_laps, config)
+
+    task_iter = iter(zip(tasks, seeds))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for (assignment_idx, assignment, size), chunk_seed in task_iter:
+            pending.add(executor.submit(
+                _run_chunk,
+                (assignment_idx, assignment, chunk_seed, size, num_riders, num_laps, settings)))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result.merge(future.result())
+
+        for future in pending:
+            result.merge(future.result())
+
+    return result
@@ -7,24 +7,35 @@ import asyncio
 import sys
 import os
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from agents.rider_agent import RiderAgent
 from agents.team_agent import TeamAgent
 from agents.coordinator_agent import CoordinatorAgent
+from agents.shard_coordinator import ShardCoordinatorAgent
 from config.race_config import RaceConfig
+from config.race_context import RaceContext
+from messaging.local_bus import LocalBus
+from engine.rng import make_seed_sequence
+from analysis.plots import PLOT_FORMATS, PlotRenderer
 
 
 class MotoGPSimulation:
     """Glavna klasa za upravljanje simulacijom"""
 
-    def __init__(self):
+    def __init__(self, context=None, renderer=None):
+        # Bez zadanog konteksta svaki run dobiva svjež RaceContext (trenutni RaceConfig)
+        self.fixed_context = context
+        self.context = context
         self.riders = []
         self.teams = []
         self.coordinator = None
+        self.shards = []
+        self.seed = None
         self.is_running = False
         self.current_timestamp = None  # Za konzistentno imenovanje
+        # Grafovi u pozadinskom procesu - može se dijeliti između simulacija
+        self.renderer = renderer or PlotRenderer()
+        self.plot_future = None
 
     async def setup_agents(self):
         """Kreiranje i pokretanje svih agenata"""
@@ -32,52 +43,62 @@ class MotoGPSimulation:
         print("🔧 SETUP AGENATA")
         print("="*60)
 
-        # 1. Koordinator
+        # Kontekst utrke - konfiguracija, transport, virtualni sat i seed
+        self.riders = []
+        self.teams = []
+        self.shards = []
+        context = self.context = self.fixed_context or RaceContext()
+        config = context.config
+        self.seed = context.seed
+        rider_rngs = context.rider_rngs()
+        if context.profiler:
+            context.profiler.start()
+
+        # 1. Koordinator - mora primati lap update prije nego vozači krenu
         print("\n1️⃣  Pokrećem Coordinator agenta...")
-        coordinator_jid = f"coordinator@{RaceConfig.XMPP_SERVER}"
-        self.coordinator = CoordinatorAgent(coordinator_jid, RaceConfig.XMPP_PASSWORD)
+        coordinator_jid = context.jid("coordinator")
+        self.coordinator = CoordinatorAgent(coordinator_jid, config.XMPP_PASSWORD, context=context)
         await self.coordinator.start()
-        print(f"   ✓ {coordinator_jid}")
-        await asyncio.sleep(1)
-
-        # 2. Rider agenti PRVO
-        print("\n2️⃣  Pokrećem Rider agente...")
-        for i in range(RaceConfig.NUM_RIDERS):
-            rider_jid = f"rider_{i}@{RaceConfig.XMPP_SERVER}"
-            rider = RiderAgent(rider_jid, RaceConfig.XMPP_PASSWORD, i)
-            await rider.start()
-            self.riders.append(rider)
-            print(f"   ✓ {rider_jid}")
-            await asyncio.sleep(0.5)
-
-        print("\n⏳ Čekam registraciju svih vozača na XMPP serveru...")
-        await asyncio.sleep(3)
-
-        # 3. Team agenti
-        print("\n3️⃣  Pokrećem Team agente...")
-        num_teams = (RaceConfig.NUM_RIDERS + 1) // 2
+        print(f"   ✓ {coordinator_jid} (seed: {self.seed})")
+
+        # Shard koordinatori - primaju lap update svojih vozača, root spaja poredak
+        if config.NUM_SHARDS > 1:
+            self.shards = [ShardCoordinatorAgent(context.jid(f"shard_{i}"), config.XMPP_PASSWORD, i,
+                                                 context=context)
+                           for i in range(config.NUM_SHARDS)]
+            await asyncio.gather(*(shard.start() for shard in self.shards))
+            print(f"   ✓ {len(self.shards)} shard koordinatora")
+
+        # 2. Rider i Team agenti - paralelno, redoslijed osigurava readiness handshake
+        print("\n2️⃣  Pokrećem Rider i Team agente...")
+        for i in range(config.NUM_RIDERS):
+            self.riders.append(RiderAgent(context.jid(f"rider_{i}"), config.XMPP_PASSWORD, i,
+                                          context=context, rng=rider_rngs[i]))
+
+        num_teams = (config.NUM_RIDERS + 1) // 2
         for i in range(num_teams):
-            team_jid = f"team_{i}@{RaceConfig.XMPP_SERVER}"
-            team = TeamAgent(team_jid, RaceConfig.XMPP_PASSWORD, i)
-            await team.start()
-            self.teams.append(team)
-            print(f"   ✓ {team_jid}")
-            await asyncio.sleep(0.3)
+            self.teams.append(TeamAgent(context.jid(f"team_{i}"), config.XMPP_PASSWORD, i,
+                                        context=context))
+
+        await asyncio.gather(*(agent.start() for agent in self.riders + self.teams))
+        for agent in self.riders + self.teams:
+            print(f"   ✓ {agent.jid}")
 
         print(f"\n✅ Pokrenut {len(self.riders)} vozača, {len(self.teams)} timova i koordinator")
         print("="*60)
 
         self.is_running = True
-        print("\n⏳ Sinkronizacija svih agenata...")
-        await asyncio.sleep(3)
 
     async def run_race(self):
         """Pokretanje utrke"""
         print("\n" + "="*60)
         print("🏁 UTRKA ZAPOČINJE! 🏁")
         print("="*60)
-        print(f"\nBroj krugova: {RaceConfig.NUM_LAPS}")
-        print(f"Broj vozača: {RaceConfig.NUM_RIDERS}\n")
+        print(f"\nBroj krugova: {self.context.config.NUM_LAPS}")
+        print(f"Broj vozača: {self.context.config.NUM_RIDERS}")
+        if self.shards:
+            print(f"Shard koordinatori: {len(self.shards)}")
+        print()
 
         await self.coordinator.wait_for_completion()
 
@@ -87,17 +108,34 @@ class MotoGPSimulation:
 
     async def show_results(self):
         """Prikaz rezultata"""
+        # Lap update i round-tripovi su na shardovima - jedan sažetak za cijelu utrku
+        for shard in self.shards:
+            self.coordinator.metrics.merge(shard.metrics)
         self.coordinator.print_results_summary()
+        self.coordinator.metrics.print_summary()
+        if self.context.profiler:
+            self.context.profiler.stop()
+            self.context.profiler.report()
 
     async def save_results(self):
         """Spremanje rezultata u CSV (s timestampom)"""
         timestamp = self.coordinator.save_results()
         self.current_timestamp = timestamp  # Spremi za korištenje u grafovima
         print(f"\n✅ CSV rezultati spremljeni u results/ (timestamp: {timestamp})")
+        if self.context.profiler:
+            for path in self.context.profiler.save(timestamp):
+                print(f"   🔬 {path}")
         return timestamp
 
     async def analyze_results(self):
-        """Vizualna analiza rezultata - s timestampom"""
+        """
+        Vizualna analiza rezultata - s timestampom.
+        Graf se samo šalje PlotRendereru; crta se dok ide sljedeća utrka.
+        """
+        config = self.context.config
+        if config.PLOT_FORMAT == "none":
+            return None
+
         print("\n" + "="*60)
         print("📊 GENERIRANJE GRAFOVA")
         print("="*60)
@@ -108,63 +146,24 @@ class MotoGPSimulation:
             print("❌ Nema podataka!")
             return
 
-        # Postavljanje stila
-        sns.set_style("whitegrid")
-        plt.rcParams['figure.facecolor'] = 'white'
-
-        # Kreiranje figura
-        fig = plt.figure(figsize=(14, 10))
-        fig.suptitle('MotoGP Race Analysis', fontsize=16, fontweight='bold', y=0.995)
-
-        # 1. Tire strategy comparison - FIX za warning
-        plt.subplot(2, 2, 1)
-        sns.boxplot(data=df, x='tire_compound', y='total_time', 
-                   hue='tire_compound', palette='Set2', legend=False)
-        plt.title('Total Race Time by Tire', fontsize=12, fontweight='bold')
-        plt.xlabel('Tire Compound', fontsize=10)
-        plt.ylabel('Total Time (s)', fontsize=10)
-        plt.grid(axis='y', alpha=0.3)
-
-        # 2. Aggression vs Overtakes
-        plt.subplot(2, 2, 2)
-        sns.scatterplot(data=df, x='aggression', y='overtakes', 
-                       hue='tire_compound', s=150, alpha=0.7, palette='Set2')
-        plt.title('Aggression vs Overtakes', fontsize=12, fontweight='bold')
-        plt.xlabel('Aggression Level', fontsize=10)
-        plt.ylabel('Number of Overtakes', fontsize=10)
-        plt.legend(title='Tire', fontsize=8)
-        plt.grid(alpha=0.3)
-
-        # 3. Skill vs Performance
-        plt.subplot(2, 2, 3)
-        sns.scatterplot(data=df, x='skill_level', y='total_time', 
-                       hue='final_position', palette='viridis', s=150, alpha=0.7)
-        plt.title('Skill vs Performance', fontsize=12, fontweight='bold')
-        plt.xlabel('Skill Level', fontsize=10)
-        plt.ylabel('Total Time (s)', fontsize=10)
-        plt.legend(title='Position', fontsize=8)
-        plt.grid(alpha=0.3)
-
-        # 4. Correlation matrix
-        plt.subplot(2, 2, 4)
-        corr = df[['skill_level', 'aggression', 'consistency', 'total_time', 'overtakes']].corr()
-        sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', 
-                   center=0, cbar_kws={'label': 'Correlation'}, 
-                   square=True, linewidths=0.5)
-        plt.title('Correlation Matrix', fontsize=12, fontweight='bold')
-
-        plt.tight_layout()
-
         # Spremanje - S TIMESTAMPOM (konzistentno s CSV fileovima)
         if not self.current_timestamp:
             self.current_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        output_file = f'results/analysis_{self.current_timestamp}.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"✅ Grafovi spremljeni: {output_file}")
-
-        plt.close()
+        output_base = os.path.join(config.RESULTS_DIR, f'analysis_{self.current_timestamp}')
+        self.plot_future = self.renderer.submit(df, output_base, config.PLOT_FORMAT, config.PLOT_DPI)
+        self.plot_future.add_done_callback(self._plot_done)
+        print(f"⏳ Grafovi ({config.PLOT_FORMAT}) se generiraju u pozadini: {output_base}.{config.PLOT_FORMAT}")
         print("="*60)
+        return self.plot_future
+
+    def _plot_done(self, future):
+        if future.cancelled():
+            return
+        if future.exception():
+            print(f"❌ Greška pri crtanju grafova: {future.exception()}")
+        else:
+            print(f"✅ Grafovi spremljeni: {future.result()}")
 
     async def shutdown(self):
         """Gašenje svih agenata"""
@@ -180,14 +179,24 @@ class MotoGPSimulation:
             await team.stop()
             print(f"  ✓ {team.jid} ugašen")
 
+        for shard in self.shards:
+            await shard.stop()
+        if self.shards:
+            print(f"  ✓ {len(self.shards)} shard koordinatora ugašeno")
+
         if self.coordinator:
+            self.coordinator.live_timing.close()
+            self.coordinator.metrics.close()
             await self.coordinator.stop()
             print(f"  ✓ {self.coordinator.jid} ugašen")
 
+        if self.context and self.context.profiler:
+            self.context.profiler.stop()
+
         print("\n✅ Svi agenti uspješno ugašeni")
         self.is_running = False
 
-    async def run_full_simulation(self):
+    async def run_full_simulation(self, analyze=True):
         """Puna simulacija - setup, race, results, save, grafovi"""
         # Resetuj timestamp za novu simulaciju
         self.current_timestamp = None
@@ -197,11 +206,37 @@ class MotoGPSimulation:
             await self.run_race()
             await self.show_results()
             await self.save_results()
-            await self.analyze_results()
+            if analyze:
+                await self.analyze_results()
         finally:
             await self.shutdown()
 
 
+async def run_parallel_races(count, analyze=False, renderer=None):
+    """
+    Više utrka u istom event loopu. Svaka ima vlastiti RaceContext
+    (kopija konfiguracije, JID namespace raceN_, seed); local transport
+    dijeli jedan LocalBus, a grafovi jedan PlotRenderer.
+    """
+    renderer = renderer or PlotRenderer()
+    seeds = make_seed_sequence(RaceConfig.RANDOM_SEED).spawn(count)
+    shared_bus = LocalBus() if RaceConfig.TRANSPORT == "local" else None
+
+    simulations = []
+    for i in range(count):
+        overrides = {}
+        if RaceConfig.LIVE_TIMING_PORT:
+            # Svaka utrka na svom portu
+            overrides['LIVE_TIMING_PORT'] = RaceConfig.LIVE_TIMING_PORT + i
+        if RaceConfig.METRICS_PORT:
+            overrides['METRICS_PORT'] = RaceConfig.METRICS_PORT + i
+        context = RaceContext(race_id=f"race{i}", bus=shared_bus, seed=seeds[i], **overrides)
+        simulations.append(MotoGPSimulation(context, renderer=renderer))
+
+    await asyncio.gather(*(sim.run_full_simulation(analyze=analyze) for sim in simulations))
+    return simulations
+
+
 def print_banner():
     """ASCII banner"""
     print("""
@@ -220,7 +255,9 @@ def print_menu():
     print("="*60)
     print("1. 🏁 Pokreni punu simulaciju")
     print("2. ⚙️  Postavke simulacije")
-    print("3. 🛑 Izlaz")
+    print("3. 🎲 Monte Carlo sweep strategija guma")
+    print("4. 🏎️  Paralelne utrke (jedan event loop)")
+    print("5. 🛑 Izlaz")
     print("="*60)
 
 
@@ -229,11 +266,16 @@ def print_settings():
     print("\n" + "="*60)
     print("⚙️  TRENUTNE POSTAVKE")
     print("="*60)
+    print(f"Transport: {RaceConfig.TRANSPORT}")
     print(f"XMPP Server: {RaceConfig.XMPP_SERVER}")
     print(f"Broj vozača: {RaceConfig.NUM_RIDERS}")
+    print(f"Shard koordinatori: {RaceConfig.NUM_SHARDS}")
     print(f"Broj krugova: {RaceConfig.NUM_LAPS}")
     print(f"Bazno vrijeme kruga: {RaceConfig.LAP_BASE_TIME}s")
     print(f"Telemetrija interval: Svakih {RaceConfig.TELEMETRY_INTERVAL} krugova")
+    print(f"Pit stopovi: {'da' if RaceConfig.PIT_STOPS else 'ne'} (gubitak {RaceConfig.PIT_STOP_LOSS}s)")
+    print(f"Spremanje rezultata: {RaceConfig.RESULT_SINK}")
+    print(f"Grafovi: {RaceConfig.PLOT_FORMAT}")
     print("\nTire Compounds:")
     for name, props in RaceConfig.TIRE_COMPOUNDS.items():
         print(f"  • {name.upper()}: Speed {props['base_speed']:.2f}x, "
@@ -249,18 +291,24 @@ def change_settings():
     print("1. Broj vozača")
     print("2. Broj krugova")
     print("3. XMPP Server")
+    print("4. Transport (xmpp/local)")
+    print("5. Grafovi (png/svg/json/none)")
+    print("6. Shard koordinatori")
+    print("7. Pit stopovi (da/ne)")
     print("0. Natrag")
 
     choice = input("\nOdabir: ").strip()
 
     if choice == "1":
         try:
-            num = int(input("Novi broj vozača (4-20): "))
-            if 4 <= num <= 20:
+            num = int(input("Novi broj vozača (4-1000): "))
+            if 4 <= num <= 1000:
                 RaceConfig.NUM_RIDERS = num
                 print(f"✓ Postavljeno na {num} vozača")
+                if num > 50 and RaceConfig.NUM_SHARDS == 1:
+                    print("💡 Za veliki grid uključi shard koordinatore (opcija 6)")
             else:
-                print("❌ Broj mora biti između 4 i 20")
+                print("❌ Broj mora biti između 4 i 1000")
         except ValueError:
             print("❌ Nevažeći unos")
 
@@ -281,15 +329,84 @@ def change_settings():
             RaceConfig.XMPP_SERVER = server
             print(f"✓ Postavljeno na {server}")
 
+    elif choice == "4":
+        transport = input("Transport (xmpp/local): ").strip().lower()
+        if transport in ("xmpp", "local"):
+            RaceConfig.TRANSPORT = transport
+            print(f"✓ Postavljeno na {transport}")
+        else:
+            print("❌ Transport mora biti xmpp ili local")
+
+    elif choice == "5":
+        plot_format = input("Format grafova (png/svg/json/none): ").strip().lower()
+        if plot_format in PLOT_FORMATS:
+            RaceConfig.PLOT_FORMAT = plot_format
+            print(f"✓ Postavljeno na {plot_format}")
+        else:
+            print("❌ Format mora biti png, svg, json ili none")
+
+    elif choice == "6":
+        try:
+            num = int(input("Broj shard koordinatora (1 = bez shardova): "))
+            if num >= 1:
+                RaceConfig.NUM_SHARDS = num
+                if num > 1:
+                    RaceConfig.BATCH_LAP_UPDATES = False  # shardovi koriste position_update
+                print(f"✓ Postavljeno na {num}")
+            else:
+                print("❌ Broj mora biti barem 1")
+        except ValueError:
+            print("❌ Nevažeći unos")
+
+    elif choice == "7":
+        answer = input("Pit stopovi (da/ne): ").strip().lower()
+        if answer in ("da", "ne"):
+            RaceConfig.PIT_STOPS = answer == "da"
+            print(f"✓ Pit stopovi: {answer}")
+        else:
+            print("❌ Odgovor mora biti da ili ne")
+
+
+def run_tire_sweep():
+    """Monte Carlo sweep svih dodjela guma po timovima (bez XMPP-a)"""
+    print("\n" + "="*60)
+    print("🎲 MONTE CARLO SWEEP")
+    print("="*60)
+
+    try:
+        races = int(input("Broj utrka po dodjeli guma (default 1000): ").strip() or 1000)
+    except ValueError:
+        print("❌ Nevažeći unos")
+        return
+
+    from engine.sweep import run_sweep
+    try:
+        result = run_sweep(races_per_assignment=races)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    print(f"\n✓ Simulirano {result.races} utrka")
+
+    print("\n📈 TIRE STRATEGY PERFORMANCE:")
+    print(result.compound_summary().to_string(index=False, float_format='%.3f'))
+
+    print("\n🏆 NAJBOLJE DODJELE (po timu 0):")
+    summary = result.assignment_summary()
+    print(summary.sort_values('team_0_win_probability', ascending=False)
+          .head(5).to_string(index=False, float_format='%.3f'))
+    print("="*60)
+
 
 async def main():
     """Glavna funkcija"""
     print_banner()
 
-    print("\n⚠️  VAŽNO: Prije pokretanja simulacije, pokreni SPADE XMPP server!")
-    print("U drugom terminalu pokreni: spade run")
-    print("\nPritisni Enter kada je server pokrenut...")
-    input()
+    if RaceConfig.TRANSPORT == "xmpp":
+        print("\n⚠️  VAŽNO: Prije pokretanja simulacije, pokreni SPADE XMPP server!")
+        print("U drugom terminalu pokreni: spade run")
+        print("(ili u postavkama odaberi transport 'local' - bez servera)")
+        print("\nPritisni Enter kada je server pokrenut...")
+        input()
 
     simulation = MotoGPSimulation()
 
@@ -308,7 +425,9 @@ async def main():
                 print("\n📂 Spremljeni fileovi:")
                 print(f"   • results/race_results_{simulation.current_timestamp}.csv")
                 print(f"   • results/lap_data_{simulation.current_timestamp}.csv")
-                print(f"   • results/analysis_{simulation.current_timestamp}.png")
+                plot_format = simulation.context.config.PLOT_FORMAT
+                if plot_format != "none":
+                    print(f"   • results/analysis_{simulation.current_timestamp}.{plot_format} (u pozadini)")
 
         elif choice == "2":
             # POSTAVKE
@@ -316,11 +435,33 @@ async def main():
             change_settings()
 
         elif choice == "3":
+            # SWEEP
+            run_tire_sweep()
+
+        elif choice == "4":
+            # PARALELNE UTRKE
+            try:
+                count = int(input("Broj utrka (default 4): ").strip() or 4)
+            except ValueError:
+                print("❌ Nevažeći unos")
+                continue
+            simulations = await run_parallel_races(count, analyze=True,
+                                                   renderer=simulation.renderer)
+            print(f"\n✅ Završeno {len(simulations)} utrka")
+            for sim in simulations:
+                print(f"   • {sim.context.race_id}: seed {sim.seed}, "
+                      f"results/race_results_{sim.current_timestamp}.csv")
+
+        elif choice == "5":
             # IZLAZ
             if simulation.is_running:
                 confirm = input("\n⚠️  Agenti su još pokrenuti. Ugasiti? (da/ne): ").strip().lower()
                 if confirm == "da":
                     await simulation.shutdown()
+            if simulation.renderer.pending:
+                print("\n⏳ Čekam grafove koji se još generiraju...")
+                await simulation.renderer.wait()
+            simulation.renderer.close()
             print("\n👋 Doviđenja!")
             break
 
@@ -0,0 +1 @@
+"""Messaging package - transporti i formati poruka između agenata"""
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Kompaktni format tijela poruka
+Česte poruke (lap_update, position_update, telemetry, standings, results,
+shard_update, leaderboard)
+imaju fiksnu shemu po ontologiji, pa se umjesto JSON-a s ponovljenim
+ključevima pakiraju structom i šalju kao base64 (tijelo XMPP stanze je tekst).
+Naziv sheme s verzijom ide u metapodatak "codec" (npr. lap_update/v1);
+poruka bez njega je JSON. Payload koji ne odgovara shemi (drugi ključevi,
+ontologija bez sheme, RaceConfig.MESSAGE_CODEC = "json") ide kao JSON.
+"""
+
+import base64
+import json
+import struct
+
+import numpy as np
+
+from storage.lap_store import ENCODING as LAP_STORE_ENCODING, LAP_DTYPE, LEGACY_LAP_DTYPE, upgrade_laps
+
+MESSAGE_CODECS = ("compact", "json")
+
+# Jedan krug vozača u shard_update / leaderboard porukama
+UPDATE_DTYPE = np.dtype([('rider_id', '<i4'), ('lap', '<i4'), ('total_time', '<f8'), ('tire_wear', '<f8')])
+
+
+class StructSchema:
+    """Fiksna polja jedne ontologije (+ opcionalni rep varijabilne duljine)"""
+
+    def __init__(self, name, fields, constants=None, tail=None, fits=None):
+        self.name = name                    # ontology/vN - ide u metapodatak codec
+        self.keys = tuple(key for key, _ in fields)
+        self.packer = struct.Struct("<" + "".join(fmt for _, fmt in fields))
+        self.text_fields = tuple(idx for idx, (_, fmt) in enumerate(fields) if fmt.endswith('s'))
+        self.constants = constants or {}    # polja koja se ne šalju (npr. type)
+        self.tail = tail                    # (key, encode, decode) za bajtove iza fiksnog dijela
+        self.fits = fits                    # dodatna provjera payloada
+        self.all_keys = frozenset(self.keys) | frozenset(self.constants) | \
+            (frozenset([tail[0]]) if tail else frozenset())
+
+    def matches(self, payload):
+        return payload.keys() == self.all_keys and \
+            all(payload[key] == value for key, value in self.constants.items()) and \
+            (self.fits is None or self.fits(payload))
+
+    def pack(self, payload):
+        values = [payload[key] for key in self.keys]
+        for idx in self.text_fields:
+            values[idx] = values[idx].encode('utf-8')
+        data = self.packer.pack(*values)
+        if self.tail:
+            data += self.tail[1](payload[self.tail[0]])
+        return data
+
+    def unpack(self, data):
+        # Redoslijed ključeva kao u JSON payloadu (stupci CSV-a rezultata)
+        payload = dict(self.constants)
+        payload.update(zip(self.keys, self.packer.unpack_from(data)))
+        for idx in self.text_fields:
+            key = self.keys[idx]
+            payload[key] = payload[key].rstrip(b'\0').decode('utf-8')
+        if self.tail:
+            payload[self.tail[0]] = self.tail[2](data[self.packer.size:])
+        return payload
+
+
+def _pack_standings(standings):
+    return np.asarray(standings, dtype='<i4').tobytes()
+
+
+def _unpack_standings(data):
+    return np.frombuffer(data, dtype='<i4').tolist()
+
+
+def _pack_updates(updates):
+    return np.array([tuple(update) for update in updates], dtype=UPDATE_DTYPE).tobytes()
+
+
+def _unpack_updates(data):
+    return np.frombuffer(data, dtype=UPDATE_DTYPE).tolist()
+
+
+def _pack_lap_data(lap_data):
+    """LapStore.encode() payload ili strukturirano polje → sirovi bajtovi"""
+    if isinstance(lap_data, np.ndarray):
+        return upgrade_laps(lap_data).astype(LAP_DTYPE, copy=False).tobytes()
+    return base64.b64decode(lap_data['data'])
+
+
+def _unpack_lap_data(data):
+    return np.frombuffer(data, dtype=LAP_DTYPE)
+
+
+def _unpack_legacy_lap_data(data):
+    """lap_store/v1 krugovi iz results/v1 i v2 (bez gume i stint kruga)"""
+    return upgrade_laps(np.frombuffer(data, dtype=LEGACY_LAP_DTYPE))
+
+
+def _compound_fits(payload):
+    """Naziv gume stane u 8 bajtova ('8s' polje)"""
+    compound = payload['tire_compound']
+    return isinstance(compound, str) and len(compound.encode('utf-8')) <= 8
+
+
+def _results_fit(payload):
+    """Guma stane u 8 bajtova, lap_data je LapStore payload ili polje"""
+    lap_data = payload['lap_data']
+    return _compound_fits(payload) and (
+        isinstance(lap_data, np.ndarray) or
+        (isinstance(lap_data, dict) and lap_data.get('encoding') == LAP_STORE_ENCODING))
+
+
+SCHEMAS = {
+    'lap_update': StructSchema(
+        'lap_update/v1',
+        [('rider_id', 'i'), ('lap', 'i'), ('total_time', 'd'), ('tire_wear', 'd')],
+        constants={'type': 'lap_update'}),
+    'position_update': StructSchema(
+        'position_update/v1',
+        [('position', 'i')]),
+    # v2: guma i krug na gumi za pit odluku tima (engine.pit_strategy)
+    'telemetry': StructSchema(
+        'telemetry/v2',
+        [('rider_id', 'i'), ('lap', 'i'), ('tire_wear', 'd'), ('position', 'i'), ('avg_lap_time', 'd'),
+         ('tire_compound', '8s'), ('stint_lap', 'i')],
+        constants={'type': 'telemetry'},
+        fits=_compound_fits),
+    'standings': StructSchema(
+        'standings/v1',
+        [('lap', 'i')],
+        tail=('standings', _pack_standings, _unpack_standings)),
+    # v2: bez overtakes - pretjecanja računa koordinator (agents.lap_stage)
+    # v3: + pit_stops; v4: lap_data s gumom i stint krugom (lap_store/v2)
+    'results': StructSchema(
+        'results/v4',
+        [('rider_id', 'i'), ('total_time', 'd'), ('final_position', 'i'), ('tire_compound', '8s'),
+         ('pit_stops', 'i'), ('avg_lap_time', 'd'), ('lap_time_std', 'd'), ('skill_level', 'd'),
+         ('aggression', 'd'), ('consistency', 'd'), ('tire_wear_final', 'd')],
+        constants={'type': 'race_results'},
+        tail=('lap_data', _pack_lap_data, _unpack_lap_data),
+        fits=_results_fit),
+    'shard_update': StructSchema(
+        'shard_update/v1',
+        [('shard', 'i')],
+        tail=('updates', _pack_updates, _unpack_updates)),
+    'leaderboard': StructSchema(
+        'leaderboard/v1',
+        [],
+        tail=('updates', _pack_updates, _unpack_updates)),
+}
+
+# Starije verzije se još dekodiraju (agenti različitih verzija u istoj utrci)
+LEGACY_SCHEMAS = [
+    StructSchema(
+        'telemetry/v1',
+        [('rider_id', 'i'), ('lap', 'i'), ('tire_wear', 'd'), ('position', 'i'), ('avg_lap_time', 'd')],
+        constants={'type': 'telemetry'}),
+    StructSchema(
+        'results/v1',
+        [('rider_id', 'i'), ('total_time', 'd'), ('final_position', 'i'), ('tire_compound', '8s'),
+         ('overtakes', 'i'), ('avg_lap_time', 'd'), ('lap_time_std', 'd'), ('skill_level', 'd'),
+         ('aggression', 'd'), ('consistency', 'd'), ('tire_wear_final', 'd')],
+        constants={'type': 'race_results'},
+        tail=('lap_data', _pack_lap_data, _unpack_legacy_lap_data)),
+    StructSchema(
+        'results/v2',
+        [('rider_id', 'i'), ('total_time', 'd'), ('final_position', 'i'), ('tire_compound', '8s'),
+         ('avg_lap_time', 'd'), ('lap_time_std', 'd'), ('skill_level', 'd'),
+         ('aggression', 'd'), ('consistency', 'd'), ('tire_wear_final', 'd')],
+        constants={'type': 'race_results'},
+        tail=('lap_data', _pack_lap_data, _unpack_legacy_lap_data)),
+    StructSchema(
+        'results/v3',
+        [('rider_id', 'i'), ('total_time', 'd'), ('final_position', 'i'), ('tire_compound', '8s'),
+         ('pit_stops', 'i'), ('avg_lap_time', 'd'), ('lap_time_std', 'd'), ('skill_level', 'd'),
+         ('aggression', 'd'), ('consistency', 'd'), ('tire_wear_final', 'd')],
+        constants={'type': 'race_results'},
+        tail=('lap_data', _pack_lap_data, _unpack_legacy_lap_data)),
+]
+
+SCHEMAS_BY_NAME = {schema.name: schema for schema in list(SCHEMAS.values()) + LEGACY_SCHEMAS}
+
+
+def encode(payload, ontology=None, codec="compact"):
+    """(tijelo, naziv sheme) - naziv je None kad je tijelo JSON"""
+    schema = SCHEMAS.get(ontology) if codec == "compact" else None
+    if schema is not None and schema.matches(payload):
+        try:
+            return base64.b64encode(schema.pack(payload)).decode('ascii'), schema.name
+        except (struct.error, TypeError, ValueError):
+            pass  # vrijednost izvan raspona ili krivog tipa - JSON
+    return json.dumps(payload), None
+
+
+def decode(body, codec_name=None):
+    """Dict iz tijela poruke; codec_name iz metapodatka codec (None = JSON)"""
+    if not codec_name:
+        return json.loads(body)
+    schema = SCHEMAS_BY_NAME.get(codec_name)
+    if schema is None:
+        raise ValueError(f"Nepoznat codec poruke: {codec_name}")
+    return schema.unpack(base64.b64decode(body))
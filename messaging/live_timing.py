@@ -0,0 +1,104 @@
+"""
+LiveTimingFeed - Live timing stream koordinatora
+Svaki kompletirani krug objavljuje se kao frame (poredak, gapovi, trošenje guma).
+Pretplatnici (async generator, lokalni socket, file tail) imaju vlastiti
+ograničeni ring buffer - spori potrošač gubi međuframeove, a memorija
+koordinatora ne raste.
+"""
+
+import asyncio
+import json
+from collections import deque
+
+from config.race_config import RaceConfig
+
+
+class _Subscriber:
+    """Ring buffer jednog potrošača"""
+
+    def __init__(self, size):
+        self.frames = deque(maxlen=size)
+        self.event = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.event.set()
+
+
+class LiveTimingFeed:
+    """Publish/subscribe live timing s ograničenim bufferima"""
+
+    def __init__(self, buffer_size=None):
+        self.buffer_size = buffer_size or RaceConfig.LIVE_TIMING_BUFFER
+        self.frames_published = 0
+        self.closed = False
+        self._subscribers = set()
+        self._server = None
+        self._tasks = []
+
+    @property
+    def dropped_frames(self):
+        return sum(sub.dropped for sub in self._subscribers)
+
+    def publish(self, frame):
+        """Objavi frame svim pretplatnicima - nikad ne blokira koordinatora"""
+        self.frames_published += 1
+        for sub in self._subscribers:
+            sub.push(frame)
+
+    async def subscribe(self, buffer_size=None):
+        """
+        Async generator frameova:
+            async for frame in feed.subscribe(): ...
+        Završava kad se feed zatvori i buffer isprazni.
+        """
+        sub = _Subscriber(buffer_size or self.buffer_size)
+        self._subscribers.add(sub)
+        try:
+            while True:
+                if sub.frames:
+                    yield sub.frames.popleft()
+                elif self.closed:
+                    return
+                else:
+                    sub.event.clear()
+                    await sub.event.wait()
+        finally:
+            self._subscribers.discard(sub)
+
+    async def serve_socket(self, port, host="127.0.0.1"):
+        """Lokalni TCP stream - jedan JSON frame po liniji"""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server
+
+    async def _handle_client(self, reader, writer):
+        try:
+            async for frame in self.subscribe():
+                writer.write((json.dumps(frame) + "\n").encode("utf-8"))
+                # Backpressure - dok klijent ne pokupi, ring buffer odbacuje stare frameove
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def start_file_tail(self, path):
+        """Dopisuj frameove u datoteku (JSON lines) - prati se s tail -f"""
+        async def tail():
+            with open(path, "a", encoding="utf-8") as f:
+                async for frame in self.subscribe():
+                    f.write(json.dumps(frame) + "\n")
+                    f.flush()
+
+        self._tasks.append(asyncio.create_task(tail()))
+
+    def close(self):
+        """Zatvori feed - pretplatnici isprazne buffer i završe"""
+        self.closed = True
+        for sub in self._subscribers:
+            sub.event.set()
+        if self._server is not None:
+            self._server.close()
@@ -0,0 +1,34 @@
+"""
+LocalBus - In-process transport kao zamjena za XMPP
+Agenti u istom procesu razmjenjuju spade.message.Message objekte direktno
+kroz asyncio redove svojih behaviours, bez XMPP servera i serijalizacije stanza.
+"""
+
+
+class LocalBus:
+    """Registar agenata jedne simulacije i dostava poruka u memoriji"""
+
+    def __init__(self):
+        self._agents = {}  # {jid: agent}
+        self.dropped = 0   # poruke za agente koji nisu na busu
+
+    def register(self, agent):
+        self._agents[str(agent.jid)] = agent
+
+    def unregister(self, jid):
+        self._agents.pop(str(jid), None)
+
+    def has_agent(self, jid):
+        return str(jid) in self._agents
+
+    async def send(self, msg, behaviour):
+        """
+        Isti potpis kao spade Container.send - poruka se predaje agentu
+        koji je onda po template-ima (ontology, performative...) dijeli behaviours.
+        """
+        agent = self._agents.get(str(msg.to))
+        if agent is None:
+            # Kao XMPP poruka offline korisniku - tiho se odbacuje
+            self.dropped += 1
+            return
+        agent.dispatch(msg)
@@ -0,0 +1,237 @@
+"""
+RaceMetrics - Latencija i protok poruka utrke
+Svaka poruka nosi metapodatke sent_at (time.time()) i seq (RaceAgent.build_message).
+Koordinator vodi histograme s fiksnim bucketima: round-trip lap_update →
+position_update/standings (vozač ga mjeri i šalje u metapodatku rtt),
+latenciju dostave po ontologiji i dubinu reda, te broj receive timeouta,
+poruka i bajtova tijela po ontologiji. Sažetak ide u rezultate, a tijekom utrke se može
+čitati s lokalnog HTTP endpointa (Prometheus tekst ili /json).
+"""
+
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# Gornje granice bucketa (le)
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100,
+                      250, 500, 1000, 2500, 5000, 10000)
+QUEUE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Histogram s fiksnim bucketima - O(log b) upis, konstantna memorija"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # zadnji = preko najveće granice
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Dodaj brojače drugog histograma s istim bucketima"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Gornja granica bucketa u kojem je q-ti kvantil"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return min(self.bounds[idx], self.max) if idx < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99)
+        }
+
+    def prometheus(self, name, labels=""):
+        """Linije u Prometheus text formatu (kumulativni bucketi)"""
+        prefix = labels + "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RaceMetrics:
+    """Metrike poruka koordinatora jedne utrke"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.round_trip = Histogram(LATENCY_BUCKETS_MS)  # lap_update → odgovor, ms
+        self.delivery = {}                               # {ontology: Histogram} sent_at → primitak, ms
+        self.queue_depth = Histogram(QUEUE_BUCKETS)      # poruke koje još čekaju nakon receive
+        self.received = Counter()
+        self.sent = Counter()
+        self.received_bytes = Counter()  # duljina tijela po ontologiji
+        self.receive_timeouts = 0        # receive koordinatora bez poruke
+        self.rider_receive_timeouts = 0  # prijavljeno od vozača u results poruci
+        self._server = None
+
+    def record_received(self, msg, queue_depth):
+        """Zabilježi primljenu poruku i metapodatke koje je pošiljatelj dodao"""
+        ontology = msg.get_metadata("ontology") or "unknown"
+        self.received[ontology] += 1
+        self.received_bytes[ontology] += len(msg.body or "")
+        self.queue_depth.record(queue_depth)
+
+        sent_at = msg.get_metadata("sent_at")
+        if sent_at:
+            if ontology not in self.delivery:
+                self.delivery[ontology] = Histogram(LATENCY_BUCKETS_MS)
+            self.delivery[ontology].record((time.time() - float(sent_at)) * 1000.0)
+
+        rtt = msg.get_metadata("rtt")
+        if rtt:
+            for value in rtt.split(","):
+                self.round_trip.record(float(value))
+
+        timeouts = msg.get_metadata("receive_timeouts")
+        if timeouts:
+            self.rider_receive_timeouts += int(timeouts)
+
+    def record_sent(self, msg):
+        self.sent[msg.get_metadata("ontology") or "unknown"] += 1
+
+    def record_timeout(self):
+        self.receive_timeouts += 1
+
+    def merge(self, other):
+        """Dodaj metrike drugog koordinatora (npr. sharda) u ove"""
+        self.round_trip.merge(other.round_trip)
+        self.queue_depth.merge(other.queue_depth)
+        for ontology, histogram in other.delivery.items():
+            self.delivery.setdefault(ontology, Histogram(LATENCY_BUCKETS_MS)).merge(histogram)
+        self.received.update(other.received)
+        self.sent.update(other.sent)
+        self.received_bytes.update(other.received_bytes)
+        self.receive_timeouts += other.receive_timeouts
+        self.rider_receive_timeouts += other.rider_receive_timeouts
+
+    def rates(self, counter):
+        """Poruke u sekundi po ontologiji od početka utrke"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {ontology: count / elapsed for ontology, count in counter.items()}
+
+    def summary(self):
+        return {
+            'elapsed_s': time.monotonic() - self.started,
+            'round_trip_ms': self.round_trip.summary(),
+            'delivery_ms': {o: h.summary() for o, h in sorted(self.delivery.items())},
+            'queue_depth': self.queue_depth.summary(),
+            'received': dict(self.received),
+            'sent': dict(self.sent),
+            'received_bytes': dict(self.received_bytes),
+            'received_per_s': self.rates(self.received),
+            'sent_per_s': self.rates(self.sent),
+            'receive_timeouts': self.receive_timeouts,
+            'rider_receive_timeouts': self.rider_receive_timeouts
+        }
+
+    def print_summary(self):
+        """Ispis sažetka na kraju utrke"""
+        def fmt(value):
+            return "-" if value is None else f"{value:.2f}"
+
+        print("\n" + "="*80)
+        print("📡 PORUKE I LATENCIJA")
+        print("="*80)
+        rt = self.round_trip.summary()
+        print(f"• Round-trip lap_update → pozicija: n={rt['count']} mean={fmt(rt['mean'])}ms "
+              f"p50={fmt(rt['p50'])}ms p90={fmt(rt['p90'])}ms p99={fmt(rt['p99'])}ms max={fmt(rt['max'])}ms")
+        depth = self.queue_depth.summary()
+        print(f"• Dubina reda koordinatora: p50={fmt(depth['p50'])} max={fmt(depth['max'])}")
+        print(f"• Receive timeouti: koordinator {self.receive_timeouts}, vozači {self.rider_receive_timeouts}")
+        rates = self.rates(self.received)
+        for ontology in sorted(self.received):
+            delivery = self.delivery.get(ontology)
+            p50 = fmt(delivery.quantile(0.5)) if delivery else "-"
+            print(f"• {ontology:12s} {self.received[ontology]:6d} primljeno, "
+                  f"{rates[ontology]:8.1f}/s, "
+                  f"{self.received_bytes[ontology] / self.received[ontology]:6.0f} B/poruka, "
+                  f"dostava p50={p50}ms")
+        print("="*80)
+
+    def prometheus(self):
+        """Sve metrike u Prometheus text formatu"""
+        lines = ["# TYPE motogp_round_trip_ms histogram"]
+        lines += self.round_trip.prometheus("motogp_round_trip_ms")
+        lines.append("# TYPE motogp_delivery_ms histogram")
+        for ontology, histogram in sorted(self.delivery.items()):
+            lines += histogram.prometheus("motogp_delivery_ms", f'ontology="{ontology}"')
+        lines.append("# TYPE motogp_queue_depth histogram")
+        lines += self.queue_depth.prometheus("motogp_queue_depth")
+        lines.append("# TYPE motogp_messages_received_total counter")
+        lines += [f'motogp_messages_received_total{{ontology="{o}"}} {n}'
+                  for o, n in sorted(self.received.items())]
+        lines.append("# TYPE motogp_messages_sent_total counter")
+        lines += [f'motogp_messages_sent_total{{ontology="{o}"}} {n}'
+                  for o, n in sorted(self.sent.items())]
+        lines.append("# TYPE motogp_received_bytes_total counter")
+        lines += [f'motogp_received_bytes_total{{ontology="{o}"}} {n}'
+                  for o, n in sorted(self.received_bytes.items())]
+        lines.append("# TYPE motogp_receive_timeouts_total counter")
+        lines.append(f'motogp_receive_timeouts_total{{agent="coordinator"}} {self.receive_timeouts}')
+        lines.append(f'motogp_receive_timeouts_total{{agent="riders"}} {self.rider_receive_timeouts}')
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, port, host="127.0.0.1"):
+        """Lokalni HTTP endpoint: / (Prometheus tekst) ili /json (sažetak)"""
+        self._server = await asyncio.start_server(self._handle_scrape, host, port)
+        return self._server
+
+    async def _handle_scrape(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ")[1].decode() if b" " in request else "/"
+            if path.startswith("/json"):
+                body = json.dumps(self.summary()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                body = self.prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
@@ -0,0 +1 @@
+"""Storage package - spremanje podataka o krugovima i rezultatima"""
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+LapStore - Kolumnarni zapis krugova jednog vozača
+Prealocirano NumPy strukturirano polje umjesto liste dictova; u results
+poruci putuje kao base64 sirovih bajtova, a koordinator ga izvozi direktno
+u stupce DataFrame-a.
+"""
+
+import base64
+
+import numpy as np
+
+LAP_DTYPE = np.dtype([
+    ('lap', '<i4'),
+    ('time', '<f8'),
+    ('tire_wear', '<f8'),
+    ('position', '<i4'),
+    ('overtake', '?'),
+    ('compound', 'S8'),    # guma na kojoj je krug odvezen (mijenja se pit stopom)
+    ('stint_lap', '<i4')   # krug na toj gumi, od 1
+])
+
+ENCODING = 'lap_store/v2'
+
+# lap_store/v1 - bez gume i stint kruga (stariji vozači, results/v1 i v2)
+LEGACY_LAP_DTYPE = np.dtype([
+    ('lap', '<i4'),
+    ('time', '<f8'),
+    ('tire_wear', '<f8'),
+    ('position', '<i4'),
+    ('overtake', '?')
+])
+LEGACY_ENCODING = 'lap_store/v1'
+
+
+def upgrade_laps(laps):
+    """Polje u LAP_DTYPE; v1 krugovi dobivaju praznu gumu i stint_lap = lap (bez pit stopova)"""
+    if laps.dtype == LAP_DTYPE:
+        return laps
+    upgraded = np.zeros(len(laps), dtype=LAP_DTYPE)
+    for name in laps.dtype.names:
+        upgraded[name] = laps[name]
+    if 'stint_lap' not in laps.dtype.names:
+        upgraded['stint_lap'] = laps['lap']
+    return upgraded
+
+
+class LapStore:
+    """Krugovi jednog vozača u prealociranom strukturiranom polju"""
+
+    def __init__(self, num_laps):
+        self._data = np.zeros(num_laps, dtype=LAP_DTYPE)
+        self._size = 0
+
+    def append(self, lap, time, tire_wear, position, overtake=False, compound='', stint_lap=None):
+        if self._size == len(self._data):
+            # Rezerva ako utrka ima više krugova od planiranih
+            self._data = np.resize(self._data, max(1, 2 * len(self._data)))
+        stint_lap = lap if stint_lap is None else stint_lap
+        self._data[self._size] = (lap, time, tire_wear, position, overtake, compound, stint_lap)
+        self._size += 1
+
+    @property
+    def data(self):
+        """Popunjeni dio polja (view, bez kopiranja)"""
+        return self._data[:self._size]
+
+    def column(self, name):
+        return self.data[name]
+
+    def __getitem__(self, idx):
+        # Element strukturiranog polja je view - lap_data[-1]['overtake'] = True radi
+        return self.data[idx]
+
+    def __len__(self):
+        return self._size
+
+    def encode(self):
+        """Kompaktni payload za JSON results poruku"""
+        return {
+            'encoding': ENCODING,
+            'data': base64.b64encode(self.data.tobytes()).decode('ascii')
+        }
+
+    @staticmethod
+    def decode(payload):
+        """Payload iz encode(), polje iz kompaktne results poruke ili lista dictova → strukturirano polje"""
+        if isinstance(payload, np.ndarray):
+            return upgrade_laps(payload)
+        if isinstance(payload, dict) and payload.get('encoding') == ENCODING:
+            return np.frombuffer(base64.b64decode(payload['data']), dtype=LAP_DTYPE)
+        if isinstance(payload, dict) and payload.get('encoding') == LEGACY_ENCODING:
+            return upgrade_laps(np.frombuffer(base64.b64decode(payload['data']), dtype=LEGACY_LAP_DTYPE))
+
+        records = [(d['lap'], d['time'], d['tire_wear'], d['position'], d['overtake'],
+                    d.get('compound', ''), d.get('stint_lap', d['lap']))
+                   for d in payload]
+        return np.array(records, dtype=LAP_DTYPE)
+
+
+def tire_strategy(laps, default):
+    """Gume po stintovima: 'medium' ili 'medium>soft' uz pit stop; krugovi bez gume = default"""
+    starts = laps['compound'][laps['stint_lap'] == 1]
+    compounds = [compound.decode('utf-8') or default for compound in starts.tolist()]
+    return '>'.join(compounds) or default
+
+
+def laps_dataframe(rider_ids, lap_arrays, compounds=None):
+    """
+    Stupci lap_data CSV-a iz polja svih vozača - bez Python petlje po krugu.
+    compounds: guma po vozaču za krugove bez zapisane gume (lap_store/v1).
+    """
+    import pandas as pd
+
+    lap_arrays = [upgrade_laps(laps) for laps in lap_arrays]
+    if not lap_arrays:
+        return pd.DataFrame(columns=['rider_id', 'lap', 'lap_time', 'tire_wear',
+                                     'position', 'overtake', 'tire_compound', 'stint_lap'])
+
+    lengths = [len(a) for a in lap_arrays]
+    laps = np.concatenate(lap_arrays)
+    tire_compound = np.char.decode(laps['compound'], 'utf-8')
+    if compounds is not None:
+        tire_compound = np.where(tire_compound == '', np.repeat(compounds, lengths), tire_compound)
+    return pd.DataFrame({
+        'rider_id': np.repeat(rider_ids, lengths),
+        'lap': laps['lap'],
+        'lap_time': laps['time'],
+        'tire_wear': laps['tire_wear'],
+        'position': laps['position'],
+        'overtake': laps['overtake'],
+        'tire_compound': tire_compound,
+        'stint_lap': laps['stint_lap']
+    })
@@ -0,0 +1,113 @@
+"""
+ParquetResultSink - Particionirani Parquet dataset svih utrka
+Svaki run se dodaje u results/dataset/{race_results,lap_data}/ particioniran
+po config_hash / tire_compound / run_id, a catalog.csv drži po jedan red
+po runu. Upiti čitaju samo potrebne stupce i particije.
+Zahtijeva opcionalni paket pyarrow.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from config.race_config import RaceConfig
+
+PARTITIONING = ['config_hash', 'tire_compound', 'run_id']
+TABLES = ('race_results', 'lap_data')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError(
+            "Parquet sink zahtijeva pyarrow: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+class ParquetResultSink:
+    """Append-only kolumnarni dataset rezultata s katalogom runova"""
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(RaceConfig.RESULTS_DIR, 'dataset')
+        self.catalog_file = os.path.join(self.root, 'catalog.csv')
+
+    def write_run(self, df_results, df_laps, source='agents', run_id=None, config_hash=None):
+        """Dodaj jedan run u dataset i katalog, vrati run_id"""
+        pa = _require_pyarrow()
+
+        run_id = run_id or uuid.uuid4().hex
+        config_hash = config_hash or RaceConfig.config_hash()
+
+        df_results = df_results.assign(run_id=run_id, config_hash=config_hash)
+        # Lap data se particionira po gumi kruga (stariji lap data bez nje: guma vozača)
+        compounds = df_laps['rider_id'].map(df_results.set_index('rider_id')['tire_compound'])
+        if 'tire_compound' in df_laps:
+            compounds = df_laps['tire_compound'].where(df_laps['tire_compound'] != '', compounds)
+        df_laps = df_laps.assign(run_id=run_id, config_hash=config_hash, tire_compound=compounds)
+
+        for name, df in zip(TABLES, (df_results, df_laps)):
+            pa.dataset.write_dataset(
+                pa.Table.from_pandas(df, preserve_index=False),
+                os.path.join(self.root, name),
+                format='parquet',
+                partitioning=PARTITIONING,
+                partitioning_flavor='hive',
+                basename_template=f'{run_id}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore'
+            )
+
+        winner = df_results.loc[df_results['total_time'].idxmin()]
+        self._append_catalog({
+            'run_id': run_id,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'config_hash': config_hash,
+            'source': source,
+            'seed': df_results['seed'].iloc[0] if 'seed' in df_results else None,
+            'num_riders': len(df_results),
+            'num_laps': int(df_laps['lap'].max()) if len(df_laps) else 0,
+            'winner_rider_id': int(winner['rider_id']),
+            'winner_tire_compound': winner['tire_compound'],
+            'winning_time': float(winner['total_time'])
+        })
+        return run_id
+
+    def _append_catalog(self, row):
+        os.makedirs(self.root, exist_ok=True)
+        header = not os.path.exists(self.catalog_file)
+        pd.DataFrame([row]).to_csv(self.catalog_file, mode='a', header=header, index=False)
+
+    def catalog(self):
+        """Katalog svih runova (jedan red po runu)"""
+        if not os.path.exists(self.catalog_file):
+            return pd.DataFrame()
+        return pd.read_csv(self.catalog_file)
+
+    def load(self, table='race_results', columns=None, filters=None):
+        """
+        Učitaj dio dataseta.
+        columns: lista stupaca (None = svi)
+        filters: {stupac: vrijednost ili lista vrijednosti} - particije
+        koje ne odgovaraju se uopće ne čitaju.
+        """
+        pa = _require_pyarrow()
+        if table not in TABLES:
+            raise ValueError(f"Nepoznata tablica: {table}")
+
+        path = os.path.join(self.root, table)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns)
+
+        dataset = pa.dataset.dataset(path, format='parquet', partitioning='hive')
+
+        expression = None
+        for column, value in (filters or {}).items():
+            field = pa.dataset.field(column)
+            condition = field.isin(value) if isinstance(value, (list, tuple, set)) else field == value
+            expression = condition if expression is None else expression & condition
+
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1 @@
+"""Unit testovi simulacije - pokretanje: python -m pytest tests"""
@@ -0,0 +1,77 @@
+"""VirtualClock - događaji se puštaju po simuliranom vremenu"""
+
+import asyncio
+import random
+
+import pytest
+
+from engine.clock import VirtualClock
+
+
+async def run_participants(clock, lap_times):
+    """Svaki sudionik vozi svoje krugove; vraća (sim_time, sudionik) redom puštanja"""
+    released = []
+
+    async def participant(idx, laps):
+        total = 0.0
+        for lap_time in laps:
+            total += lap_time
+            released.append((await clock.wait_until(total), idx))
+        clock.unregister()
+
+    for _ in lap_times:
+        clock.register()
+    await asyncio.gather(*(participant(idx, laps) for idx, laps in enumerate(lap_times)))
+    return released
+
+
+@pytest.mark.parametrize('playback_speed', [None, 1e6])
+def test_events_released_in_sim_time_order(playback_speed):
+    rng = random.Random(3)
+    lap_times = [[rng.uniform(85.0, 95.0) for _ in range(6)] for _ in range(5)]
+    clock = VirtualClock(playback_speed)
+
+    released = asyncio.run(run_participants(clock, lap_times))
+
+    expected = sorted((sum(laps[:k + 1]), idx) for idx, laps in enumerate(lap_times) for k in range(len(laps)))
+    assert released == expected
+    assert clock.now == max(sim_time for sim_time, _ in expected)
+
+
+def test_cancelled_wait_does_not_count_as_waiting():
+    async def scenario():
+        clock = VirtualClock()
+        clock.register()
+        clock.register()
+
+        stopped = asyncio.create_task(clock.wait_until(1.0))
+        await asyncio.sleep(0)
+        stopped.cancel()  # sudionik je prekinut, ali se još nije odjavio
+        await asyncio.sleep(0)
+
+        later = asyncio.create_task(clock.wait_until(5.0))
+        await asyncio.sleep(0)
+        assert not later.done()  # drugi sudionik još ne čeka
+
+        earlier = asyncio.create_task(clock.wait_until(2.0))
+        assert await earlier == 2.0
+        assert not later.done()
+
+        clock.unregister()
+        assert await later == 5.0
+
+    asyncio.run(scenario())
+
+
+def test_unregister_releases_remaining_waiters():
+    async def scenario():
+        clock = VirtualClock()
+        clock.register()
+        clock.register()
+        waiter = asyncio.create_task(clock.wait_until(10.0))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        clock.unregister()
+        assert await waiter == 10.0
+
+    asyncio.run(scenario())
@@ -0,0 +1,87 @@
+"""Round-trip kompaktnih shema poruka (messaging.codec)"""
+
+import base64
+
+import numpy as np
+import pytest
+
+from messaging import codec
+from storage.lap_store import LAP_DTYPE, LEGACY_LAP_DTYPE, LapStore
+
+
+def roundtrip(payload, ontology):
+    body, codec_name = codec.encode(payload, ontology)
+    return codec.decode(body, codec_name), codec_name
+
+
+@pytest.mark.parametrize('ontology, payload', [
+    ('lap_update', {'type': 'lap_update', 'rider_id': 3, 'lap': 7, 'total_time': 631.123456789, 'tire_wear': 0.125}),
+    ('position_update', {'position': 4}),
+    ('telemetry', {'type': 'telemetry', 'rider_id': 1, 'lap': 2, 'tire_wear': 0.01, 'position': 5,
+                   'avg_lap_time': 88.5, 'tire_compound': 'medium', 'stint_lap': 2}),
+    ('standings', {'lap': 3, 'standings': [2, 0, 1]}),
+    ('shard_update', {'shard': 1, 'updates': [(0, 1, 88.25, 0.003), (4, 1, 89.5, 0.002)]}),
+    ('leaderboard', {'updates': [(7, 2, 177.0, 0.006)]}),
+])
+def test_compact_roundtrip(ontology, payload):
+    decoded, codec_name = roundtrip(payload, ontology)
+    assert codec_name == codec.SCHEMAS[ontology].name
+    if 'updates' in payload:
+        payload = dict(payload, updates=[tuple(update) for update in payload['updates']])
+    assert decoded == payload
+
+
+def make_results(lap_data):
+    return {'type': 'race_results', 'rider_id': 2, 'total_time': 1760.5, 'final_position': 1,
+            'tire_compound': 'soft', 'pit_stops': 1, 'avg_lap_time': 88.0, 'lap_time_std': 0.7,
+            'skill_level': 0.9, 'aggression': 0.5, 'consistency': 0.8, 'tire_wear_final': 0.06,
+            'lap_data': lap_data}
+
+
+def test_results_roundtrip_keeps_lap_data():
+    store = LapStore(3)
+    store.append(1, 88.1, 0.003, 2, compound='soft')
+    store.append(2, 108.4, 0.0015, 2, compound='medium', stint_lap=1)
+    store.append(3, 89.9, 0.003, 1, overtake=True, compound='medium', stint_lap=2)
+
+    for lap_data in (store.encode(), store.data):
+        decoded, codec_name = roundtrip(make_results(lap_data), 'results')
+        assert codec_name == 'results/v4'
+        assert decoded['tire_compound'] == 'soft'
+        np.testing.assert_array_equal(decoded['lap_data'], store.data)
+
+
+def test_legacy_results_upgrade_lap_data():
+    legacy = np.zeros(2, dtype=LEGACY_LAP_DTYPE)
+    legacy['lap'] = [1, 2]
+    legacy['time'] = [88.0, 89.0]
+    schema = codec.SCHEMAS_BY_NAME['results/v3']
+    payload = make_results(None)
+    values = [payload[key].encode('utf-8') if isinstance(payload[key], str) else payload[key]
+              for key in schema.keys]
+    body = base64.b64encode(schema.packer.pack(*values) + legacy.tobytes()).decode('ascii')
+
+    decoded = codec.decode(body, 'results/v3')
+    assert decoded['lap_data'].dtype == LAP_DTYPE
+    np.testing.assert_array_equal(decoded['lap_data']['stint_lap'], [1, 2])
+    np.testing.assert_array_equal(decoded['lap_data']['time'], [88.0, 89.0])
+
+
+@pytest.mark.parametrize('ontology, payload', [
+    ('lap_update', {'type': 'lap_update', 'rider_id': 1, 'lap': 1, 'total_time': 1.0}),  # fali ključ
+    ('telemetry', {'type': 'telemetry', 'rider_id': 1, 'lap': 2, 'tire_wear': 0.01, 'position': 5,
+                   'avg_lap_time': 88.5, 'tire_compound': 'intermediate', 'stint_lap': 2}),  # > 8 bajtova
+    ('position_update', {'position': 2 ** 40}),  # izvan raspona 'i'
+    ('strategy', {'compound': 'soft'}),  # ontologija bez sheme
+])
+def test_payload_outside_schema_falls_back_to_json(ontology, payload):
+    decoded, codec_name = roundtrip(payload, ontology)
+    assert codec_name is None
+    assert decoded == payload
+
+
+def test_json_codec_setting_and_unknown_codec():
+    payload = {'position': 1}
+    assert codec.encode(payload, 'position_update', codec='json')[1] is None
+    with pytest.raises(ValueError):
+        codec.decode('', 'position_update/v99')
@@ -0,0 +1,60 @@
+"""FastRaceEngine prema agentskoj utrci (LocalBus, virtualni sat) za fiksni seed"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from config.race_context import RaceContext
+from engine.fast_engine import FastRaceEngine
+
+NUM_LAPS, NUM_RIDERS = 25, 8  # > 8 krugova: pairwise sum() bi se razlikovao od zbrajanja krug po krug
+
+
+@pytest.fixture(scope='module')
+def agent_race():
+    from main import MotoGPSimulation
+
+    async def run():
+        context = RaceContext(seed=20240611, TRANSPORT='local', VIRTUAL_CLOCK=True, SIMULATION_DELAY=0,
+                              NUM_LAPS=NUM_LAPS, NUM_RIDERS=NUM_RIDERS)
+        simulation = MotoGPSimulation(context)
+        try:
+            await simulation.setup_agents()
+            await simulation.run_race()
+        finally:
+            await simulation.shutdown()
+        return simulation.coordinator
+
+    coordinator = asyncio.run(run())
+    assert coordinator.race_finished
+    return coordinator
+
+
+@pytest.fixture(scope='module')
+def replay(agent_race):
+    results = sorted(agent_race.race_results, key=lambda result: result['rider_id'])
+    engine = FastRaceEngine(num_riders=NUM_RIDERS, num_laps=NUM_LAPS, config=agent_race.config)
+    return results, engine.replay(results[0]['seed'], [result['tire_compound'] for result in results])
+
+
+def test_lap_times_and_totals_bit_identical(replay):
+    results, batch = replay
+    for result in results:
+        rider_id = result['rider_id']
+        np.testing.assert_array_equal(result['lap_data']['time'], batch.lap_times[0, rider_id])
+        np.testing.assert_array_equal(result['lap_data']['tire_wear'], batch.tire_wear[0, rider_id])
+        assert result['total_time'] == batch.total_time[0, rider_id]
+
+
+def test_overtakes_and_positions_match_lap_stage(agent_race, replay):
+    results, batch = replay
+    assert [result['overtakes'] for result in results] == batch.overtakes[0].sum(axis=1).tolist()
+    assert [result['final_position'] for result in results] == batch.final_position[0].tolist()
+
+    stage = agent_race.lap_stage.dataframe().sort_values(['rider_id', 'lap']).reset_index(drop=True)
+    fast = batch.lap_dataframe()
+    for column in ('position', 'position_delta', 'passes', 'overtake'):
+        np.testing.assert_array_equal(stage[column].to_numpy(), fast[column].to_numpy(), err_msg=column)
+    for column in ('gap_to_leader', 'interval'):
+        np.testing.assert_allclose(stage[column].to_numpy(), fast[column].to_numpy(), rtol=0, atol=1e-9)
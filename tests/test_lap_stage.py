@@ -0,0 +1,47 @@
+"""LapStage - gapovi i pretjecanja na ručno složenim krugovima"""
+
+import numpy as np
+
+from agents.lap_stage import LapStage, pass_matrix
+
+
+def by_rider(result, column):
+    rows = np.sort(result.rows, order='rider_id')
+    return rows[column].tolist()
+
+
+def test_gaps_intervals_and_passes():
+    stage = LapStage(3)  # grid: rider 0 P1, rider 1 P2, rider 2 P3
+
+    lap1 = stage.complete_lap(1, {0: (90.0, 0.003), 1: (89.0, 0.002), 2: (91.5, 0.004)})
+    assert lap1.rows['rider_id'].tolist() == [1, 0, 2]
+    assert by_rider(lap1, 'position') == [2, 1, 3]
+    assert by_rider(lap1, 'gap_to_leader') == [1.0, 0.0, 2.5]
+    assert by_rider(lap1, 'interval') == [1.0, 0.0, 1.5]
+    assert by_rider(lap1, 'position_delta') == [-1, 1, 0]
+    assert by_rider(lap1, 'passes') == [0, 1, 0]
+    assert lap1.overtakes.tolist() == [[1, 0]]
+
+    # Rider 0 prestigne ridera 1, a rider 2 njih obojicu - rider 0 je i prestignut
+    lap2 = stage.complete_lap(2, {0: (178.0, 0.006), 1: (179.0, 0.004), 2: (177.5, 0.008)})
+    assert lap2.rows['rider_id'].tolist() == [2, 0, 1]
+    assert by_rider(lap2, 'position_delta') == [0, -2, 2]
+    assert by_rider(lap2, 'passes') == [1, 0, 2]
+    assert by_rider(lap2, 'overtake') == [True, False, True]
+    assert sorted(map(tuple, lap2.overtakes.tolist())) == [(0, 1), (2, 0), (2, 1)]
+
+    assert stage.overtakes_by_rider() == {0: 1, 1: 1, 2: 1}
+
+
+def test_equal_times_ordered_by_rider_id():
+    stage = LapStage(2)
+    result = stage.complete_lap(1, {1: (90.0, 0.0), 0: (90.0, 0.0)})
+    assert result.rows['rider_id'].tolist() == [0, 1]
+    assert result.rows['passes'].tolist() == [0, 0]
+
+
+def test_pass_matrix_broadcasts_over_leading_axes():
+    previous = np.array([[1, 2, 3], [3, 2, 1]])
+    position = np.array([[3, 1, 2], [3, 2, 1]])
+    passes = pass_matrix(previous, position).sum(axis=-1)
+    assert passes.tolist() == [[0, 1, 1], [0, 0, 0]]
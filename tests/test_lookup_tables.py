@@ -0,0 +1,78 @@
+"""Lookup tablice prema zatvorenom obliku modela kruga"""
+
+import numpy as np
+import pytest
+
+from config.race_config import RaceConfig
+from engine.lookup_tables import RiderLapTables
+
+
+AGGRESSION, SKILL, NUM_LAPS = 0.6, 0.9, 12
+
+
+@pytest.fixture
+def tables():
+    return RiderLapTables(RaceConfig, aggression=AGGRESSION, skill_level=SKILL, num_laps=NUM_LAPS)
+
+
+def closed_form(compound, config=RaceConfig):
+    """(trošenje nakon k-tog kruga, vrijeme k-tog kruga) za k = 1..NUM_LAPS"""
+    spec = config.TIRE_COMPOUNDS[compound]
+    laps = np.arange(1, NUM_LAPS + 1)
+    wear = np.minimum(laps * spec['degradation_rate'] * (1.0 + AGGRESSION * 0.5), 1.0)
+    wear_before = np.minimum((laps - 1) * spec['degradation_rate'] * (1.0 + AGGRESSION * 0.5), 1.0)
+    lap_time = config.LAP_BASE_TIME / spec['base_speed'] + wear_before * 5.0 + (2.0 - SKILL) * 2.0
+    return wear, lap_time
+
+
+@pytest.mark.parametrize('compound', list(RaceConfig.TIRE_COMPOUNDS))
+def test_tables_match_closed_form(tables, compound):
+    wear, lap_time = closed_form(compound)
+    idx = tables.index[compound]
+    np.testing.assert_allclose(tables.wear[idx], wear, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(tables.lap_time[idx], lap_time, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(tables.stint_time[idx, 1:], np.cumsum(lap_time), rtol=0, atol=1e-9)
+
+    lap_times, stint_wear = tables.stint(compound)
+    assert lap_times == tables.lap_time[idx].tolist()
+    assert stint_wear == tables.wear[idx].tolist()
+
+
+def test_wear_is_capped_at_one():
+    tables = RiderLapTables(RaceConfig.scoped(TIRE_COMPOUNDS={
+        'soft': {'base_speed': 1.0, 'degradation_rate': 0.4}}), aggression=1.0, skill_level=1.0, num_laps=4)
+    assert tables.wear[0].tolist() == pytest.approx([0.6, 1.0, 1.0, 1.0])
+
+
+def test_score_plan_sums_stints_and_pit_loss(tables):
+    soft, medium = closed_form('soft')[1], closed_form('medium')[1]
+    expected = soft[:5].sum() + medium[:7].sum() + 20.0
+    assert tables.score_plan([('soft', 5), ('medium', 7)], pit_loss=20.0) == pytest.approx(expected, abs=1e-9)
+
+    # Prvi stint nastavlja trenutnu gumu od stint_lap
+    assert tables.score_plan([('soft', 4)], stint_lap=3) == pytest.approx(soft[3:7].sum(), abs=1e-9)
+
+
+def test_score_plans_matches_score_plan(tables):
+    plans = [[('soft', 12)], [('medium', 6), ('hard', 6)], [('soft', 3), ('medium', 0)], []]
+    scores = tables.score_plans(plans, pit_loss=18.0, stint_lap=0)
+    assert scores.tolist() == [tables.score_plan(plan, pit_loss=18.0) for plan in plans]
+    assert scores[3] == 0.0
+
+
+def test_score_plan_applies_lap_time_floor():
+    tables = RiderLapTables(RaceConfig.scoped(LAP_BASE_TIME=60.0), aggression=AGGRESSION,
+                            skill_level=SKILL, num_laps=NUM_LAPS)
+    assert tables.score_plan([('soft', 10)]) == 800.0
+
+
+@pytest.mark.parametrize('plan, stint_lap', [
+    ([('soft', 8)], 5),          # izlazi iz tablice
+    ([('soft', 13)], 0),
+    ([('soft', 2)], 13),
+    ([('soft', -1)], 0),
+    ([('wet', 2)], 0),           # nepoznata guma
+])
+def test_score_plan_rejects_invalid_plans(tables, plan, stint_lap):
+    with pytest.raises(ValueError):
+        tables.score_plan(plan, stint_lap=stint_lap)
@@ -0,0 +1,40 @@
+"""PositionTracker prema referentnom poretku sortiranjem"""
+
+import random
+
+from agents.position_tracker import PositionTracker
+
+
+def reference_standings(latest):
+    """Poredak sortiranjem svih vozača - više krugova, pa manje vrijeme, pa rider_id"""
+    return sorted(latest, key=lambda rider_id: (-latest[rider_id][0], latest[rider_id][1], rider_id))
+
+
+def test_matches_sorted_reference_over_random_race():
+    rng = random.Random(7)
+    tracker = PositionTracker()
+    latest = {}  # {rider_id: (lap, total_time)}
+    totals = {rider_id: 0.0 for rider_id in range(12)}
+
+    for lap in range(1, 9):
+        riders = list(totals)
+        rng.shuffle(riders)  # vozači javljaju krug proizvoljnim redom
+        for rider_id in riders:
+            totals[rider_id] += rng.uniform(85.0, 95.0)
+            latest[rider_id] = (lap, totals[rider_id])
+            position = tracker.update(rider_id, lap, totals[rider_id])
+
+            expected = reference_standings(latest)
+            assert tracker.standings() == expected
+            assert position == expected.index(rider_id) + 1
+            assert all(tracker.position(other) == idx + 1 for idx, other in enumerate(expected))
+
+
+def test_lap_ahead_beats_lower_total_time_and_ties_break_on_rider_id():
+    tracker = PositionTracker()
+    tracker.update(0, 1, 100.0)
+    tracker.update(0, 2, 200.0)
+    tracker.update(1, 1, 99.0)
+    tracker.update(2, 1, 99.0)
+    assert tracker.standings() == [0, 1, 2]
+    assert len(tracker) == 3 and 2 in tracker and 5 not in tracker
@@ -0,0 +1,30 @@
+"""Monte Carlo sweep - postavke i histogrami dolaze iz configa sweepa"""
+
+import numpy as np
+
+from config.race_config import RaceConfig
+from engine.lookup_tables import RiderLapTables
+from engine.sweep import HISTOGRAM_BINS, finish_time_bins, run_sweep
+
+
+def test_workers_use_sweep_config_and_quantiles_follow_mean():
+    # Workeri ne smiju simulirati s modulskim RaceConfig (LAP_BASE_TIME = 90)
+    config = RaceConfig.scoped(LAP_BASE_TIME=100.0)
+    result = run_sweep(races_per_assignment=200, assignments=[('soft', 'hard')], seed=5,
+                       max_workers=1, num_riders=4, num_laps=10, config=config)
+    summary = result.compound_summary().set_index('tire_compound')
+
+    for compound in ('soft', 'hard'):
+        row = summary.loc[compound]
+        fastest = RiderLapTables(config, aggression=0.3, skill_level=1.0, num_laps=10)
+        assert row['mean_time'] > fastest.stint_time[fastest.index[compound], 10] - 10.0
+        assert row['p05_time'] < row['p50_time'] < row['p95_time']
+        assert abs(row['p50_time'] - row['mean_time']) < 0.5 * row['std_time']
+    assert summary.loc['medium', 'starts'] == 0
+
+
+def test_bins_are_narrow_compared_to_finish_time_spread():
+    bins = finish_time_bins(RaceConfig, 20)
+    assert bins.shape == (len(RaceConfig.TIRE_COMPOUNDS), HISTOGRAM_BINS + 1)
+    width = np.diff(bins, axis=1)
+    assert np.all(width < 0.25)  # σ ukupnog vremena na 20 krugova je ~2.4 s